@@ -1,6 +1,39 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from .bulk import update_tasks, update_subtasks
 from .models import Category, Priority, Task, SubTask, Note
 
+
+STATUS_CHOICES = [('', '---------')] + Task._meta.get_field('status').choices
+
+
+class TaskActionForm(ActionForm):
+    """Value fields shown next to the admin action dropdown"""
+    status = forms.ChoiceField(choices=STATUS_CHOICES, required=False)
+    category = forms.ModelChoiceField(queryset=Category.objects.all(), required=False)
+    priority = forms.ModelChoiceField(queryset=Priority.objects.all(), required=False)
+
+
+class SubTaskActionForm(ActionForm):
+    status = forms.ChoiceField(choices=STATUS_CHOICES, required=False)
+
+
+def bulk_action(field, description, apply):
+    """Admin action applying ``field`` from the action form to the selected rows in one UPDATE."""
+    @admin.action(description=description)
+    def action(modeladmin, request, queryset):
+        form = modeladmin.action_form(request.POST)
+        form.fields['action'].choices = modeladmin.get_action_choices(request)
+        value = form.cleaned_data.get(field) if form.is_valid() else None
+        if not value:
+            modeladmin.message_user(request, f"Choose a {field} next to the action first.", messages.WARNING)
+            return
+        rows = apply(queryset, field, value)
+        modeladmin.message_user(request, f"Updated {rows} row{'' if rows == 1 else 's'}.", messages.SUCCESS)
+    action.__name__ = f'set_{field}'
+    return action
+
 class SubTaskInline(admin.TabularInline):
     model = SubTask
     extra = 1
@@ -16,9 +49,15 @@ class NoteInline(admin.StackedInline):
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
-    list_display = ("title", "status", "deadline", "priority", "category",)
+    list_display = ("title", "status", "progress", "deadline", "priority", "category",)
     list_filter = ("status", "priority", "category",)
     search_fields = ("title", "description",)
+    action_form = TaskActionForm
+    actions = [
+        bulk_action("status", "Set status of selected tasks", update_tasks),
+        bulk_action("category", "Move selected tasks to category", update_tasks),
+        bulk_action("priority", "Change priority of selected tasks", update_tasks),
+    ]
   
     inlines = [SubTaskInline, NoteInline]
 
@@ -28,6 +67,8 @@ class SubTaskAdmin(admin.ModelAdmin):
     list_display = ("title", "status", "parent_task",)
     list_filter = ("status",)
     search_fields = ("title",)
+    action_form = SubTaskActionForm
+    actions = [bulk_action("status", "Set status of selected subtasks", update_subtasks)]
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -36,7 +77,8 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Priority)
 class PriorityAdmin(admin.ModelAdmin):
-    list_display = ("priority_name",)
+    list_display = ("priority_name", "rank",)
+    list_editable = ("rank",)
     search_fields = ("priority_name",)
 
 @admin.register(Note)
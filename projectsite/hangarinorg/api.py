@@ -0,0 +1,304 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.gzip import gzip_page
+
+from .filters import (
+    filter_tasks, filter_subtasks, filter_notes, apply_order,
+    TASK_SORTS, SUBTASK_SORTS, NOTE_SORTS,
+)
+from . import sync
+from .forms import TaskForm, SubTaskForm, NoteForm, CategoryForm, PriorityForm
+from .models import Task, SubTask, Note, Category, Priority, Tombstone
+from .pagination import KeysetPaginator
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+class Resource:
+    """How a model is exposed over the API: fields, includable relations, filters and sorts.
+
+    ``includes`` maps an include name to ``(relation, resource name, many)``; single
+    relations are joined with ``select_related``, many relations are prefetched.
+    """
+
+    model = None
+    form_class = None
+    fields = ()
+    includes = {}
+    sorts = {}
+    default_order = ()
+
+    def filter(self, qs, params):
+        return qs
+
+    def serialize(self, obj, fields=None, includes=()):
+        data = {}
+        for name in fields or self.fields:
+            data[name] = self.model._meta.get_field(name).value_from_object(obj)
+        for name in includes:
+            relation, resource_name, many = self.includes[name]
+            resource = RESOURCES[resource_name]
+            if many:
+                data[name] = [resource.serialize(child) for child in getattr(obj, relation).all()]
+            else:
+                related = getattr(obj, relation)
+                data[name] = resource.serialize(related) if related is not None else None
+        return data
+
+
+class CategoryResource(Resource):
+    model = Category
+    form_class = CategoryForm
+    fields = ('id', 'category_name', 'created_at', 'updated_at')
+    sorts = {'name': 'category_name', 'created_at': 'created_at'}
+
+
+class PriorityResource(Resource):
+    model = Priority
+    form_class = PriorityForm
+    fields = ('id', 'priority_name', 'rank', 'created_at', 'updated_at')
+    sorts = {'name': 'priority_name', 'rank': 'rank'}
+
+
+class TaskResource(Resource):
+    model = Task
+    form_class = TaskForm
+    fields = (
+        'id', 'title', 'description', 'deadline', 'status', 'category', 'priority',
+        'progress', 'subtask_total', 'subtask_completed', 'created_at', 'updated_at',
+    )
+    includes = {
+        'category': ('category', 'categories', False),
+        'priority': ('priority', 'priorities', False),
+        'subtasks': ('subtasks', 'subtasks', True),
+        'notes': ('note_set', 'notes', True),
+    }
+    sorts = TASK_SORTS
+
+    def filter(self, qs, params):
+        return filter_tasks(qs, params)
+
+
+class SubTaskResource(Resource):
+    model = SubTask
+    form_class = SubTaskForm
+    fields = ('id', 'title', 'status', 'parent_task', 'created_at', 'updated_at')
+    includes = {'parent_task': ('parent_task', 'tasks', False)}
+    sorts = SUBTASK_SORTS
+    default_order = ('-updated_at',)
+
+    def filter(self, qs, params):
+        return filter_subtasks(qs, params)
+
+
+class NoteResource(Resource):
+    model = Note
+    form_class = NoteForm
+    fields = ('id', 'content', 'task', 'created_at', 'updated_at')
+    includes = {'task': ('task', 'tasks', False)}
+    sorts = NOTE_SORTS
+    default_order = ('-created_at',)
+
+    def filter(self, qs, params):
+        return filter_notes(qs, params)
+
+
+RESOURCES = {
+    'tasks': TaskResource(),
+    'subtasks': SubTaskResource(),
+    'notes': NoteResource(),
+    'categories': CategoryResource(),
+    'priorities': PriorityResource(),
+}
+
+
+@method_decorator(gzip_page, name='dispatch')
+class ApiView(LoginRequiredMixin, View):
+    """Shared plumbing: session auth answered with 401 JSON, compact JSON bodies, field selection."""
+
+    resource_name = None
+
+    @property
+    def resource(self):
+        return RESOURCES[self.resource_name]
+
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'Authentication required.'}, status=401)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as exc:
+            return self.json({'error': str(exc), **exc.extra}, status=exc.status)
+
+    def json(self, data, status=200):
+        return JsonResponse(
+            data, status=status, encoder=DjangoJSONEncoder, safe=False,
+            json_dumps_params={'separators': (',', ':')},
+        )
+
+    def selected(self, param, allowed):
+        """Parse a comma-separated ``?fields=``/``?include=`` list, rejecting unknown names."""
+        names = [name.strip() for name in self.request.GET.get(param, '').split(',') if name.strip()]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ApiError(f'Unknown {param}: {", ".join(unknown)}', allowed=list(allowed))
+        return names
+
+    def narrow(self, qs, fields, includes, ordering=()):
+        """Read only the selected columns (plus ordering columns), joining or prefetching includes."""
+        resource = self.resource
+        joins = {path.rsplit('__', 1)[0] for path in ordering if '__' in path}
+        only = {resource.model._meta.pk.name, *fields}
+        only.update(path for path in ordering if path != 'search_rank')
+        prefetches = []
+        for name in includes:
+            relation, resource_name, many = resource.includes[name]
+            if many:
+                prefetches.append(Prefetch(relation, queryset=RESOURCES[resource_name].model.objects.all()))
+            else:
+                joins.add(relation)
+                only.update(f'{relation}__{f}' for f in RESOURCES[resource_name].fields)
+        if joins:
+            qs = qs.select_related(*joins)
+        if prefetches:
+            qs = qs.prefetch_related(*prefetches)
+        return qs.only(*only)
+
+    def requested(self):
+        """``(fields, includes)`` from the query string; included relations are always output."""
+        resource = self.resource
+        fields = self.selected('fields', resource.fields) or list(resource.fields)
+        includes = self.selected('include', resource.includes)
+        fields += [name for name in includes if name not in fields and name in resource.fields]
+        return fields, includes
+
+    def limit(self):
+        default = getattr(settings, 'HANGARIN_PAGE_SIZE', 50)
+        maximum = getattr(settings, 'HANGARIN_API_MAX_PAGE_SIZE', 200)
+        try:
+            return max(1, min(int(self.request.GET.get('limit', default)), maximum))
+        except (ValueError, TypeError):
+            raise ApiError('limit must be an integer.')
+
+    def parse_body(self):
+        try:
+            data = json.loads(self.request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            raise ApiError('Request body is not valid JSON.')
+        if not isinstance(data, dict):
+            raise ApiError('Request body must be a JSON object.')
+        return data
+
+    def save(self, data, instance=None, status=200):
+        form = self.resource.form_class(data=data, instance=instance)
+        if not form.is_valid():
+            raise ApiError('Validation failed.', errors=form.errors.get_json_data())
+        obj = form.save()
+        return self.json(self.resource.serialize(obj), status=status)
+
+
+class ApiListView(ApiView):
+    """``GET`` a cursor-paginated, filtered list; ``POST`` a new object."""
+
+    def get(self, request):
+        resource = self.resource
+        fields, includes = self.requested()
+        qs = resource.filter(resource.model.objects.all(), request.GET)
+        qs = apply_order(qs, request.GET, resource.sorts, resource.default_order)
+        # the cursor reads the ordering columns, so they stay loaded whatever ?fields= says
+        ordering = [f.lstrip('-') for f in (qs.query.order_by or resource.model._meta.ordering) if isinstance(f, str)]
+        qs = self.narrow(qs, fields, includes, ordering)
+
+        page = KeysetPaginator(qs, self.limit()).page(request.GET.get('cursor'), request.GET)
+        return self.json({
+            'results': [resource.serialize(obj, fields, includes) for obj in page],
+            'next': request.path + page.next_url if page.has_next else None,
+            'previous': request.path + page.previous_url if page.has_previous else None,
+        })
+
+    def post(self, request):
+        return self.save(self.parse_body(), status=201)
+
+
+class ApiDetailView(ApiView):
+    """``GET``, ``PATCH``/``PUT`` or ``DELETE`` one object."""
+
+    def get_object(self, fields=None, includes=()):
+        qs = self.resource.model.objects.all()
+        if fields:
+            qs = self.narrow(qs, fields, includes)
+        try:
+            return qs.get(pk=self.kwargs['pk'])
+        except self.resource.model.DoesNotExist:
+            raise ApiError('Not found.', status=404)
+
+    def get(self, request, pk):
+        fields, includes = self.requested()
+        return self.json(self.resource.serialize(self.get_object(fields, includes), fields, includes))
+
+    def patch(self, request, pk):
+        obj = self.get_object()
+        # unspecified fields keep their current values, validated through the same form as the HTML views
+        data = model_to_dict(obj, fields=self.resource.form_class._meta.fields)
+        data.update(self.parse_body())
+        return self.save(data, instance=obj)
+
+    def put(self, request, pk):
+        return self.save(self.parse_body(), instance=self.get_object())
+
+    def delete(self, request, pk):
+        self.get_object().delete()
+        return HttpResponse(status=204)
+
+
+class ApiSyncView(ApiView):
+    """``GET ?since=<cursor>``: every resource's rows changed since the cursor, plus deleted ids.
+
+    Upsert ``changes`` by id, then drop the ``deleted`` ids, and ask again with the returned
+    ``cursor`` while ``has_more`` is true. Without ``since``, or when the answer says
+    ``reset`` (the cursor is older than the kept tombstones), start from an empty store.
+    """
+
+    def get(self, request):
+        since = request.GET.get('since')
+        try:
+            position = sync.decode_cursor(since) if since else None
+        except ValueError as exc:
+            raise ApiError(str(exc))
+        reset = position is not None and sync.expired(position)
+        if reset:
+            position = None
+
+        sources = {name: (resource.model.objects.all(), 'updated_at') for name, resource in RESOURCES.items()}
+        sources[sync.DELETED] = (Tombstone.objects.all(), 'deleted_at')
+        rows, cursor, has_more = sync.changes_since(sources, position, self.limit())
+
+        names = {resource.model._meta.model_name: name for name, resource in RESOURCES.items()}
+        changes = {name: [] for name in RESOURCES}
+        deleted = {name: [] for name in RESOURCES}
+        for name, obj in rows:
+            if name == sync.DELETED:
+                deleted[names[obj.model_name]].append(obj.object_id)
+            else:
+                changes[name].append(RESOURCES[name].serialize(obj))
+        return self.json({
+            'changes': changes,
+            'deleted': deleted,
+            'cursor': sync.encode_cursor(cursor),
+            'has_more': has_more,
+            'reset': reset,
+        })
@@ -0,0 +1,51 @@
+from django.utils import timezone
+
+from .lookups import bump_once, bump_version
+from .models import Task, SubTask
+
+
+# Bulk actions offered by the task and subtask lists (and mirrored in the admin).
+# Each one is a single UPDATE, or a delete that Django batches by primary key,
+# however many rows are selected. A delete still sends post_delete per row, so the
+# cache versions those signals bump are collected and bumped once.
+
+TASK_ACTIONS = [
+    ('status', 'Set status'),
+    ('category', 'Move to category'),
+    ('priority', 'Change priority'),
+    ('delete', 'Delete'),
+]
+
+# Subtasks take their category and priority from the parent task
+SUBTASK_ACTIONS = [
+    ('status', 'Set status'),
+    ('delete', 'Delete'),
+]
+
+
+def update_tasks(qs, action, value):
+    """Apply a task action to ``qs`` and return the number of tasks changed."""
+    if action == 'delete':
+        with bump_once():
+            _, deleted = qs.delete()
+        return deleted.get(Task._meta.label, 0)
+    if action == 'status':
+        rows = qs.set_status(value)
+    else:
+        # update() skips auto_now, so stamp updated_at like a form save would
+        rows = qs.update(**{action: value, 'updated_at': timezone.now()})
+    # ...and skips the save signals, so invalidate the cached task lookups here
+    bump_version('task')
+    return rows
+
+
+def update_subtasks(qs, action, value):
+    """Apply a subtask action to ``qs``; SubTaskQuerySet refreshes the parents' progress."""
+    if action == 'delete':
+        with bump_once():
+            _, deleted = qs.delete()
+        return deleted.get(SubTask._meta.label, 0)
+    rows = qs.update(status=value, updated_at=timezone.now())
+    # bulk updates send no save signals, so drop the cached fragments here
+    bump_version('subtask')
+    return rows
@@ -0,0 +1,35 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from hangarinorg.middleware import collect_thread_queries
+
+
+def _own_connection(query):
+    def run():
+        # a worker thread keeps its connection between uses, so apply the same
+        # CONN_MAX_AGE/health rules Django applies around a request
+        close_old_connections()
+        try:
+            with collect_thread_queries():
+                return query()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_queries(queries):
+    """Run a ``{name: callable}`` mapping of independent ORM reads concurrently.
+
+    Django's own async ORM methods (``acount()``, ``aaggregate()``...) all go through the
+    single thread-sensitive executor, so gathering them still runs them one at a time.
+    Here each callable gets a worker thread and therefore its own database connection,
+    so the queries overlap and the total wait tracks the slowest one. Only use it for
+    reads that need not see the request's own uncommitted writes.
+    """
+    names = list(queries)
+    results = await asyncio.gather(*[
+        sync_to_async(_own_connection(queries[name]), thread_sensitive=False)() for name in names
+    ])
+    return dict(zip(names, results))
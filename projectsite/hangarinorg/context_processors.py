@@ -1,19 +1,17 @@
-from .models import Category
+from . import lookups
 
 
 def categories(request):
-    """Provide categories to all templates for dynamic sidebar rendering."""
+    """Provide categories to all templates for dynamic sidebar rendering (served from the lookup cache)."""
     return {
-        'categories': Category.objects.all()
+        'categories': lookups.categories()
     }
 
 
-from .models import Task
-
 def parent_tasks(request):
     """Provide a short list of tasks (parents) for the Subtasks sidebar submenu."""
     try:
-        tasks = Task.objects.order_by('-updated_at')[:12]
+        tasks = lookups.parent_tasks()
     except Exception:
         tasks = []
     return {'parent_tasks': tasks}
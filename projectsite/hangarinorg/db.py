@@ -0,0 +1,52 @@
+import logging
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply ``HANGARIN_SQLITE_PRAGMAS`` to every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    # straight on the driver connection, so the statements stay out of the query counters
+    for name, value in getattr(settings, 'HANGARIN_SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(exc):
+    return 'database is locked' in str(exc) or 'database table is locked' in str(exc)
+
+
+def retry_on_lock(func, using=None):
+    """Run ``func`` in a transaction, retried with exponential backoff while SQLite reports a lock.
+
+    Only the outermost transaction can be retried; inside an ``atomic`` block the lock
+    error is raised as is. Settings: ``HANGARIN_DB_LOCK_RETRIES``, ``HANGARIN_DB_LOCK_BACKOFF_MS``.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if transaction.get_connection(using).in_atomic_block:
+            return func(*args, **kwargs)
+        retries = getattr(settings, 'HANGARIN_DB_LOCK_RETRIES', 3)
+        backoff = getattr(settings, 'HANGARIN_DB_LOCK_BACKOFF_MS', 100) / 1000
+        for attempt in range(retries + 1):
+            try:
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == retries or not is_locked(exc):
+                    raise
+                # jittered, so writers that collided do not collide again
+                delay = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                logger.warning('Database locked in %s, retry %d in %.0f ms', func.__name__, attempt + 1, delay * 1000)
+                time.sleep(delay)
+    return wrapper
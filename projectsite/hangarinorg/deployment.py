@@ -0,0 +1,208 @@
+import datetime
+import hashlib
+import logging
+import os
+import subprocess
+import time
+
+from django.conf import settings
+from django.db.models import Exists
+from django.utils import timezone
+
+from hangarinorg.models import DeployJob
+
+
+logger = logging.getLogger(__name__)
+
+MANAGE_DIR = "/home/rosevent/hangarin/projectsite"  # directory where manage.py is located
+PROJECT_DIR = "/home/rosevent/hangarin"  # where .git is
+WSGI_PATH = "/var/www/rosevent_pythonanywhere_com_wsgi.py"
+VENV_PATH = "/home/rosevent/Hangarinenv/bin"
+
+# Characters of command output kept per step (the tail, where errors end up)
+LOG_LIMIT = 20000
+
+OK = "ok"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class StepFailed(Exception):
+    pass
+
+
+def step_timeout():
+    return getattr(settings, 'HANGARIN_DEPLOY_STEP_TIMEOUT', 900)
+
+
+def enqueue():
+    """Queue a deploy and start a worker process for it; returns the job without waiting."""
+    job = DeployJob.objects.create()
+    try:
+        start_worker()
+    except OSError as exc:
+        job.status = DeployJob.FAILED
+        job.finished_at = timezone.now()
+        job.error = f'Could not start the deploy worker: {exc}'
+        job.save(update_fields=['status', 'finished_at', 'error'])
+        raise
+    return job
+
+
+def start_worker():
+    # a session of its own, so the worker outlives the request and the web worker's restarts
+    subprocess.Popen(
+        [f"{VENV_PATH}/python", "manage.py", "run_deploy"],
+        cwd=MANAGE_DIR,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def fail_stalled():
+    # every command is capped at the step timeout, so a job running longer than all of
+    # them together lost its worker (killed, or the machine restarted)
+    cutoff = timezone.now() - datetime.timedelta(seconds=step_timeout() * len(STEPS))
+    DeployJob.objects.filter(status=DeployJob.RUNNING, started_at__lt=cutoff).update(
+        status=DeployJob.FAILED, finished_at=timezone.now(), error='The deploy worker stopped before finishing.',
+    )
+
+
+def claim():
+    """Mark the oldest queued job running and return it.
+
+    Returns None when nothing is queued or another job is still running; that job's
+    worker picks up the queue once it is done, so deploys never overlap.
+    """
+    fail_stalled()
+    job = DeployJob.objects.filter(status=DeployJob.QUEUED).order_by('pk').first()
+    if job is None:
+        return None
+    running = DeployJob.objects.filter(status=DeployJob.RUNNING)
+    now = timezone.now()
+    claimed = (
+        DeployJob.objects.filter(pk=job.pk, status=DeployJob.QUEUED)
+        .filter(~Exists(running))
+        .update(status=DeployJob.RUNNING, started_at=now)
+    )
+    if not claimed:
+        return None
+    job.status, job.started_at = DeployJob.RUNNING, now
+    return job
+
+
+def run_pending():
+    """Run queued jobs one after another until none is left; returns the jobs that ran."""
+    jobs = []
+    while True:
+        job = claim()
+        if job is None:
+            return jobs
+        jobs.append(run(job))
+
+
+def run(job):
+    for name, step in STEPS:
+        entry = {'name': name, 'status': 'running', 'duration_ms': None, 'log': ''}
+        job.steps.append(entry)
+        job.save(update_fields=['steps'])
+        log = []
+        start = time.perf_counter()
+        try:
+            entry['status'] = step(job, log) or OK
+        except Exception as exc:
+            # a failing command is explained by its output in the step log
+            if not isinstance(exc, (StepFailed, subprocess.TimeoutExpired, OSError)):
+                logger.exception('Deploy %s failed in %s', job.pk, name)
+            entry['status'] = FAILED
+            job.status, job.error = DeployJob.FAILED, f'{name}: {exc}'
+        entry['duration_ms'] = round((time.perf_counter() - start) * 1000)
+        entry['log'] = '\n'.join(log)[-LOG_LIMIT:]
+        if job.status == DeployJob.FAILED:
+            break
+        job.save(update_fields=['steps', 'requirements_hash'])
+    else:
+        job.status = DeployJob.SUCCEEDED
+    job.finished_at = timezone.now()
+    job.save()
+    logger.info('Deploy %s %s', job.pk, job.status)
+    return job
+
+
+def command(args, cwd, log, check=True):
+    log.append(f'$ {" ".join(args)}')
+    result = subprocess.run(
+        args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=step_timeout(),
+    )
+    log.append(result.stdout.rstrip())
+    if check and result.returncode:
+        raise StepFailed(f'{args[0]} exited with status {result.returncode}')
+    return result
+
+
+def requirements_hash():
+    with open(os.path.join(PROJECT_DIR, 'requirements.txt'), 'rb') as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+def pull(job, log):
+    command(["git", "pull", "origin", "main"], PROJECT_DIR, log)
+
+
+def install(job, log):
+    digest = requirements_hash()
+    installed = (
+        DeployJob.objects.exclude(pk=job.pk).exclude(requirements_hash='')
+        .order_by('-pk').values_list('requirements_hash', flat=True).first()
+    )
+    if digest == installed:
+        job.requirements_hash = digest
+        log.append('requirements.txt is unchanged since the last install.')
+        return SKIPPED
+    command([f"{VENV_PATH}/pip", "install", "-r", "requirements.txt"], PROJECT_DIR, log)
+    job.requirements_hash = digest
+
+
+def migrate(job, log):
+    # asks the pulled code for its migration plan; exits 1 when there is something to apply
+    plan = command([f"{VENV_PATH}/python", "manage.py", "migrate", "--check", "--plan"], MANAGE_DIR, log, check=False)
+    if plan.returncode == 0:
+        return SKIPPED
+    command([f"{VENV_PATH}/python", "manage.py", "migrate", "--noinput"], MANAGE_DIR, log)
+
+
+def collectstatic(job, log):
+    # fingerprinted and precompressed copies for StaticFilesMiddleware (see storage.py)
+    command([f"{VENV_PATH}/python", "manage.py", "collectstatic", "--noinput"], MANAGE_DIR, log)
+
+
+def reload(job, log):
+    command(["touch", WSGI_PATH], None, log)
+
+
+STEPS = [
+    ('pull', pull),
+    ('install', install),
+    ('migrate', migrate),
+    ('collectstatic', collectstatic),
+    ('reload', reload),
+]
+
+
+def describe(job):
+    """JSON-ready status of a job, including each step's timing and output."""
+    duration = None
+    if job.started_at:
+        duration = round(((job.finished_at or timezone.now()) - job.started_at).total_seconds() * 1000)
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'duration_ms': duration,
+        'steps': job.steps,
+        'error': job.error,
+    }
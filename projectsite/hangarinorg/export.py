@@ -0,0 +1,102 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .filters import (
+    filter_tasks, filter_subtasks, filter_notes, apply_order,
+    TASK_SORTS, SUBTASK_SORTS, NOTE_SORTS,
+)
+from .models import Task, SubTask, Note
+
+
+# (model, filter, sorts, [(column header, values_list path), ...]) per export. Related
+# names are read through the join in the same query, so rows never trigger lookups.
+EXPORTS = {
+    'tasks': (Task, filter_tasks, TASK_SORTS, [
+        ('id', 'id'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('deadline', 'deadline'),
+        ('status', 'status'),
+        ('category', 'category__category_name'),
+        ('priority', 'priority__priority_name'),
+        ('progress', 'progress'),
+        ('subtask_total', 'subtask_total'),
+        ('subtask_completed', 'subtask_completed'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]),
+    'subtasks': (SubTask, filter_subtasks, SUBTASK_SORTS, [
+        ('id', 'id'),
+        ('title', 'title'),
+        ('status', 'status'),
+        ('parent_task_id', 'parent_task_id'),
+        ('parent_task', 'parent_task__title'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]),
+    'notes': (Note, filter_notes, NOTE_SORTS, [
+        ('id', 'id'),
+        ('task_id', 'task_id'),
+        ('task', 'task__title'),
+        ('content', 'content'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def chunk_size():
+    return getattr(settings, 'HANGARIN_EXPORT_CHUNK_SIZE', 2000)
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(kind, params, using=None):
+    """Return ``(headers, row iterator)`` for an export, honouring the list filters and sorts in ``params``.
+
+    Rows are plain tuples from ``values_list`` read through a server-side cursor in
+    chunks, so memory stays flat however many rows match. Without a requested sort
+    rows come out in pk order. ``using`` pins the database alias: the rows are read after
+    the view returns, once the request's replica choice is gone.
+    """
+    model, filter_func, sorts, columns = EXPORTS[kind]
+    qs = apply_order(filter_func(model.objects.using(using), params), params, sorts, default=('pk',))
+    rows = qs.values_list(*[path for _, path in columns]).iterator(chunk_size=chunk_size())
+    return [header for header, _ in columns], rows
+
+
+def stream(kind, fmt, params, using=None):
+    """Yield the export as text, a chunk of rows at a time."""
+    headers, rows = export_rows(kind, params, using)
+    size = chunk_size()
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headers)
+        format_row = writer.writerow
+    else:
+        encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+        def format_row(row):
+            return encoder.encode(dict(zip(headers, row))) + '\n'
+
+    buffer = []
+    for row in rows:
+        buffer.append(format_row(row))
+        if len(buffer) >= size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,123 @@
+from .models import Task, SubTask, Note
+from .search import search_filter, rank_expression
+
+
+# Query-string filters and sorts shared by the HTML lists and the JSON API, so both
+# accept the same parameters. Invalid values are ignored, as the lists always did.
+
+# ?sort= / ?order= keys and the columns they sort on. Priority sorts on the stored
+# Priority.rank (an indexed join, not a per-row name match).
+TASK_SORTS = {
+    'title': 'title',
+    'task': 'title',
+    'category': 'category__category_name',
+    'progress': 'progress',
+    'status': 'status',
+    'priority': 'priority__rank',
+    'deadline': 'deadline',
+    'due': 'deadline',
+}
+
+SUBTASK_SORTS = {
+    'title': 'title',
+    'task': 'title',
+    'status': 'status',
+    'priority': 'parent_task__priority__rank',
+    'deadline': 'parent_task__deadline',
+    'due': 'parent_task__deadline',
+}
+
+NOTE_SORTS = {
+    'created_at': 'created_at',
+    'task': 'task__title',
+}
+
+
+def int_param(params, name):
+    try:
+        return int(params.get(name) or '')
+    except (ValueError, TypeError):
+        return None
+
+
+def filter_tasks(qs, params):
+    """Apply ?category=, ?priority=, ?status= and ?q= to a Task queryset."""
+    category = int_param(params, 'category')
+    if category is not None:
+        qs = qs.filter(category__pk=category)
+    priority = int_param(params, 'priority')
+    if priority is not None:
+        qs = qs.filter(priority__pk=priority)
+    status = params.get('status')
+    if status:
+        qs = qs.filter(status__iexact=status)
+    q = params.get('q', '').strip()
+    if q:
+        qs = qs.filter(search_filter(Task, q))
+    return qs
+
+
+def filter_subtasks(qs, params):
+    """Apply ?parent=, ?priority= (of the parent task), ?status= and ?q= to a SubTask queryset."""
+    parent = int_param(params, 'parent')
+    if parent is not None:
+        qs = qs.filter(parent_task__pk=parent)
+    priority = int_param(params, 'priority')
+    if priority is not None:
+        qs = qs.filter(parent_task__priority__pk=priority)
+    status = params.get('status')
+    if status:
+        qs = qs.filter(status__iexact=status)
+    q = params.get('q', '').strip()
+    if q:
+        qs = qs.filter(search_filter(SubTask, q))
+    return qs
+
+
+def filter_notes(qs, params):
+    """Apply ?task= and ?q= (note content or the task's text) to a Note queryset."""
+    task = int_param(params, 'task')
+    if task is not None:
+        qs = qs.filter(task__pk=task)
+    q = params.get('q', '').strip()
+    if q:
+        qs = qs.filter(search_filter(Note, q) | search_filter(Task, q, 'task'))
+    return qs
+
+
+def order_keys(params):
+    """Requested sort keys, each optionally prefixed with ``-``.
+
+    Read from ``?order=a,-b`` or, failing that, from ``?sort=&dir=`` plus the optional
+    ``?secondary_sort=&secondary_dir=`` pair.
+    """
+    order = params.get('order', '').strip()
+    if order:
+        return [key.strip() for key in order.split(',') if key.strip()]
+    keys = []
+    for sort_param, dir_param in (('sort', 'dir'), ('secondary_sort', 'secondary_dir')):
+        key = params.get(sort_param, '').strip()
+        if key:
+            keys.append(('-' if params.get(dir_param) == 'desc' else '') + key)
+    return keys
+
+
+def order_fields(keys, sorts):
+    """Map sort keys to ORM ``order_by`` fields, dropping unknown keys."""
+    fields = []
+    for key in keys:
+        sign = '-' if key.startswith('-') else ''
+        if key.lstrip('-') in sorts:
+            fields.append(sign + sorts[key.lstrip('-')])
+    return fields
+
+
+def apply_order(qs, params, sorts, default=()):
+    """Order by the requested keys; otherwise best search matches first, otherwise ``default``."""
+    fields = order_fields(order_keys(params), sorts)
+    if fields:
+        return qs.order_by(*fields)
+    q = params.get('q', '').strip()
+    if q:
+        return qs.annotate(search_rank=rank_expression(qs.model, q)).order_by('search_rank')
+    return qs.order_by(*default) if default else qs
@@ -2,6 +2,8 @@ from django import forms
 from django.forms import ModelForm, DateTimeInput
 from django.core.exceptions import ValidationError
 from .models import Task, Category, Priority, Note, SubTask
+from . import lookups
+from .bulk import TASK_ACTIONS, SUBTASK_ACTIONS
 
 
 class TaskForm(ModelForm):
@@ -26,6 +28,17 @@ class TaskForm(ModelForm):
             ),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Render the small lookup tables from the cache instead of querying them per request;
+        # submitted values are still validated against the field's queryset
+        for name, rows in (('category', lookups.categories), ('priority', lookups.priorities)):
+            if name not in self.fields:
+                continue
+            field = self.fields[name]
+            empty = [('', field.empty_label)] if field.empty_label is not None else []
+            field.choices = empty + [(obj.pk, field.label_from_instance(obj)) for obj in rows()]
+
     def clean_deadline(self):
         deadline = self.cleaned_data.get('deadline')
         # If parsing failed, Django will raise before this; if present, validate year bounds
@@ -53,7 +66,7 @@ class PriorityForm(ModelForm):
     
     class Meta:
         model = Priority
-        fields = ['priority_name']
+        fields = ['priority_name', 'rank']
 
 
 class NoteForm(ModelForm):
@@ -75,7 +88,83 @@ class SubTaskForm(ModelForm):
         fields = ['parent_task', 'title', 'status']
 
 
+# Imported rows are checked with the same field rules as the forms above; relations are
+# resolved by the importer beforehand, so these forms never query per row.
+
+class TaskImportForm(TaskForm):
+    """TaskForm rules (incl. the deadline year range) for one imported task"""
+
+    class Meta(TaskForm.Meta):
+        fields = ['title', 'description', 'deadline', 'status']
+
+
+class SubTaskImportForm(SubTaskForm):
+    """SubTaskForm rules for a subtask nested in an imported task"""
+
+    class Meta(SubTaskForm.Meta):
+        fields = ['title', 'status']
+
+
+class NoteImportForm(NoteForm):
+    """NoteForm rules for a note nested in an imported task"""
+
+    class Meta(NoteForm.Meta):
+        fields = ['content']
+
+
+class TaskImportUploadForm(forms.Form):
+    """Upload form for the task import page"""
+
+    FORMAT_CHOICES = [('', 'Detect from file name'), ('csv', 'CSV'), ('json', 'JSON / NDJSON')]
+
+    file = forms.FileField(help_text="CSV with a header row, a JSON array, or one JSON task per line.")
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+    create_missing = forms.BooleanField(
+        required=False,
+        label="Create missing categories and priorities",
+        help_text="Otherwise rows naming an unknown category or priority are rejected.",
+    )
+
+
+class IdListField(forms.Field):
+    """The primary keys of the rows ticked in a list"""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return sorted({int(pk) for pk in value or []})
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid selection.")
+
+
+class TaskBulkActionForm(forms.Form):
+    """Bulk action for the checked tasks, or for every task matching the list's filters"""
+
+    SCOPE_CHOICES = [('selected', 'Selected rows'), ('all', 'All matching rows')]
+
+    action = forms.ChoiceField(choices=TASK_ACTIONS)
+    scope = forms.ChoiceField(choices=SCOPE_CHOICES, required=False)
+    selected = IdListField(required=False)
+    status = forms.ChoiceField(choices=Task._meta.get_field('status').choices, required=False)
+    category = forms.ModelChoiceField(queryset=Category.objects.all(), required=False)
+    priority = forms.ModelChoiceField(queryset=Priority.objects.all(), required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+        if action in self.fields and action != 'delete' and not cleaned_data.get(action):
+            self.add_error(action, f"Choose a {action} to apply.")
+        if cleaned_data.get('scope') != 'all' and not cleaned_data.get('selected'):
+            raise ValidationError("Select at least one row.")
+        return cleaned_data
 
+    def value(self):
+        return self.cleaned_data.get(self.cleaned_data['action'])
 
 
+class SubTaskBulkActionForm(TaskBulkActionForm):
+    """Bulk status change or delete for subtasks"""
 
+    action = forms.ChoiceField(choices=SUBTASK_ACTIONS)
+    category = None
+    priority = None
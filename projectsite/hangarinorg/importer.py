@@ -0,0 +1,239 @@
+import csv
+import itertools
+import json
+
+from django.db import transaction
+
+from .forms import TaskImportForm, SubTaskImportForm, NoteImportForm
+from .lookups import bump_version
+from .models import Task, SubTask, Note, Category, Priority, STATUS_PROGRESS
+
+
+TASK_FIELDS = ('title', 'description', 'deadline', 'status')
+
+
+def detect_format(filename):
+    name = (filename or '').lower()
+    return 'json' if name.endswith(('.json', '.ndjson', '.jsonl')) else 'csv'
+
+
+def read_rows(fh, fmt):
+    """Yield ``(row number, task dict or None, parse error or None)`` from a text file.
+
+    CSV needs a header row; ``subtasks``/``notes`` cells hold either a JSON list or
+    ``|``-separated titles/contents. JSON is either one array (loaded whole) or one
+    object per line (NDJSON, streamed), which is what large files should use.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(fh)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    head = ''
+    while True:
+        char = fh.read(1)
+        if not char or not char.isspace():
+            head = char
+            break
+    if head == '[':
+        try:
+            rows = json.loads(head + fh.read())
+        except ValueError as exc:
+            yield 1, None, f'Invalid JSON: {exc}'
+            return
+        for number, row in enumerate(rows, start=1):
+            yield number, row, None
+        return
+
+    for number, line in enumerate(itertools.chain([head + fh.readline()], fh), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line), None
+        except ValueError as exc:
+            yield number, None, f'Invalid JSON: {exc}'
+
+
+def _nested(value, key):
+    """Normalize a nested subtask/note list from JSON or a CSV cell into a list of dicts."""
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        value = value.strip()
+        value = json.loads(value) if value.startswith('[') else [part.strip() for part in value.split('|') if part.strip()]
+    if not isinstance(value, list):
+        raise ValueError(f'{key} must be a list')
+    return [item if isinstance(item, dict) else {'title' if key == 'subtasks' else 'content': item} for item in value]
+
+
+def _form_errors(form, prefix=''):
+    return [f'{prefix}{field}: {message}' for field, messages in form.errors.items() for message in messages]
+
+
+class ImportReport:
+    """Rows created by an import plus the rejected rows and why."""
+
+    def __init__(self, max_errors=None):
+        self.tasks = 0
+        self.subtasks = 0
+        self.notes = 0
+        self.rejected = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def reject(self, number, messages):
+        self.rejected += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append((number, messages))
+
+
+class TaskImporter:
+    """Validate imported tasks with the form rules and insert them with bulk_create in batches.
+
+    Category/priority names (or pks) are resolved from one in-memory map per table.
+    Each batch of valid tasks and their nested subtasks/notes is inserted in its own
+    transaction; invalid rows are reported and skipped without affecting the batch.
+    With ``create_missing`` unknown names are created in that same transaction, so a
+    name only used by rejected rows (or by a batch that fails) is never created.
+    """
+
+    def __init__(self, batch_size=1000, create_missing=False, max_errors=None, progress=None):
+        self.batch_size = batch_size
+        self.create_missing = create_missing
+        self.progress = progress
+        self.report = ImportReport(max_errors)
+        self.created_lookups = set()
+        self.lookups = {model: self.load_lookup(model, field) for model, field in (
+            (Category, 'category_name'), (Priority, 'priority_name'))}
+
+    @staticmethod
+    def load_lookup(model, field):
+        names = {}
+        for pk, name in model.objects.values_list('pk', field):
+            names.setdefault(name.strip().lower(), pk)
+            names[str(pk)] = pk
+        return names
+
+    def resolve(self, model, value):
+        """Return ``(pk, name to create, error)``; only one of them is set."""
+        key = str(value or '').strip()
+        if not key:
+            return None, None, f'{model._meta.model_name}: This field is required.'
+        pk = self.lookups[model].get(key.lower())
+        if pk is None and self.create_missing and not key.isdigit():
+            return None, key, None
+        if pk is None:
+            return None, None, f'{model._meta.model_name}: Unknown {model._meta.verbose_name.lower()} "{key}".'
+        return pk, None, None
+
+    def build(self, row):
+        """Return ``(task, subtasks, notes, missing, errors)`` for one parsed row.
+
+        ``missing`` maps Category/Priority to a name that ``flush`` still has to create.
+        """
+        if not isinstance(row, dict):
+            return None, [], [], {}, ['Each task must be an object.']
+        data = {name: row.get(name) for name in TASK_FIELDS}
+        data['status'] = data['status'] or 'Pending'
+        form = TaskImportForm(data)
+        errors = _form_errors(form)
+        pks, missing = {}, {}
+        for model, key in ((Category, 'category'), (Priority, 'priority')):
+            pks[model], name, error = self.resolve(model, row.get(key))
+            if name:
+                missing[model] = name
+            errors += [error] if error else []
+
+        subtasks, notes = [], []
+        for key, form_class, items in (('subtasks', SubTaskImportForm, subtasks), ('notes', NoteImportForm, notes)):
+            try:
+                nested = _nested(row.get(key), key)
+            except ValueError as exc:
+                errors.append(f'{key}: {exc}')
+                continue
+            for index, item in enumerate(nested, start=1):
+                if key == 'subtasks':
+                    item = {'title': item.get('title'), 'status': item.get('status') or 'Pending'}
+                nested_form = form_class(item)
+                if nested_form.is_valid():
+                    items.append(nested_form.instance)
+                else:
+                    errors += _form_errors(nested_form, f'{key}[{index}].')
+
+        if errors:
+            return None, [], [], {}, errors
+        task = form.instance
+        task.category_id = pks[Category]
+        task.priority_id = pks[Priority]
+        # bulk_create skips Task.save(), so set the stored progress here; subtasks refresh it
+        task.progress = STATUS_PROGRESS.get(task.status, 0)
+        return task, subtasks, notes, missing, []
+
+    def run(self, rows):
+        batch = []
+        for number, row, parse_error in rows:
+            if parse_error:
+                self.report.reject(number, [parse_error])
+                continue
+            task, subtasks, notes, missing, errors = self.build(row)
+            if errors:
+                self.report.reject(number, errors)
+                continue
+            batch.append((task, subtasks, notes, missing))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+        # bulk_create skips save signals, so invalidate the cached lookups and fragments explicitly
+        for model_name in {'task', 'subtask', *self.created_lookups}:
+            bump_version(model_name)
+        return self.report
+
+    def flush(self, batch):
+        with transaction.atomic():
+            created = self.create_lookups(batch)
+            Task.objects.bulk_create([task for task, _, _, _ in batch])
+            subtasks, notes = [], []
+            for task, task_subtasks, task_notes, _ in batch:
+                for subtask in task_subtasks:
+                    subtask.parent_task = task
+                    subtasks.append(subtask)
+                for note in task_notes:
+                    note.task = task
+                    notes.append(note)
+            # SubTask bulk_create also refreshes the progress columns of these tasks
+            SubTask.objects.bulk_create(subtasks)
+            Note.objects.bulk_create(notes)
+        # only remember the new pks once their transaction has committed
+        for model, names in created.items():
+            self.lookups[model].update(names)
+            self.created_lookups.add(model._meta.model_name)
+        self.report.tasks += len(batch)
+        self.report.subtasks += len(subtasks)
+        self.report.notes += len(notes)
+        if self.progress:
+            self.progress(self.report)
+
+    def create_lookups(self, batch):
+        """Create the categories/priorities this batch names but that do not exist yet.
+
+        Points the batch's tasks at them and returns ``{model: {lower-cased name: pk}}``.
+        """
+        created = {}
+        for model, field in ((Category, 'category_name'), (Priority, 'priority_name')):
+            names = {}
+            for _, _, _, missing in batch:
+                if model in missing:
+                    names.setdefault(missing[model].lower(), missing[model])
+            # an earlier batch may have created a name since these rows were built
+            new = [name for key, name in names.items() if key not in self.lookups[model]]
+            if new:
+                objs = model.objects.bulk_create([model(**{field: name}) for name in new])
+                created[model] = {getattr(obj, field).lower(): obj.pk for obj in objs}
+            pks = {**self.lookups[model], **created.get(model, {})}
+            for task, _, _, missing in batch:
+                if model in missing:
+                    setattr(task, f'{model._meta.model_name}_id', pks[missing[model].lower()])
+        return created
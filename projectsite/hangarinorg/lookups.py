@@ -0,0 +1,107 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import routers
+from .models import Category, Priority, Task
+
+
+# name -> (model whose changes invalidate it, loader)
+LOOKUPS = {
+    'categories': ('category', lambda: list(Category.objects.all())),
+    'priorities': ('priority', lambda: list(Priority.objects.all())),
+    'parent_tasks': ('task', lambda: list(Task.objects.order_by('-updated_at')[:12])),
+}
+
+VERSION_KEY = 'hangarin:version:{}'
+VALUE_KEY = 'hangarin:lookup:{}:{}'
+
+# Models whose changes can alter a rendered list or statistic; each bump also moves
+# the combined 'data' version that keys the template fragment cache
+DATA_MODELS = {'category', 'priority', 'task', 'subtask'}
+
+# Process-local copies, reused for as long as the shared version key does not move
+_local = {}
+
+# Model names collected by an enclosing bump_once() block, if any
+_deferred = ContextVar('hangarin_deferred_bumps', default=None)
+
+
+def get_version(model_name):
+    key = VERSION_KEY.format(model_name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(model_name):
+    """Invalidate every lookup built from ``model_name`` in all processes.
+
+    A timestamp rather than an increment, so an evicted key can never roll back
+    to a version some process still holds. Inside a transaction the bump waits for the
+    commit: a rolled back (or retried) write leaves the caches alone, and no request
+    can cache the old rows under the new version meanwhile.
+    """
+    deferred = _deferred.get()
+    if deferred is not None:
+        deferred.add(model_name)
+        return
+    names = [model_name, 'data'] if model_name in DATA_MODELS else [model_name]
+
+    def bump():
+        version = time.time_ns()
+        cache.set_many({VERSION_KEY.format(name): version for name in names}, None)
+
+    transaction.on_commit(bump)
+
+
+@contextmanager
+def bump_once():
+    """Bump every model name ``bump_version`` is called with inside the block once, at the end.
+
+    A queryset delete sends post_delete for each row it removes, cascaded subtasks
+    included; without this each row would queue its own bump. Only the calling thread
+    or task is affected, so writes elsewhere keep invalidating as usual.
+    """
+    names = set()
+    token = _deferred.set(names)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        for model_name in sorted(names):
+            bump_version(model_name)
+
+
+def get_lookup(name):
+    model_name, loader = LOOKUPS[name]
+    version = get_version(model_name)
+    local = _local.get(name)
+    if local is not None and local[0] == version:
+        return local[1]
+    key = VALUE_KEY.format(name, version)
+    value = cache.get(key)
+    if value is None:
+        # shared by every request, so never built from a replica that may lag the version
+        with routers.primary():
+            value = loader()
+        cache.set(key, value)
+    _local[name] = (version, value)
+    return value
+
+
+def categories():
+    return get_lookup('categories')
+
+
+def priorities():
+    return get_lookup('priorities')
+
+
+def parent_tasks():
+    return get_lookup('parent_tasks')
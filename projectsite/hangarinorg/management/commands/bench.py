@@ -0,0 +1,180 @@
+import json
+import math
+import time
+import tracemalloc
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from hangarinorg.models import Task, Category, Priority
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway database and report query count, latency and memory for the main views'
+
+    def add_arguments(self, parser):
+        self.add_dataset_arguments(parser)
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per URL')
+        parser.add_argument('--json', dest='json_path', default=None,
+                            help='Also write the results as JSON to this path ("-" for stdout)')
+
+    def add_dataset_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000, help='Tasks to seed')
+        parser.add_argument('--subtasks', type=int, default=4000, help='Subtasks to seed')
+        parser.add_argument('--notes', type=int, default=4000, help='Notes to seed')
+        parser.add_argument('--categories', type=int, default=10, help='Extra categories to seed')
+        parser.add_argument('--seed', type=int, default=1, help='Seed for the generated dataset')
+        # shared with explain_queries, which runs through handle() too
+        parser.add_argument('--fragment-cache', action='store_true',
+                            help='Keep the template fragment cache on (repeat requests are then served from it)')
+
+    def handle(self, *args, **options):
+        # Runs against a test database and a private in-memory cache so real data and
+        # the shared lookup cache are never touched.
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'hangarin-bench',
+            }}, HANGARIN_FRAGMENT_CACHE_TIMEOUT=600 if options['fragment_cache'] else 0):
+                results = self.run_bench(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.print_table(results)
+        if options['json_path']:
+            payload = json.dumps({'dataset': self.dataset, 'results': results}, indent=2)
+            if options['json_path'] == '-':
+                self.stdout.write(payload)
+            else:
+                with open(options['json_path'], 'w') as fh:
+                    fh.write(payload + '\n')
+
+    def run_bench(self, options):
+        client = self.seed(options)
+        results = []
+        for view, url in self.targets():
+            results.append(self.measure(client, view, url, options['repeat']))
+            self.stdout.write(f'  measured {url}', ending='\n' if options['verbosity'] > 1 else '\r')
+        return results
+
+    def seed(self, options):
+        """Generate the dataset and return a client logged in as a fresh user."""
+        call_command(
+            'create_initial_data',
+            tasks=options['tasks'], subtasks=options['subtasks'], notes=options['notes'],
+            categories=options['categories'], seed=options['seed'], stdout=StringIO(),
+        )
+        self.dataset = {
+            'tasks': options['tasks'],
+            'subtasks': options['subtasks'],
+            'notes': options['notes'],
+            'categories': Category.objects.count(),
+            'seed': options['seed'],
+        }
+
+        user = get_user_model().objects.create_user('bench', password='bench')
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def targets(self):
+        """Representative (view, url) pairs covering the sort, search and filter parameters."""
+        category = Category.objects.order_by('pk').first()
+        priority = Priority.objects.order_by('pk').first()
+        task = Task.objects.order_by('pk').first()
+        word = task.title.split()[0].strip('.').lower()
+
+        dashboard = reverse('dashboard')
+        stats_section = reverse('dashboard_section', args=['stats'])
+        tasks_section = reverse('dashboard_section', args=['tasks'])
+        groups_section = reverse('dashboard_section', args=['groups'])
+        category_tasks = reverse('category_tasks', args=[category.pk])
+        subtasks = reverse('subtask_list')
+        notes = reverse('note_list')
+        return [
+            # the page alone is a shell; ?lazy=0 renders the sections inline as well
+            ('dashboard', dashboard),
+            ('dashboard_section', stats_section),
+            ('dashboard_section', f'{tasks_section}?order=-progress'),
+            ('dashboard_section', f'{groups_section}?order=-progress'),
+            ('dashboard', f'{dashboard}?lazy=0'),
+            ('dashboard', f'{dashboard}?lazy=0&order=-progress'),
+            ('dashboard', f'{dashboard}?lazy=0&order=deadline,task'),
+            ('dashboard', f'{dashboard}?lazy=0&category={category.pk}'),
+            ('dashboard', f'{dashboard}?lazy=0&q={word}'),
+            ('category_tasks', category_tasks),
+            ('category_tasks', f'{category_tasks}?sort=priority&dir=desc'),
+            ('category_tasks', f'{category_tasks}?sort=deadline'),
+            ('category_tasks', f'{category_tasks}?priority={priority.pk}&status=Pending'),
+            ('category_tasks', f'{category_tasks}?q={word}'),
+            ('category_detail', reverse('category_detail', args=[category.pk])),
+            ('subtask_list', subtasks),
+            ('subtask_list', f'{subtasks}?sort=priority'),
+            ('subtask_list', f'{subtasks}?status=Completed&sort=deadline&dir=desc'),
+            ('subtask_list', f'{subtasks}?q={word}'),
+            ('note_list', notes),
+            ('note_list', f'{notes}?sort=task'),
+            ('note_list', f'{notes}?task={task.pk}'),
+            ('note_list', f'{notes}?q={word}'),
+            ('task_detail', reverse('task_detail', args=[task.pk])),
+        ]
+
+    def measure(self, client, view, url, repeat):
+        client.get(url)  # warm up caches and lazy imports
+
+        # the query log is a bounded deque; once seeding has filled it, captured counts would read 0
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+
+        timings = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'view': view,
+            'url': url,
+            'status': response.status_code,
+            'queries': len(queries.captured_queries),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'peak_kib': round(peak / 1024, 1),
+            'bytes': len(response.content),
+        }
+
+    def print_table(self, results):
+        d = self.dataset
+        self.stdout.write(
+            f"\nDataset: {d['tasks']} tasks, {d['subtasks']} subtasks, {d['notes']} notes, "
+            f"{d['categories']} categories (seed {d['seed']})\n"
+        )
+        header = f"{'view':<18} {'status':>6} {'queries':>7} {'p50 ms':>8} {'p95 ms':>8} {'peak KiB':>9}  url"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for r in results:
+            line = (
+                f"{r['view']:<18} {r['status']:>6} {r['queries']:>7} {r['p50_ms']:>8.2f} "
+                f"{r['p95_ms']:>8.2f} {r['peak_kib']:>9.1f}  {r['url']}"
+            )
+            self.stdout.write(self.style.ERROR(line) if r['status'] >= 400 else line)
@@ -0,0 +1,128 @@
+import asyncio
+import importlib
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.urls import clear_url_caches
+
+from .bench import Command as BenchCommand, percentile
+
+
+def reload_urls():
+    if settings.ROOT_URLCONF in sys.modules:
+        importlib.reload(sys.modules[settings.ROOT_URLCONF])
+    clear_url_caches()
+
+
+@contextmanager
+def routed(async_views):
+    """Route the URLconf to the sync or async views for the duration of the block."""
+    try:
+        with override_settings(HANGARIN_ASYNC_VIEWS=async_views):
+            reload_urls()
+            yield
+    finally:
+        reload_urls()
+
+
+class Command(BenchCommand):
+    help = (
+        'Compare dashboard, dashboard section and category task latency between the sync views (WSGI client) '
+        'and their async variants with concurrent queries (ASGI client)'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        # the aggregates only take long enough to matter on a larger dataset
+        parser.set_defaults(tasks=20000, subtasks=20000, notes=0, repeat=20)
+
+    def handle(self, *args, **options):
+        # An in-memory test database is a shared-cache connection that serializes readers;
+        # a file lets the worker threads' connections read side by side, as in production.
+        with tempfile.TemporaryDirectory() as tmp:
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+            super().handle(*args, **options)
+
+    def run_bench(self, options):
+        client = self.seed(options)
+        user = get_user_model().objects.get(username='bench')
+        results = []
+        for view, url in self.targets():
+            if view not in ('dashboard', 'dashboard_section', 'category_tasks'):
+                continue
+            async_client = AsyncClient()
+            async_client.force_login(user)
+            with routed(False):
+                result = self.measure(client, view, url, options['repeat'])
+                result.update(self.query_times(client, url))
+                # the sync view behind the ASGI handler separates handler overhead from the view's gain
+                asgi_timings, _ = asyncio.run(self.measure_async(async_client, url, options['repeat']))
+            with routed(True):
+                timings, status = asyncio.run(self.measure_async(async_client, url, options['repeat']))
+            result.update({
+                'asgi_sync_p50_ms': round(percentile(asgi_timings, 50), 2),
+                'async_status': status,
+                'async_p50_ms': round(percentile(timings, 50), 2),
+                'async_p95_ms': round(percentile(timings, 95), 2),
+            })
+            results.append(result)
+            self.stdout.write(f'  measured {url}', ending='\n' if options['verbosity'] > 1 else '\r')
+        return results
+
+    @staticmethod
+    def query_times(client, url):
+        """Sum and maximum of the per-query times for one sync request."""
+        times = []
+
+        def timed(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                times.append((time.perf_counter() - start) * 1000)
+
+        with connection.execute_wrapper(timed):
+            client.get(url)
+        return {'db_sum_ms': round(sum(times), 2), 'db_max_ms': round(max(times, default=0), 2)}
+
+    @staticmethod
+    async def measure_async(client, url, repeat):
+        response = await client.get(url)  # warm up
+        timings = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            await client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings, response.status_code
+
+    def print_table(self, results):
+        d = self.dataset
+        self.stdout.write(
+            f"\nDataset: {d['tasks']} tasks, {d['subtasks']} subtasks, {d['categories']} categories "
+            f"(seed {d['seed']})\n"
+        )
+        header = (
+            f"{'view':<15} {'queries':>7} {'db sum':>8} {'db max':>8} {'wsgi p50':>9} {'asgi p50':>9} "
+            f"{'async p50':>10} {'wsgi p95':>9} {'async p95':>10}  url"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for r in results:
+            line = (
+                f"{r['view']:<15} {r['queries']:>7} {r['db_sum_ms']:>8.2f} {r['db_max_ms']:>8.2f} "
+                f"{r['p50_ms']:>9.2f} {r['asgi_sync_p50_ms']:>9.2f} {r['async_p50_ms']:>10.2f} "
+                f"{r['p95_ms']:>9.2f} {r['async_p95_ms']:>10.2f}  {r['url']}"
+            )
+            failed = r['status'] >= 400 or r['async_status'] >= 400
+            self.stdout.write(self.style.ERROR(line) if failed else line)
+        self.stdout.write(
+            '\nAll times in ms. wsgi/asgi: sync view through the WSGI/ASGI test client; async: async '
+            'view through ASGI. "db" columns are the sync request\'s queries (sum and slowest).'
+        )
@@ -0,0 +1,163 @@
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from hangarinorg.models import Task
+
+from .bench import Command as BenchCommand, percentile
+
+
+# The stock setup: rollback journal, deferred transactions, a new connection per request,
+# no retry. PRAGMAs from the settings are swapped for a reset to the rollback journal.
+BEFORE = {
+    'pragmas': {'journal_mode': 'DELETE'},
+    'transaction_mode': None,
+    'conn_max_age': 0,
+    'retries': 0,
+}
+
+
+class Command(BenchCommand):
+    help = (
+        'Measure read/write throughput of concurrent clients on a file database, with the stock '
+        'SQLite setup and with the tuned one (PRAGMAs, IMMEDIATE transactions, lock retry, '
+        'persistent connections)'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(tasks=2000, subtasks=2000, notes=0)
+        parser.add_argument('--readers', type=int, default=4, help='Threads issuing GET requests')
+        parser.add_argument('--writers', type=int, default=2, help='Threads editing tasks and adding subtasks')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+
+    def handle(self, *args, **options):
+        # locking only happens between separate connections to a real file
+        with tempfile.TemporaryDirectory() as tmp:
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+            super().handle(*args, **options)
+
+    def run_bench(self, options):
+        self.seed(options)
+        user = get_user_model().objects.get(username='bench')
+        tasks = list(Task.objects.order_by('pk').values(
+            'pk', 'title', 'description', 'deadline', 'category', 'priority', 'status',
+        )[:200])
+        after = {
+            'pragmas': getattr(settings, 'HANGARIN_SQLITE_PRAGMAS', {}),
+            'transaction_mode': settings.DATABASES['default'].get('OPTIONS', {}).get('transaction_mode'),
+            'conn_max_age': settings.DATABASES['default'].get('CONN_MAX_AGE', 0),
+            'retries': getattr(settings, 'HANGARIN_DB_LOCK_RETRIES', 3),
+        }
+        results = []
+        for mode, config in (('before', BEFORE), ('after', after)):
+            with self.configured(config) as journal:
+                result = self.run_clients(user, tasks, options)
+            result.update({'mode': mode, 'journal': journal, 'transaction_mode': config['transaction_mode'] or 'DEFERRED'})
+            results.append(result)
+        return results
+
+    @contextmanager
+    def configured(self, config):
+        """Reconnect with ``config``; yields the journal mode the database ended up in."""
+        db = connection.settings_dict  # shared with the connections the worker threads open
+        saved = db['CONN_MAX_AGE'], dict(db['OPTIONS'])
+        db['CONN_MAX_AGE'] = config['conn_max_age']
+        db['OPTIONS'] = {**db['OPTIONS'], 'transaction_mode': config['transaction_mode']}
+        try:
+            with override_settings(HANGARIN_SQLITE_PRAGMAS=config['pragmas'], HANGARIN_DB_LOCK_RETRIES=config['retries']):
+                connection.close()
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    yield cursor.fetchone()[0]
+        finally:
+            db['CONN_MAX_AGE'], db['OPTIONS'] = saved
+            connection.close()
+
+    def run_clients(self, user, tasks, options):
+        deadline = time.perf_counter() + options['seconds']
+        samples = {'read': [], 'write': []}
+        errors = {'read': 0, 'write': 0}
+        lock = threading.Lock()
+
+        def worker(kind, seed):
+            rng = random.Random(seed)
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            mine, failed = [], 0
+            while time.perf_counter() < deadline:
+                task = rng.choice(tasks)
+                start = time.perf_counter()
+                if kind == 'read':
+                    url = rng.choice([reverse('task_detail', args=[task['pk']]), reverse('dashboard_section', args=['tasks'])])
+                    ok = client.get(url).status_code == 200
+                elif rng.random() < 0.5:
+                    data = {**task, 'title': f"{task['title'][:80]} {rng.randrange(1000)}"}
+                    data['deadline'] = task['deadline'].strftime('%Y-%m-%dT%H:%M')
+                    ok = client.post(reverse('task_edit', args=[task['pk']]), data).status_code == 302
+                else:
+                    data = {'parent_task': task['pk'], 'title': f'bench {rng.randrange(10**6)}', 'status': 'Pending'}
+                    ok = client.post(reverse('subtask_create'), data).status_code == 302
+                mine.append((time.perf_counter() - start) * 1000)
+                failed += not ok
+            connection.close()
+            with lock:
+                samples[kind].extend(mine)
+                errors[kind] += failed
+
+        threads = [threading.Thread(target=worker, args=('read', n)) for n in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=('write', 100 + n)) for n in range(options['writers'])]
+        # lock errors and slow requests are the point of the comparison; keep them out of the output
+        quiet = [logging.getLogger(name) for name in ('django.request', 'hangarinorg.db', 'hangarinorg.middleware')]
+        levels = [logger.level for logger in quiet]
+        for logger in quiet:
+            logger.setLevel(logging.CRITICAL)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            for logger, level in zip(quiet, levels):
+                logger.setLevel(level)
+
+        result = {}
+        for kind in ('read', 'write'):
+            timings = samples[kind] or [0]
+            result.update({
+                f'{kind}s_per_s': round((len(samples[kind]) - errors[kind]) / options['seconds'], 1),
+                f'{kind}_errors': errors[kind],
+                f'{kind}_p50_ms': round(percentile(timings, 50), 2),
+                f'{kind}_p95_ms': round(percentile(timings, 95), 2),
+            })
+        return result
+
+    def print_table(self, results):
+        d = self.dataset
+        self.stdout.write(f"\nDataset: {d['tasks']} tasks, {d['subtasks']} subtasks (seed {d['seed']})\n")
+        header = (
+            f"{'mode':<7} {'journal':<8} {'begin':<10} {'reads/s':>8} {'read p50':>9} {'read p95':>9} "
+            f"{'read err':>8} {'writes/s':>9} {'write p50':>10} {'write p95':>10} {'write err':>9}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for r in results:
+            line = (
+                f"{r['mode']:<7} {r['journal']:<8} {r['transaction_mode']:<10} {r['reads_per_s']:>8.1f} "
+                f"{r['read_p50_ms']:>9.2f} {r['read_p95_ms']:>9.2f} {r['read_errors']:>8} {r['writes_per_s']:>9.1f} "
+                f"{r['write_p50_ms']:>10.2f} {r['write_p95_ms']:>10.2f} {r['write_errors']:>9}"
+            )
+            self.stdout.write(self.style.ERROR(line) if r['read_errors'] or r['write_errors'] else line)
+        self.stdout.write(
+            '\nAll times in ms. reads/s and writes/s count successful requests only; "err" are failed '
+            'requests (mostly "database is locked").'
+        )
@@ -1,48 +1,183 @@
-from django.core.management.base import BaseCommand
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from faker import Faker
+from faker.exceptions import UniquenessException
 from django.utils import timezone
-from hangarinorg.models import Note, SubTask, Task, Category, Priority
+from hangarinorg.lookups import bump_version
+from hangarinorg.models import Note, SubTask, Task, Category, Priority, STATUS_PROGRESS
+
+
+STATUSES = ("Pending", "In Progress", "Completed")
+DEFAULT_CATEGORIES = ("Work", "School", "Personal", "Finance", "Projects")
+DEFAULT_PRIORITIES = ("Critical", "High", "Medium", "Low", "Optional")
+
+
+# Text generators run in worker processes, so they are module-level and only return
+# plain tuples. Each chunk gets its own seed, which keeps output identical whatever
+# the number of workers.
+def _task_text(seed, count):
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [
+        (fake.sentence(nb_words=5), fake.paragraph(nb_sentences=3), fake.date_time_this_month())
+        for _ in range(count)
+    ]
+
+
+def _subtask_text(seed, count):
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [fake.sentence(nb_words=5) for _ in range(count)]
+
+
+def _note_text(seed, count):
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [fake.paragraph(nb_sentences=3) for _ in range(count)]
+
+
+def _unique_names(fake, count):
+    """``count`` distinct names: Faker words while its word list lasts, then numbered words."""
+    names = []
+    exhausted = False
+    for n in range(1, count + 1):
+        if not exhausted:
+            try:
+                names.append(fake.unique.word().title())
+                continue
+            except UniquenessException:
+                exhausted = True  # every further unique.word() would retry 1000 times first
+        names.append(f'{fake.word().title()} {n}')
+    return names
 
 
 class Command(BaseCommand):
-    help = 'Create initial data for testing'
+    help = 'Create initial data for testing (bulk, batched and reproducible with --seed)'
 
-    def handle(self, *args, **kwargs):
-        self.create_tasks(10)
-        self.create_notes(10)
-        self.create_subtasks(10)
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10, help='Number of tasks to create')
+        parser.add_argument('--subtasks', type=int, default=10, help='Number of subtasks to create')
+        parser.add_argument('--notes', type=int, default=10, help='Number of notes to create')
+        parser.add_argument('--categories', type=int, default=0,
+                            help='Extra categories to create (defaults are added when none exist)')
+        parser.add_argument('--priorities', type=int, default=0,
+                            help='Extra priorities to create (defaults are added when none exist)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk_create/transaction')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible data')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes used to generate Faker text (1 = in-process)')
 
-    
-    def create_tasks(self, count):
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 31)
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.executor = ProcessPoolExecutor(options['workers']) if options['workers'] > 1 else None
+        try:
+            self.create_categories(options['categories'])
+            self.create_priorities(options['priorities'])
+            self.create_tasks(options['tasks'])
+            self.create_notes(options['notes'])
+            self.create_subtasks(options['subtasks'])
+        finally:
+            if self.executor:
+                self.executor.shutdown()
+        # bulk_create skips save signals, so invalidate the cached lookup tables explicitly
+        for model_name in ('category', 'priority', 'task', 'subtask'):
+            bump_version(model_name)
+        self.stdout.write(self.style.SUCCESS(f'Done (seed {seed}).'))
+
+    def text_batches(self, generator, count, salt):
+        """Yield lists of generated text, ``batch_size`` items at a time, in a deterministic order."""
+        sizes = [min(self.batch_size, count - start) for start in range(0, count, self.batch_size)]
+        seeds = [random.Random(f'{self.seed}:{salt}:{i}').randrange(2 ** 31) for i in range(len(sizes))]
+        if self.executor:
+            yield from self.executor.map(generator, seeds, sizes)
+        else:
+            for chunk_seed, size in zip(seeds, sizes):
+                yield generator(chunk_seed, size)
+
+    def create_named(self, model, field, defaults, extra, ranked=False):
         fake = Faker()
-        for _ in range(count):
-            task = Task.objects.create(
-                title=fake.sentence(nb_words=5),
-                description=fake.paragraph(nb_sentences=3),
-                deadline=timezone.make_aware(fake.date_time_this_month()),  # fixed faker -> fake
-                status=fake.random_element(elements=("Pending", "In Progress", "Completed")),
-                category=Category.objects.order_by('?').first(),
-                priority=Priority.objects.order_by('?').first()
-            )
+        fake.seed_instance(self.seed)
+        objs = []
+        if not model.objects.exists():
+            # defaults are listed most urgent first, so their position doubles as the rank
+            for position, name in enumerate(defaults, start=1):
+                objs.append(model(**{field: name}, **({'rank': position} if ranked else {})))
+        objs += [model(**{field: name}) for name in _unique_names(fake, extra)]
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        return len(objs)
+
+    def create_categories(self, extra):
+        created = self.create_named(Category, 'category_name', DEFAULT_CATEGORIES, extra)
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {created} categories.'))
+
+    def create_priorities(self, extra):
+        created = self.create_named(Priority, 'priority_name', DEFAULT_PRIORITIES, extra, ranked=True)
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {created} priorities.'))
+
+    def create_tasks(self, count):
+        category_pks = list(Category.objects.values_list('pk', flat=True))
+        priority_pks = list(Priority.objects.values_list('pk', flat=True))
+        created = 0
+        for rows in self.text_batches(_task_text, count, 'task'):
+            tasks = []
+            for title, description, deadline in rows:
+                status = self.rng.choice(STATUSES)
+                tasks.append(Task(
+                    title=title,
+                    description=description,
+                    deadline=timezone.make_aware(deadline),
+                    status=status,
+                    progress=STATUS_PROGRESS.get(status, 0),
+                    category_id=self.rng.choice(category_pks),
+                    priority_id=self.rng.choice(priority_pks),
+                ))
+            with transaction.atomic():
+                Task.objects.bulk_create(tasks)
+            created += len(tasks)
+            self.report(created, count, 'tasks')
         self.stdout.write(self.style.SUCCESS('Successfully created tasks initial data.'))
 
-    
     def create_notes(self, count):
-        fake = Faker()
-        for _ in range(count):
-            Note.objects.create(
-                task=Task.objects.order_by('?').first(),
-                content=fake.paragraph(nb_sentences=3)
-            )
+        task_pks = self.task_pks(count)
+        created = 0
+        for rows in self.text_batches(_note_text, count, 'note'):
+            notes = [Note(task_id=self.rng.choice(task_pks), content=content) for content in rows]
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+            created += len(notes)
+            self.report(created, count, 'notes')
         self.stdout.write(self.style.SUCCESS('Successfully created notes initial data.'))
 
-    
     def create_subtasks(self, count):
-        fake = Faker()
-        for _ in range(count):
-            SubTask.objects.create(
-                parent_task=Task.objects.order_by('?').first(),
-                title=fake.sentence(nb_words=5),
-                status=fake.random_element(elements=("Pending", "In Progress", "Completed"))
-            )
-        self.stdout.write(self.style.SUCCESS('Successfully created subtasks initial data.'))
\ No newline at end of file
+        task_pks = self.task_pks(count)
+        created = 0
+        for rows in self.text_batches(_subtask_text, count, 'subtask'):
+            subtasks = [
+                SubTask(parent_task_id=self.rng.choice(task_pks), title=title, status=self.rng.choice(STATUSES))
+                for title in rows
+            ]
+            # SubTask bulk_create also refreshes the progress columns of the touched parents
+            with transaction.atomic():
+                SubTask.objects.bulk_create(subtasks)
+            created += len(subtasks)
+            self.report(created, count, 'subtasks')
+        self.stdout.write(self.style.SUCCESS('Successfully created subtasks initial data.'))
+
+    def task_pks(self, needed):
+        pks = list(Task.objects.order_by('pk').values_list('pk', flat=True))
+        if needed and not pks:
+            raise CommandError('No tasks exist to attach rows to; create some with --tasks first.')
+        return pks
+
+    def report(self, done, total, label):
+        if total > self.batch_size and self.verbosity > 1:
+            self.stdout.write(f'  {done}/{total} {label}')
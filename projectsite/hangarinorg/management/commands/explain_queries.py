@@ -0,0 +1,114 @@
+import re
+
+from django.core.management.base import CommandError
+from django.db import connection
+from hangarinorg.middleware import normalize_sql
+
+from .bench import Command as BenchCommand
+
+
+# EXPLAIN QUERY PLAN details worth flagging. A SCAN without an index reads the whole
+# table; a temp B-tree means rows were sorted/grouped after the fact instead of being
+# read in index order. Scans of statements without a WHERE clause (whole-table stats,
+# pk-ordered first pages) are expected and not flagged, nor are SQLite's own tables.
+_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+_TEMP_BTREE = re.compile(r'USE TEMP B-TREE FOR (.+)$')
+
+
+class SelectCollector:
+    """``execute_wrapper`` callable that keeps the raw SQL and params of every SELECT."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+class Command(BenchCommand):
+    help = ('Seed a throwaway database, run EXPLAIN QUERY PLAN on every query the main views '
+            'issue and flag full table scans and temporary sorts')
+
+    def add_arguments(self, parser):
+        self.add_dataset_arguments(parser)
+        parser.add_argument('--all', action='store_true', help='Print the plan of every statement, not only flagged ones')
+        parser.add_argument('--json', dest='json_path', default=None,
+                            help='Also write the findings as JSON to this path ("-" for stdout)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The plan checks read SQLite EXPLAIN QUERY PLAN output.')
+        self.show_all = options['all']
+        super().handle(*args, **options)
+
+    def run_bench(self, options):
+        client = self.seed(options)
+        self.row_counts = self.table_row_counts()
+
+        # the same statement shape is usually issued by several URLs; explain it once
+        statements = {}
+        for view, url in self.targets():
+            collector = SelectCollector()
+            with connection.execute_wrapper(collector):
+                client.get(url)
+            for sql, params in collector.statements:
+                entry = statements.setdefault(normalize_sql(sql), {'sql': sql, 'params': params, 'urls': []})
+                if url not in entry['urls']:
+                    entry['urls'].append(url)
+
+        results = []
+        for shape, entry in statements.items():
+            plan = self.explain(entry['sql'], entry['params'])
+            results.append({
+                'sql': shape,
+                'urls': entry['urls'],
+                'plan': plan,
+                'issues': self.issues(entry['sql'], plan),
+            })
+        return results
+
+    def table_row_counts(self):
+        counts = {}
+        with connection.cursor() as cursor:
+            for table in connection.introspection.table_names():
+                cursor.execute(f'SELECT count(*) FROM {connection.ops.quote_name(table)}')
+                counts[table] = cursor.fetchone()[0]
+        return counts
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def issues(self, sql, plan):
+        filtered = ' WHERE ' in sql
+        found = []
+        for detail in plan:
+            scan = _FULL_SCAN.match(detail)
+            if scan and filtered and not scan.group(1).startswith('sqlite_'):
+                table = scan.group(1)
+                found.append(f'full scan of {table} ({self.row_counts.get(table, "?")} rows)')
+            sort = _TEMP_BTREE.search(detail)
+            if sort:
+                found.append(f'temp B-tree for {sort.group(1).lower()}')
+        return found
+
+    def print_table(self, results):
+        d = self.dataset
+        flagged = [r for r in results if r['issues']]
+        self.stdout.write(
+            f"\nDataset: {d['tasks']} tasks, {d['subtasks']} subtasks, {d['notes']} notes, "
+            f"{d['categories']} categories (seed {d['seed']})"
+        )
+        self.stdout.write(f'{len(results)} distinct statements, {len(flagged)} flagged\n')
+        for r in results if self.show_all else flagged:
+            style = self.style.WARNING if r['issues'] else self.style.SUCCESS
+            self.stdout.write(style('; '.join(r['issues']) or 'ok'))
+            self.stdout.write(f"  sql:  {r['sql']}")
+            for url in r['urls']:
+                self.stdout.write(f'  from: {url}')
+            for detail in r['plan']:
+                self.stdout.write(f'  plan: {detail}')
+            self.stdout.write('')
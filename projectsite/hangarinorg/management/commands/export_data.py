@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from hangarinorg.export import EXPORTS, FORMATS, stream
+
+
+# Options forwarded as list query parameters (see hangarinorg.filters)
+FILTER_OPTIONS = ('category', 'priority', 'status', 'parent', 'task', 'q', 'order')
+
+
+class Command(BaseCommand):
+    help = 'Stream tasks, subtasks or notes to CSV or NDJSON with the same filters as the web lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS), help='What to export')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help='Output format')
+        parser.add_argument('--output', default='-', help='File to write ("-" for stdout)')
+        parser.add_argument('--category', help='Tasks: category pk')
+        parser.add_argument('--priority', help='Tasks and subtasks: priority pk')
+        parser.add_argument('--status', help='Tasks and subtasks: status')
+        parser.add_argument('--parent', help='Subtasks: parent task pk')
+        parser.add_argument('--task', help='Notes: task pk')
+        parser.add_argument('--q', help='Full-text search')
+        parser.add_argument('--order', help='Sort keys, e.g. "-deadline,title"')
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in FILTER_OPTIONS if options[name]}
+        chunks = stream(options['kind'], options['format'], params)
+        if options['output'] == '-':
+            # ending='' keeps the chunks as they are; they carry their own newlines
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        try:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+        except OSError as exc:
+            raise CommandError(f'Cannot write {options["output"]}: {exc}')
+        self.stderr.write(self.style.SUCCESS(f'Wrote {options["kind"]} to {options["output"]}.'))
@@ -0,0 +1,64 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from hangarinorg.importer import TaskImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import tasks (with nested subtasks and notes) from CSV or JSON/NDJSON in bulk batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import ("-" for stdin)')
+        parser.add_argument('--format', choices=['csv', 'json'], default=None,
+                            help='Input format (default: from the file extension, CSV otherwise)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tasks per bulk_create/transaction')
+        parser.add_argument('--create-missing', action='store_true',
+                            help='Create unknown categories/priorities instead of rejecting the row')
+        parser.add_argument('--errors', default=None,
+                            help='Write rejected rows as CSV (row, problem) to this path')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        fmt = options['format'] or detect_format(options['path'])
+        self.started = time.perf_counter()
+        importer = TaskImporter(
+            batch_size=options['batch_size'],
+            create_missing=options['create_missing'],
+            progress=self.report_progress if options['verbosity'] > 1 else None,
+        )
+        try:
+            if options['path'] == '-':
+                report = importer.run(read_rows(sys.stdin, fmt))
+            else:
+                with open(options['path'], encoding='utf-8-sig', newline='') as fh:
+                    report = importer.run(read_rows(fh, fmt))
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}')
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise CommandError(f'Stopped after {importer.report.tasks} imported tasks: {exc}')
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as fh:
+                writer = csv.writer(fh)
+                writer.writerow(['row', 'problem'])
+                for number, messages in report.errors:
+                    writer.writerows([number, message] for message in messages)
+        elif report.errors:
+            for number, messages in report.errors[:20]:
+                self.stderr.write(f'  row {number}: {"; ".join(messages)}')
+            if report.rejected > 20:
+                self.stderr.write(f'  ... {report.rejected - 20} more (use --errors to save them all)')
+
+        elapsed = time.perf_counter() - self.started
+        style = self.style.WARNING if report.rejected else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Imported {report.tasks} tasks, {report.subtasks} subtasks and {report.notes} notes '
+            f'in {elapsed:.1f}s; {report.rejected} rows rejected.'
+        ))
+
+    def report_progress(self, report):
+        rate = report.tasks / max(time.perf_counter() - self.started, 1e-9)
+        self.stdout.write(f'  {report.tasks} tasks ({rate:.0f}/s), {report.rejected} rejected')
@@ -0,0 +1,19 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from hangarinorg.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than HANGARIN_SYNC_TOMBSTONE_DAYS (run it daily, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'HANGARIN_SYNC_TOMBSTONE_DAYS', 30),
+                            help='Keep tombstones from this many recent days')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones older than {options["days"]} days.'))
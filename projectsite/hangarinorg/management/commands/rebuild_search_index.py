@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from hangarinorg import search
+
+
+class Command(BaseCommand):
+    help = 'Recreate the full-text search tables/triggers and reindex tasks, subtasks and notes'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The full-text index requires SQLite (FTS5); other databases use icontains search.')
+        search.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS('Rebuilt the search index.'))
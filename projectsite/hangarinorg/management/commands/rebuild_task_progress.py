@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from hangarinorg.lookups import bump_version
+from hangarinorg.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored subtask counters and progress for every task'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of tasks updated per statement (keeps write locks short)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pks = Task.objects.order_by('pk').values_list('pk', flat=True)
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(pks.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            updated += Task.objects.filter(pk__gte=batch[0], pk__lte=batch[-1]).refresh_progress()
+            last_pk = batch[-1]
+        # the UPDATEs send no signals; cached pages may show the old progress
+        bump_version('task')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt progress: {updated} tasks were out of date.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from hangarinorg import deployment
+from hangarinorg.models import DeployJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued deploy jobs one at a time (the /deploy/ webhook starts this in the background); '
+        'with --now, queue a deploy first'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true', help='Queue a deploy and run it in this process')
+
+    def handle(self, *args, **options):
+        if options['now']:
+            DeployJob.objects.create()
+        jobs = deployment.run_pending()
+        for job in jobs:
+            style = self.style.SUCCESS if job.status == DeployJob.SUCCEEDED else self.style.ERROR
+            steps = ', '.join(f"{step['name']} {step['status']} ({step['duration_ms']} ms)" for step in job.steps)
+            self.stdout.write(style(f'Deploy {job.pk} {job.status}: {steps}'))
+            if job.error:
+                self.stdout.write(self.style.ERROR(f'  {job.error}'))
+        if not jobs:
+            self.stdout.write('No queued deploys to run (or one is already running).')
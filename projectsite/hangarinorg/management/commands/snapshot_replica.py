@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from hangarinorg import routers
+
+
+def file_path(name):
+    """Filesystem path of an SQLite NAME, which may be a ``file:`` URI."""
+    name = str(name)
+    return urlsplit(name).path if name.startswith('file:') else name
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into each SQLite read replica in HANGARIN_READ_REPLICAS '
+        '(run it every minute from cron, or keep it running with --interval)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep running, taking a snapshot every this many seconds')
+
+    def handle(self, *args, **options):
+        aliases = [alias for alias in routers.replicas() if connections[alias].vendor == 'sqlite']
+        if not aliases:
+            raise CommandError('No SQLite read replica is configured in HANGARIN_READ_REPLICAS.')
+        while True:
+            for alias in aliases:
+                self.snapshot(alias)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def snapshot(self, alias):
+        path = file_path(connections[alias].settings_dict['NAME'])
+        temp = f'{path}.tmp'
+        if os.path.exists(temp):
+            os.remove(temp)
+        source = connections[DEFAULT_DB_ALIAS]
+        # taken before the copy starts: the replica holds every write committed until now
+        started = time.time()
+        source.ensure_connection()
+        target = sqlite3.connect(temp)
+        try:
+            # a consistent copy of one read transaction; in WAL mode writers carry on meanwhile
+            source.connection.backup(target)
+            # the replica is opened read-only, where a WAL file could not be recovered
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+        # readers still on the old file finish on it; new connections open the new one
+        os.replace(temp, path)
+        routers.mark_synced(alias, started)
+        source.close()
+        self.stdout.write(
+            f'{alias}: {os.path.getsize(path) / 1024:.0f} KB snapshot in {(time.time() - started) * 1000:.0f} ms'
+        )
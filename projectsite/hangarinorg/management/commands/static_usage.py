@@ -0,0 +1,101 @@
+import gzip
+import os
+import re
+
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+
+STATIC_TAG = re.compile(r"""{%\s*static\s+['"]([^'"]+)['"]""")
+PARENT_TAG = re.compile(r"""{%\s*(?:extends|include)\s+['"]([^'"]+)['"]""")
+
+# What a template contains when it really uses a vendor asset: the plugin's own call, or
+# the element ids the theme's page scripts (js/dashboard.js...) attach the plugin to
+MARKERS = {
+    'vendors/chart.js/': ('new Chart(', 'transaction-history'),
+    'vendors/progressbar.js/': ('ProgressBar.', 'currentBalanceCircle'),
+    'vendors/jvectormap/': ('vectorMap(', 'audience-map'),
+    'vendors/owl-carousel-2/': ('owlCarousel(', 'owl-carousel'),
+    'vendors/flag-icon-css/': ('flag-icon',),
+    'js/dashboard.js': ('transaction-history', 'currentBalanceCircle', 'audience-map', 'owl-carousel'),
+    'js/todolist.js': ('todo-list',),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Report the static files each template loads (raw and gzip size) and the vendor assets '
+        'it loads without using, so they can move out of base.html'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('templates', nargs='*', help='Template names to report (default: all project templates)')
+
+    def handle(self, *args, **options):
+        self.sources = self.read_templates()
+        self.sizes = {}
+        names = options['templates'] or sorted(self.sources)
+        unused_everywhere = None
+        for name in names:
+            if name not in self.sources:
+                self.stderr.write(self.style.ERROR(f'Unknown template {name}'))
+                continue
+            text = self.chain_text(name)
+            assets = list(dict.fromkeys(STATIC_TAG.findall(text)))
+            # the asset paths themselves must not count as markers ("owl-carousel"...)
+            markup = STATIC_TAG.sub('', text)
+            unused = [asset for asset in assets if self.unused(asset, markup)]
+            raw, packed = self.total(assets)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f'  {len(assets)} static files, {raw / 1024:.0f} KB ({packed / 1024:.0f} KB gzip)')
+            for asset in unused:
+                size, gz = self.size(asset)
+                self.stdout.write(self.style.WARNING(f'  unused: {asset} ({size / 1024:.0f} KB, {gz / 1024:.0f} KB gzip)'))
+            unused_everywhere = set(unused) if unused_everywhere is None else unused_everywhere & set(unused)
+        if unused_everywhere:
+            self.stdout.write('\nLoaded but unused by every template above:')
+            for asset in sorted(unused_everywhere):
+                self.stdout.write(f'  {asset}')
+
+    def read_templates(self):
+        sources = {}
+        for directory in engines['django'].engine.dirs:
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if filename.endswith(('.html', '.txt', '.json')):
+                        path = os.path.join(root, filename)
+                        with open(path, encoding='utf-8') as fh:
+                            sources[os.path.relpath(path, directory)] = fh.read()
+        return sources
+
+    def chain_text(self, name, seen=None):
+        """The template's source plus every project template it extends or includes."""
+        seen = set() if seen is None else seen
+        if name in seen or name not in self.sources:
+            return ''
+        seen.add(name)
+        text = self.sources[name]
+        return text + ''.join(self.chain_text(parent, seen) for parent in PARENT_TAG.findall(text))
+
+    @staticmethod
+    def unused(asset, text):
+        for prefix, markers in MARKERS.items():
+            if asset.startswith(prefix):
+                return not any(marker in text for marker in markers)
+        return False
+
+    def size(self, asset):
+        if asset not in self.sizes:
+            path = finders.find(asset)
+            if path is None:
+                self.sizes[asset] = (0, 0)
+            else:
+                with open(path, 'rb') as fh:
+                    data = fh.read()
+                self.sizes[asset] = (len(data), len(gzip.compress(data)))
+        return self.sizes[asset]
+
+    def total(self, assets):
+        sizes = [self.size(asset) for asset in assets]
+        return sum(raw for raw, _ in sizes), sum(packed for _, packed in sizes)
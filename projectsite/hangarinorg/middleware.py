@@ -0,0 +1,350 @@
+import asyncio
+import logging
+import mimetypes
+import os
+import re
+import time
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from hangarinorg import routers
+from hangarinorg.db import retry_on_lock
+
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r'\s+')
+
+# Collector of the request being handled, for the worker threads it starts
+current_collector = ContextVar('hangarin_query_collector', default=None)
+
+
+def normalize_sql(sql):
+    """Collapse literals, IN lists and whitespace so repeated statement shapes compare equal."""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _LITERALS.sub('?', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class QueryCollector:
+    """``execute_wrapper`` callable that counts and times every query in one request."""
+
+    def __init__(self, slow_ms):
+        self.slow_ms = slow_ms
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.slow = []
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            # worker threads of the same request report here too
+            with self.lock:
+                self.count += 1
+                self.duration += elapsed
+                # raw SQL still has placeholders here, so identical shapes share one key
+                self.statements[sql] += 1
+                if elapsed >= self.slow_ms:
+                    self.slow.append((elapsed, sql))
+
+
+@contextmanager
+def collect_thread_queries():
+    """Count the calling thread's queries into the current request's collector, if any.
+
+    ``execute_wrapper`` only covers the connections of the thread that installs it, so
+    worker threads started for a request (``concurrency.gather_queries``) enter this.
+    """
+    collector = current_collector.get()
+    with ExitStack() as stack:
+        if collector is not None:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(collector))
+        yield
+
+
+class RequestTimingMiddleware:
+    """Record query count/time, template render time and view time per request.
+
+    The numbers, plus template fragment cache hits/misses, go out as a ``Server-Timing``
+    header; slow requests, slow queries and statements repeated within one request
+    (usually an N+1) are logged with the view name. Collection is a counter and a timer
+    around each query, so it can stay on. Queries of worker threads the view starts
+    (``concurrency.gather_queries``) are counted, their times summed; queries run while a
+    streaming response (the exports) is iterated come after the header is sent and are not.
+
+    Settings: ``HANGARIN_REQUEST_TIMING`` (on/off), ``HANGARIN_SLOW_REQUEST_MS``,
+    ``HANGARIN_SLOW_QUERY_MS`` and ``HANGARIN_DUPLICATE_QUERY_THRESHOLD``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'HANGARIN_REQUEST_TIMING', True)
+        self.slow_request_ms = getattr(settings, 'HANGARIN_SLOW_REQUEST_MS', 500)
+        self.slow_query_ms = getattr(settings, 'HANGARIN_SLOW_QUERY_MS', 100)
+        self.duplicate_threshold = getattr(settings, 'HANGARIN_DUPLICATE_QUERY_THRESHOLD', 5)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        collector = QueryCollector(self.slow_query_ms)
+        request._template_ms = 0.0
+        request._fragment_cache = Counter()
+        start = time.perf_counter()
+        token = current_collector.set(collector)
+        try:
+            with collect_thread_queries():
+                response = self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+        template_ms = request._template_ms
+
+        timings = [
+            f'db;dur={collector.duration:.1f};desc="{collector.count} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'view;dur={total_ms - template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ]
+        fragments = request._fragment_cache
+        if fragments:
+            timings.append(f'frag;desc="{fragments["hit"]} hit, {fragments["miss"]} miss"')
+        response['Server-Timing'] = ', '.join(timings)
+        self.report(request, collector, total_ms, template_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        # TemplateResponse renders after the view returns; wrap render() to time it
+        render = response.render
+
+        def timed_render():
+            start = time.perf_counter()
+            try:
+                return render()
+            finally:
+                request._template_ms = getattr(request, '_template_ms', 0.0) + (time.perf_counter() - start) * 1000
+
+        response.render = timed_render
+        return response
+
+    def report(self, request, collector, total_ms, template_ms):
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name or match._func_path) if match else request.path
+
+        if total_ms >= self.slow_request_ms:
+            logger.warning(
+                'Slow request %s %s (%s): %.1f ms total, %d queries in %.1f ms, template %.1f ms',
+                request.method, request.path, view_name, total_ms,
+                collector.count, collector.duration, template_ms,
+            )
+        for elapsed, sql in collector.slow:
+            logger.warning('Slow query in %s (%.1f ms): %s', view_name, elapsed, normalize_sql(sql))
+
+        duplicates = Counter()
+        for sql, count in collector.statements.items():
+            duplicates[normalize_sql(sql)] += count
+        for sql, count in duplicates.items():
+            if count >= self.duplicate_threshold:
+                logger.warning('Query repeated %d times in %s: %s', count, view_name, sql)
+
+
+class NoStoreMessagesMiddleware:
+    """Mark responses that displayed flash messages ``Cache-Control: no-store``.
+
+    The service worker replays cached pages while it revalidates them; a page carrying
+    a one-time "Task saved" message must not be shown again from that cache.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        storage = getattr(request, '_messages', None)
+        # iterating the messages (as base.html does when there are any) marks them used
+        if storage is not None and storage.used:
+            patch_cache_control(response, no_store=True)
+        return response
+
+
+class PageOwnerMiddleware:
+    """Name the signed-in user's pk (empty when signed out) in ``X-Hangarin-User``.
+
+    The service worker keeps one user's pages and drops them once a response names
+    someone else, so a sign-out or a switch of account never replays the previous pages.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        response['X-Hangarin-User'] = str(user.pk) if user is not None and user.is_authenticated else ''
+        return response
+
+
+class StaticFilesMiddleware:
+    """Serve the collected static files from the app when no front-end server does.
+
+    Fingerprinted names (see ``storage.CompressedManifestStaticFilesStorage``) never change
+    content, so they go out with a one-year ``immutable`` Cache-Control, as the ``.br`` or
+    ``.gz`` variant the client accepts. Anything else gets a short max-age and
+    Last-Modified. Only active with ``HANGARIN_SERVE_STATIC``.
+    """
+
+    # seconds a file without a content hash in its name may be reused unchecked
+    MUTABLE_MAX_AGE = 60
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'HANGARIN_SERVE_STATIC', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = str(settings.STATIC_ROOT)
+        # read once per process; a deploy runs collectstatic and then reloads the app
+        self.fingerprinted = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            response = self.serve(request, request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        immutable = name in self.fingerprinted
+        served, encoding = path, None
+        if immutable:
+            accepted = request.headers.get('Accept-Encoding', '')
+            for coding, suffix in self.ENCODINGS:
+                if coding in accepted and os.path.isfile(path + suffix):
+                    served, encoding = path + suffix, coding
+                    break
+
+        mtime = os.stat(served).st_mtime
+        if not immutable and not was_modified_since(request.headers.get('If-Modified-Since'), mtime):
+            return HttpResponseNotModified()
+
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            open(served, 'rb'), content_type=content_type or 'application/octet-stream',
+            filename=os.path.basename(path),
+        )
+        response['Last-Modified'] = http_date(mtime)
+        if immutable:
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+            patch_vary_headers(response, ('Accept-Encoding',))
+        else:
+            response['Cache-Control'] = f'public, max-age={self.MUTABLE_MAX_AGE}'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return response
+
+
+class ReadReplicaMiddleware:
+    """Answer GET requests to views marked ``routers.read_from_replica`` from a read replica.
+
+    The replica must have been synced after the client's last write: every successful
+    write request sets a cookie with its time, so a user sees their own changes on the
+    next list page even before the replicas have them. With no such replica the request
+    reads the primary as usual.
+    """
+
+    COOKIE = 'hangarin_wrote'
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def __init__(self, get_response):
+        if not routers.replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = routers.activate(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.deactivate(token)
+        if request.method not in self.SAFE_METHODS and response.status_code < 400:
+            # past max_lag every usable replica is newer than the write anyway
+            response.set_cookie(
+                self.COOKIE, f'{time.time():.3f}', max_age=routers.max_lag(),
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ('GET', 'HEAD') and getattr(view_func, '_read_replica', False):
+            try:
+                wrote = float(request.COOKIES.get(self.COOKIE, 0))
+            except ValueError:
+                wrote = float('inf')
+            routers.activate(routers.choose_replica(not_before=wrote))
+        return None
+
+
+class LockRetryMiddleware:
+    """Run each write request's view in one transaction, retried while SQLite reports a lock.
+
+    The transaction holds the write lock from its first statement (``transaction_mode``
+    IMMEDIATE) and waits ``busy_timeout`` for it; a view that still meets "database is
+    locked" is rolled back and run again with backoff (see ``db.retry_on_lock``). Messages
+    queued by a failed attempt are dropped before the next one, and cache version bumps
+    wait for the commit (``lookups.bump_version``), so a retried view leaves one of each.
+    Views marked ``transaction.non_atomic_requests`` manage their own transactions and
+    are left alone. Keep it last in MIDDLEWARE so CSRF and the other view checks run first.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in self.SAFE_METHODS or asyncio.iscoroutinefunction(view_func):
+            return None
+        if DEFAULT_DB_ALIAS in getattr(view_func, '_non_atomic_requests', set()):
+            return None
+        storage = getattr(request, '_messages', None)
+        queued = len(storage._queued_messages) if storage is not None else 0
+
+        @wraps(view_func)
+        def attempt(request, *args, **kwargs):
+            if storage is not None:
+                # every attempt starts from the messages queued before the view ran
+                del storage._queued_messages[queued:]
+            return view_func(request, *args, **kwargs)
+
+        return retry_on_lock(attempt)(request, *view_args, **view_kwargs)
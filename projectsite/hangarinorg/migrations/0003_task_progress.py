@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-17 17:13
+
+from django.db import migrations, models
+from django.db.models import Case, Count, ExpressionWrapper, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan
+
+
+def backfill_progress(apps, schema_editor):
+    Task = apps.get_model('hangarinorg', 'Task')
+    SubTask = apps.get_model('hangarinorg', 'SubTask')
+    subtasks = SubTask.objects.filter(parent_task=OuterRef('pk')).order_by().values('parent_task')
+    total = Coalesce(Subquery(subtasks.annotate(n=Count('pk')).values('n')), 0)
+    completed = Coalesce(Subquery(subtasks.filter(status='Completed').annotate(n=Count('pk')).values('n')), 0)
+    Task.objects.update(
+        subtask_total=total,
+        subtask_completed=completed,
+        progress=Case(
+            When(GreaterThan(total, 0), then=ExpressionWrapper(Value(100) * completed / total, output_field=IntegerField())),
+            When(status='Completed', then=Value(100)),
+            When(status='In Progress', then=Value(50)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hangarinorg', '0002_alter_category_options_alter_priority_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='progress',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtask_completed',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtask_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Full-text search index (SQLite FTS5) over task, subtask and note text
+
+from django.db import migrations
+
+
+# The statements as of this migration, so replaying it always builds the same schema.
+# Later changes to hangarinorg.search are installed by its post_migrate hook (search.ensure).
+SCHEMA = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS hangarinorg_task_fts USING fts5('
+    "title, description, content='hangarinorg_task', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_task_fts_ai AFTER INSERT ON hangarinorg_task BEGIN '
+    'INSERT INTO hangarinorg_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description); '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_task_fts_ad AFTER DELETE ON hangarinorg_task BEGIN '
+    "INSERT INTO hangarinorg_task_fts(hangarinorg_task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_task_fts_au AFTER UPDATE OF title, description ON hangarinorg_task BEGIN '
+    "INSERT INTO hangarinorg_task_fts(hangarinorg_task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO hangarinorg_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description); '
+    'END',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS hangarinorg_subtask_fts USING fts5('
+    "title, content='hangarinorg_subtask', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_subtask_fts_ai AFTER INSERT ON hangarinorg_subtask BEGIN '
+    'INSERT INTO hangarinorg_subtask_fts(rowid, title) VALUES (new.id, new.title); '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_subtask_fts_ad AFTER DELETE ON hangarinorg_subtask BEGIN '
+    "INSERT INTO hangarinorg_subtask_fts(hangarinorg_subtask_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_subtask_fts_au AFTER UPDATE OF title ON hangarinorg_subtask BEGIN '
+    "INSERT INTO hangarinorg_subtask_fts(hangarinorg_subtask_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+    'INSERT INTO hangarinorg_subtask_fts(rowid, title) VALUES (new.id, new.title); '
+    'END',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS hangarinorg_note_fts USING fts5('
+    "content, content='hangarinorg_note', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_note_fts_ai AFTER INSERT ON hangarinorg_note BEGIN '
+    'INSERT INTO hangarinorg_note_fts(rowid, content) VALUES (new.id, new.content); '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_note_fts_ad AFTER DELETE ON hangarinorg_note BEGIN '
+    "INSERT INTO hangarinorg_note_fts(hangarinorg_note_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS hangarinorg_note_fts_au AFTER UPDATE OF content ON hangarinorg_note BEGIN '
+    "INSERT INTO hangarinorg_note_fts(hangarinorg_note_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    'INSERT INTO hangarinorg_note_fts(rowid, content) VALUES (new.id, new.content); '
+    'END',
+]
+
+# index the rows that already exist, then merge the segments
+POPULATE = [
+    "INSERT INTO hangarinorg_task_fts(hangarinorg_task_fts) VALUES ('rebuild')",
+    "INSERT INTO hangarinorg_task_fts(hangarinorg_task_fts) VALUES ('optimize')",
+    "INSERT INTO hangarinorg_subtask_fts(hangarinorg_subtask_fts) VALUES ('rebuild')",
+    "INSERT INTO hangarinorg_subtask_fts(hangarinorg_subtask_fts) VALUES ('optimize')",
+    "INSERT INTO hangarinorg_note_fts(hangarinorg_note_fts) VALUES ('rebuild')",
+    "INSERT INTO hangarinorg_note_fts(hangarinorg_note_fts) VALUES ('optimize')",
+]
+
+DROP = [
+    'DROP TRIGGER IF EXISTS hangarinorg_task_fts_ai',
+    'DROP TRIGGER IF EXISTS hangarinorg_task_fts_ad',
+    'DROP TRIGGER IF EXISTS hangarinorg_task_fts_au',
+    'DROP TABLE IF EXISTS hangarinorg_task_fts',
+    'DROP TRIGGER IF EXISTS hangarinorg_subtask_fts_ai',
+    'DROP TRIGGER IF EXISTS hangarinorg_subtask_fts_ad',
+    'DROP TRIGGER IF EXISTS hangarinorg_subtask_fts_au',
+    'DROP TABLE IF EXISTS hangarinorg_subtask_fts',
+    'DROP TRIGGER IF EXISTS hangarinorg_note_fts_ai',
+    'DROP TRIGGER IF EXISTS hangarinorg_note_fts_ad',
+    'DROP TRIGGER IF EXISTS hangarinorg_note_fts_au',
+    'DROP TABLE IF EXISTS hangarinorg_note_fts',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        # FTS5 is SQLite only; elsewhere search falls back to icontains
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hangarinorg', '0003_task_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(SCHEMA + POPULATE), run(DROP)),
+    ]
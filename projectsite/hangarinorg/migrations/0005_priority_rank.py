@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 17:27
+
+from django.db import migrations, models
+
+
+# Ranks that reproduce the old name-based priority ordering for existing rows.
+NAME_RANKS = {'critical': 1, 'high': 2, 'medium': 3, 'low': 4, 'optional': 5}
+
+
+def backfill_rank(apps, schema_editor):
+    Priority = apps.get_model('hangarinorg', 'Priority')
+    for priority in Priority.objects.all():
+        rank = NAME_RANKS.get(priority.priority_name.strip().lower())
+        if rank is not None:
+            Priority.objects.filter(pk=priority.pk).update(rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hangarinorg', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='priority',
+            options={'ordering': ['rank', 'priority_name'], 'verbose_name': 'Priority', 'verbose_name_plural': 'Priorities'},
+        ),
+        migrations.AddField(
+            model_name='priority',
+            name='rank',
+            field=models.PositiveSmallIntegerField(db_index=True, default=999, help_text='Sort position: lower numbers are more urgent.'),
+        ),
+        migrations.RunPython(backfill_rank, migrations.RunPython.noop),
+    ]
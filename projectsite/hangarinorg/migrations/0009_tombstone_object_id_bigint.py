@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hangarinorg', '0008_deploy_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tombstone',
+            name='object_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+    ]
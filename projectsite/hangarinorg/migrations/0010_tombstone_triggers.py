@@ -0,0 +1,46 @@
+# Record deletions as tombstones from SQLite triggers instead of a post_delete signal
+
+from django.db import migrations
+
+
+# The triggers as of this migration, so replaying it always builds the same schema.
+# Later changes to hangarinorg.sync are installed by its post_migrate hook (sync.install_tombstones).
+TABLES = {
+    'category': 'hangarinorg_category',
+    'priority': 'hangarinorg_priority',
+    'task': 'hangarinorg_task',
+    'subtask': 'hangarinorg_subtask',
+    'note': 'hangarinorg_note',
+}
+
+SCHEMA = [
+    f'CREATE TRIGGER IF NOT EXISTS {table}_tombstone AFTER DELETE ON {table} BEGIN '
+    f'INSERT INTO hangarinorg_tombstone(model_name, object_id, deleted_at) '
+    f"VALUES ('{model_name}', old.id, strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'); "
+    f'END'
+    for model_name, table in TABLES.items()
+]
+
+DROP = [f'DROP TRIGGER IF EXISTS {table}_tombstone' for table in TABLES.values()]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        # tombstones are written by SQLite triggers only
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            # params=None keeps the '%' of strftime from being read as a placeholder
+            schema_editor.execute(statement, params=None)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hangarinorg', '0009_tombstone_object_id_bigint'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(SCHEMA), run(DROP)),
+    ]
@@ -1,4 +1,14 @@
 from django.db import models
+from django.db.models import Case, Count, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+
+# Progress shown for a task that has no subtasks yet, keyed by task status
+STATUS_PROGRESS = {"Completed": 100, "In Progress": 50}
+
+
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -8,10 +18,18 @@ class BaseModel(models.Model):
 
 class Priority(BaseModel):
     priority_name = models.CharField(max_length=100)
+    rank = models.PositiveSmallIntegerField(
+        default=999,
+        db_index=True,
+        help_text="Sort position: lower numbers are more urgent.",
+    )
 
     class Meta:
         verbose_name = "Priority"
         verbose_name_plural = "Priorities"
+        ordering = ["rank", "priority_name"]
+        # delta sync reads rows changed since a timestamp
+        indexes = [models.Index(fields=["updated_at"], name="priority_updated_at_idx")]
 
     def __str__(self):
         return self.priority_name
@@ -22,10 +40,51 @@ class Category(BaseModel):
     class Meta:
         verbose_name = "Category"
         verbose_name_plural = "Categories"
+        # delta sync reads rows changed since a timestamp
+        indexes = [models.Index(fields=["updated_at"], name="category_updated_at_idx")]
 
     def __str__(self):
         return self.category_name
     
+class TaskQuerySet(models.QuerySet):
+    def refresh_progress(self):
+        """Recompute the stored subtask counters and progress for these tasks in one UPDATE.
+
+        Only tasks whose numbers actually change are written, and those get a new
+        ``updated_at`` so delta sync clients pick up the new progress.
+        """
+        subtasks = SubTask.objects.filter(parent_task=OuterRef('pk')).order_by().values('parent_task')
+        total = Coalesce(Subquery(subtasks.annotate(n=Count('pk')).values('n')), 0)
+        completed = Coalesce(
+            Subquery(subtasks.filter(status="Completed").annotate(n=Count('pk')).values('n')), 0
+        )
+        progress = Case(
+            When(GreaterThan(total, 0), then=ExpressionWrapper(Value(100) * completed / total, output_field=IntegerField())),
+            *[When(status=status, then=Value(pct)) for status, pct in STATUS_PROGRESS.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        stale = ~Q(subtask_total=total) | ~Q(subtask_completed=completed) | ~Q(progress=progress)
+        return self.filter(stale).update(
+            subtask_total=total,
+            subtask_completed=completed,
+            progress=progress,
+            updated_at=timezone.now(),
+        )
+
+    def set_status(self, status):
+        """Set the status of these tasks in one UPDATE; progress follows it for tasks without subtasks."""
+        return self.update(
+            status=status,
+            progress=Case(
+                When(subtask_total=0, then=Value(STATUS_PROGRESS.get(status, 0))),
+                default=F('progress'),
+                output_field=IntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+
+
 class Task(BaseModel):
     title = models.CharField(max_length=200)
     description = models.CharField(max_length=500)
@@ -40,17 +99,82 @@ class Task(BaseModel):
              ],
              default="Pending"
              )
+    # Denormalized from subtasks so progress can be sorted/filtered as a plain column;
+    # kept current by SubTask.save/delete and SubTaskQuerySet, rebuilt by `rebuild_task_progress`
+    subtask_total = models.PositiveIntegerField(default=0, editable=False)
+    subtask_completed = models.PositiveIntegerField(default=0, editable=False)
+    progress = models.PositiveSmallIntegerField(default=0, editable=False, db_index=True)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        # match the filter/order shapes of the task lists: category pages filter by status
+        # or sort by deadline, the dashboard sorts by deadline then title, and the notes
+        # page lists recently updated tasks
+        indexes = [
+            models.Index(fields=["category", "status"], name="task_category_status_idx"),
+            models.Index(fields=["category", "deadline"], name="task_category_deadline_idx"),
+            models.Index(fields=["deadline", "title"], name="task_deadline_title_idx"),
+            models.Index(fields=["updated_at"], name="task_updated_at_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def compute_progress(self):
+        if self.subtask_total:
+            return 100 * self.subtask_completed // self.subtask_total
+        return STATUS_PROGRESS.get(self.status, 0)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        self.progress = self.compute_progress()
+        super().save(*args, **kwargs)
+        if not adding:
+            # the counters on this instance may be stale if subtasks changed since it was loaded
+            Task.objects.filter(pk=self.pk).refresh_progress()
+
 class Note(BaseModel):
     task = models.ForeignKey(Task, on_delete=models.CASCADE)
     content = models.TextField()
 
+    class Meta:
+        # notes are listed per task, newest first
+        indexes = [
+            models.Index(fields=["task", "created_at"], name="note_task_created_idx"),
+            models.Index(fields=["updated_at"], name="note_updated_at_idx"),
+        ]
+
     def __str__(self):
         return self.content
 
+class SubTaskQuerySet(models.QuerySet):
+    """Keeps the parent tasks' progress columns in sync for bulk operations."""
+
+    def _parent_ids(self):
+        return set(self.order_by().values_list('parent_task_id', flat=True).distinct())
+
+    def update(self, **kwargs):
+        parent_ids = self._parent_ids()
+        rows = super().update(**kwargs)
+        new_parent = kwargs.get('parent_task_id', kwargs.get('parent_task'))
+        if new_parent is not None:
+            parent_ids.add(getattr(new_parent, 'pk', new_parent))
+        Task.objects.filter(pk__in=parent_ids).refresh_progress()
+        return rows
+
+    def delete(self):
+        parent_ids = self._parent_ids()
+        result = super().delete()
+        Task.objects.filter(pk__in=parent_ids).refresh_progress()
+        return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        Task.objects.filter(pk__in={obj.parent_task_id for obj in objs}).refresh_progress()
+        return objs
+
+
 class SubTask(BaseModel):
     parent_task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='subtasks')
     title = models.CharField(max_length=200)
@@ -62,8 +186,82 @@ class SubTask(BaseModel):
              ],
              default="Pending"
              )
+
+    objects = SubTaskQuerySet.as_manager()
+
+    class Meta:
+        # progress refreshes count a task's subtasks by status; the list sorts by last update
+        indexes = [
+            models.Index(fields=["parent_task", "status"], name="subtask_parent_status_idx"),
+            models.Index(fields=["updated_at"], name="subtask_updated_at_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the parent we were loaded with so moving a subtask refreshes both tasks
+        instance._loaded_parent_id = instance.__dict__.get('parent_task_id')
+        return instance
+
+    def _refresh_parents(self):
+        parent_ids = {self.parent_task_id, getattr(self, '_loaded_parent_id', None)} - {None}
+        Task.objects.filter(pk__in=parent_ids).refresh_progress()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._refresh_parents()
+        self._loaded_parent_id = self.parent_task_id
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._refresh_parents()
+        return result
 
 
+class Tombstone(models.Model):
+    """A deleted row, kept so delta sync clients can drop it too (see ``sync.py``).
+
+    Written by SQLite triggers (``sync.install_tombstones``), so cascades (a category's tasks,
+    a task's subtasks and notes) and queryset deletes leave one each; ``prune_tombstones``
+    drops those older than the sync window.
+    """
+    model_name = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.model_name} {self.object_id}'
+
+
+class DeployJob(models.Model):
+    """One deploy requested through the webhook, run by the ``run_deploy`` worker (see ``deployment.py``)."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            (QUEUED, "Queued"),
+            (RUNNING, "Running"),
+            (SUCCEEDED, "Succeeded"),
+            (FAILED, "Failed"),
+        ],
+        default=QUEUED,
+        db_index=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # [{"name", "status", "duration_ms", "log"}, ...] in the order the steps ran
+    steps = models.JSONField(default=list, blank=True)
+    # requirements.txt digest once its packages were installed (or found unchanged)
+    requirements_hash = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'Deploy {self.pk} ({self.status})'
@@ -0,0 +1,49 @@
+import functools
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.urls import reverse
+
+
+logger = logging.getLogger(__name__)
+
+
+def _manifest():
+    paths = getattr(settings, 'HANGARIN_OFFLINE_PRECACHE', ())
+    digest = hashlib.sha256()
+    with open(settings.PWA_SERVICE_WORKER_PATH, 'rb') as fh:
+        worker = fh.read()
+    digest.update(worker)
+    for path in paths:
+        found = finders.find(path)
+        if found is None:
+            logger.warning('Offline precache file %s was not found', path)
+            continue
+        digest.update(path.encode())
+        with open(found, 'rb') as fh:
+            digest.update(fh.read())
+    config = {
+        # any change to the worker or a precached file yields a new cache, so clients
+        # drop the old copies on their next visit
+        'version': digest.hexdigest()[:12],
+        'precache': [static(path) for path in paths] + [reverse('offline')],
+        'offlineUrl': reverse('offline'),
+    }
+    return f'self.HANGARIN = {json.dumps(config)};\n' + worker.decode()
+
+
+_cached_manifest = functools.lru_cache(maxsize=1)(_manifest)
+
+
+def service_worker_source():
+    """The service worker script with its precache manifest and version prepended.
+
+    Hashing the files takes a few milliseconds, so outside DEBUG it is done once per process.
+    """
+    if settings.DEBUG:
+        return _manifest()
+    return _cached_manifest()
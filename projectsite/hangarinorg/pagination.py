@@ -0,0 +1,157 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import QueryDict
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder drops microseconds, which would make equal-timestamp rows skip or repeat
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+class KeysetPage:
+    """One page of keyset-paginated results, shaped like Django's ``Page`` where templates need it."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, params=None, cursor_param='cursor'):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._params = params
+        self._cursor_param = cursor_param
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _url(self, cursor):
+        if cursor is None:
+            return ''
+        params = self._params.copy() if self._params is not None else QueryDict(mutable=True)
+        params[self._cursor_param] = cursor
+        return '?' + params.urlencode()
+
+    @property
+    def next_url(self):
+        return self._url(self.next_cursor)
+
+    @property
+    def previous_url(self):
+        return self._url(self.previous_cursor)
+
+
+class KeysetPaginator:
+    """Cursor pagination keyed on the queryset's own ``order_by`` columns plus a pk tiebreaker.
+
+    Every page is fetched with a ``WHERE (cols) > (last row)`` filter instead of an
+    OFFSET, so page N costs the same as page 1. Ordering columns must be non-null
+    (model fields, related lookups such as ``category__category_name`` or annotations).
+    """
+
+    def __init__(self, queryset, per_page, cursor_param='cursor'):
+        self.per_page = per_page
+        self.cursor_param = cursor_param
+        ordering = [f for f in (queryset.query.order_by or queryset.model._meta.ordering) if isinstance(f, str)]
+        if not any(f.lstrip('-') in ('pk', 'id') for f in ordering):
+            # stable tiebreaker, following the direction of the last sort column
+            ordering.append('-pk' if ordering and ordering[-1].startswith('-') else 'pk')
+        self.ordering = ordering
+        self.queryset = queryset.order_by(*ordering)
+
+    def encode_cursor(self, obj, reverse=False):
+        values = [self._value(obj, f.lstrip('-')) for f in self.ordering]
+        payload = json.dumps({'o': self.ordering, 'v': values, 'r': reverse}, cls=_CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return ``(values, reverse)`` or ``None`` for a missing, malformed or stale cursor."""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, binascii.Error, UnicodeDecodeError):
+            return None
+        # a cursor from a different sort order would point to the wrong place; start over instead
+        if not isinstance(payload, dict) or payload.get('o') != self.ordering or len(payload.get('v', [])) != len(self.ordering):
+            return None
+        return payload['v'], bool(payload.get('r'))
+
+    @staticmethod
+    def _value(obj, path):
+        value = obj
+        for attr in path.split('__'):
+            value = getattr(value, attr)
+        return value
+
+    def _after(self, values, reverse):
+        """Build the lexicographic "comes after these values" condition for the ordering."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            condition |= Q(**equal, **{f'{name}__{"lt" if descending else "gt"}': value})
+            equal[name] = value
+        return condition
+
+    def page(self, cursor=None, params=None):
+        decoded = self.decode_cursor(cursor)
+        values, reverse = decoded if decoded else (None, False)
+
+        qs = self.queryset
+        if reverse:
+            qs = qs.order_by(*[_flip(f) for f in self.ordering])
+        if values is not None:
+            qs = qs.filter(self._after(values, reverse))
+
+        rows = list(qs[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, values is not None
+
+        next_cursor = self.encode_cursor(rows[-1]) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], reverse=True) if rows and has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor, params, self.cursor_param)
+
+
+class KeysetPaginationMixin:
+    """Swap ListView's OFFSET paginator for keyset pagination on ``?cursor=``."""
+
+    paginate_by = getattr(settings, 'HANGARIN_PAGE_SIZE', 50)
+    cursor_param = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, self.cursor_param)
+        page = paginator.page(self.request.GET.get(self.cursor_param), self.request.GET)
+        return (paginator, page, page.object_list, page.has_other_pages())
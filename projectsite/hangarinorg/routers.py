@@ -0,0 +1,119 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+SYNCED_KEY = 'hangarin:replica:{}'
+
+# Apps whose reads may go to a replica. Users and sessions always come from the primary:
+# a login or a new account is not in a snapshot yet.
+REPLICATED_APPS = {'hangarinorg'}
+
+# (alias, synced at) of the replica the current request reads from; None reads the primary
+_reading = ContextVar('hangarin_reading', default=None)
+
+
+def replicas():
+    return list(getattr(settings, 'HANGARIN_READ_REPLICAS', ()))
+
+
+def max_lag():
+    return getattr(settings, 'HANGARIN_REPLICA_MAX_LAG', 300)
+
+
+def mark_synced(alias, timestamp):
+    """Record that replica ``alias`` holds every write committed before ``timestamp``."""
+    cache.set(SYNCED_KEY.format(alias), timestamp, None)
+
+
+def choose_replica(not_before=0):
+    """``(alias, synced at)`` of a replica recent enough to read from, or None.
+
+    A replica qualifies when it was synced within ``HANGARIN_REPLICA_MAX_LAG`` seconds
+    and after ``not_before`` (the client's last write).
+    """
+    aliases = replicas()
+    if not aliases:
+        return None
+    synced = cache.get_many([SYNCED_KEY.format(alias) for alias in aliases])
+    cutoff = max(time.time() - max_lag(), not_before)
+    fresh = [
+        (alias, synced[SYNCED_KEY.format(alias)]) for alias in aliases
+        if synced.get(SYNCED_KEY.format(alias), 0) > cutoff
+    ]
+    return random.choice(fresh) if fresh else None
+
+
+def activate(choice):
+    """Read from ``choice`` (see ``choose_replica``) until the returned token is reset."""
+    return _reading.set(choice)
+
+
+def deactivate(token):
+    _reading.reset(token)
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block, e.g. to fill a cache shared by all requests."""
+    token = activate(None)
+    try:
+        yield
+    finally:
+        deactivate(token)
+
+
+def read_alias():
+    """The alias this request reads app data from; None means the router's default."""
+    choice = _reading.get()
+    return choice[0] if choice else None
+
+
+def read_version():
+    """Identifies the data this request reads, for cache keys: '' on the primary."""
+    choice = _reading.get()
+    return f'{choice[0]}@{choice[1]}' if choice else ''
+
+
+def read_from_replica(view):
+    """Mark a read-only view whose GET requests may be answered from a replica.
+
+    ``middleware.ReadReplicaMiddleware`` picks the replica; class-based views take it as
+    ``method_decorator(read_from_replica, name='dispatch')``.
+    """
+    view._read_replica = True
+    return view
+
+
+class ReplicaRouter:
+    """Reads of app models go to the replica chosen for the request, writes to 'default'.
+
+    Objects keep reading related rows from the database they came from, and saving one
+    loaded from a replica writes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if model._meta.app_label in REPLICATED_APPS:
+            return read_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # every alias holds a copy of the same tables
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # replicas are copies of 'default', migrated along with it
+        if db in replicas():
+            return False
+        return None
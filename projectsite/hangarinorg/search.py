@@ -0,0 +1,148 @@
+import re
+
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q, Value, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from .models import Task, SubTask, Note
+
+
+# Columns indexed for each model. Each model gets an external-content FTS5 table
+# (`<db_table>_fts`) whose rowid is the model pk, kept in sync by SQLite triggers so
+# bulk_create/update/delete are covered as well as regular saves.
+SEARCH_FIELDS = {
+    Task: ('title', 'description'),
+    SubTask: ('title',),
+    Note: ('content',),
+}
+
+_available = {}
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def schema_statements(model):
+    table = model._meta.db_table
+    fts = fts_table(model)
+    cols = SEARCH_FIELDS[model]
+    col_list = ', '.join(cols)
+    new_values = ', '.join(f'new.{c}' for c in cols)
+    old_values = ', '.join(f'old.{c}' for c in cols)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{col_list}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col_list} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def drop_statements(model):
+    fts = fts_table(model)
+    return [f'DROP TRIGGER IF EXISTS {fts}_{suffix}' for suffix in ('ai', 'ad', 'au')] + [
+        f'DROP TABLE IF EXISTS {fts}'
+    ]
+
+
+def install(conn=connection):
+    """Create the FTS tables and triggers if missing (idempotent; no-op off SQLite)."""
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for model in SEARCH_FIELDS:
+            for statement in schema_statements(model):
+                cursor.execute(statement)
+    _available.pop(conn.alias, None)
+
+
+def rebuild(conn=connection):
+    """Repopulate every FTS table from its content table, then merge segments."""
+    install(conn)
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for model in SEARCH_FIELDS:
+            fts = fts_table(model)
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+
+
+def ensure(conn=connection):
+    """Called after migrate: restore triggers dropped by table rebuilds, index from scratch if missing.
+
+    Only repairs drift once migration 0004 (which creates the index) is applied.
+    """
+    if conn.vendor != 'sqlite':
+        return
+    if ('hangarinorg', '0004_search_index') not in MigrationRecorder(conn).applied_migrations():
+        return
+    tables = set(conn.introspection.table_names())
+    if not all(model._meta.db_table in tables for model in SEARCH_FIELDS):
+        return
+    if all(fts_table(model) in tables for model in SEARCH_FIELDS):
+        install(conn)
+    else:
+        rebuild(conn)
+
+
+def is_available(conn=connection):
+    if conn.alias not in _available:
+        available = False
+        if conn.vendor == 'sqlite':
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [fts_table(Task)],
+                )
+                available = cursor.fetchone()[0] > 0
+        _available[conn.alias] = available
+    return _available[conn.alias]
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query: every word must match, each as a prefix."""
+    tokens = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_filter(model, text, lookup='pk'):
+    """Q object matching ``model`` rows for ``text``, reached from the queried model through ``lookup``.
+
+    Falls back to ``icontains`` over the same columns when the FTS index is unavailable.
+    """
+    if not is_available():
+        prefix = '' if lookup == 'pk' else f'{lookup}__'
+        condition = Q()
+        for field in SEARCH_FIELDS[model]:
+            condition |= Q(**{f'{prefix}{field}__icontains': text})
+        return condition
+    expression = match_expression(text)
+    if not expression:
+        return Q(pk__in=[])
+    fts = fts_table(model)
+    return Q(**{f'{lookup}__in': RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (expression,))})
+
+
+def rank_expression(model, text):
+    """bm25 relevance for ``model`` rows (lower is better), usable in annotate()/order_by()."""
+    expression = match_expression(text)
+    if not is_available() or not expression:
+        return Value(0.0, output_field=FloatField())
+    fts = fts_table(model)
+    table = connection.ops.quote_name(model._meta.db_table)
+    rank = RawSQL(
+        f'SELECT rank FROM {fts} WHERE {fts} MATCH %s AND rowid = {table}.id',
+        (expression,),
+        output_field=FloatField(),
+    )
+    # rows reached through another lookup (e.g. a note matched by its task title) have no
+    # rank of their own; bm25 scores are negative, so 0 sorts them after every direct match
+    return Coalesce(rank, Value(0.0, output_field=FloatField()))
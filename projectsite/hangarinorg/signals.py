@@ -0,0 +1,28 @@
+from django.db import connections
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from . import search, sync
+from .lookups import bump_version
+from .models import Category, Priority, Task, SubTask
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Priority)
+@receiver(post_delete, sender=Priority)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=SubTask)
+@receiver(post_delete, sender=SubTask)
+def invalidate_lookups(sender, **kwargs):
+    """Bump the cached lookup (and rendered fragment) version for the model that changed."""
+    bump_version(sender._meta.model_name)
+
+
+@receiver(post_migrate)
+def ensure_triggers(sender, using, **kwargs):
+    """SQLite drops triggers when a migration rebuilds a table, so put them back."""
+    if sender.name == 'hangarinorg':
+        search.ensure(connections[using])
+        sync.install_tombstones(connections[using])
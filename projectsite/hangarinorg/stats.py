@@ -0,0 +1,55 @@
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from .models import Task, SubTask
+
+
+# Where each model keeps the deadline used for the "overdue" bucket.
+DEADLINE_FIELDS = {
+    Task: 'deadline',
+    SubTask: 'parent_task__deadline',
+}
+
+
+def status_counts(queryset, overdue_filter=None):
+    """Count status buckets plus overdue for a Task or SubTask queryset.
+
+    Everything is computed with conditional aggregation so the whole set of
+    numbers costs one query instead of one ``.count()`` per bucket.
+    ``overdue_filter`` replaces the default "not completed" condition that is
+    combined with the past-deadline check (the dashboard uses progress).
+    """
+    deadline_field = DEADLINE_FIELDS[queryset.model]
+    # deadlines are aware datetimes: "before today" means before midnight in the site's time zone
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    if overdue_filter is None:
+        overdue_filter = ~Q(status='Completed')
+    overdue_q = Q(**{f'{deadline_field}__isnull': False, f'{deadline_field}__lt': today}) & overdue_filter
+
+    counts = queryset.order_by().aggregate(
+        total=Count('pk'),
+        completed=Count('pk', filter=Q(status='Completed')),
+        pending=Count('pk', filter=Q(status='Pending')),
+        in_progress=Count('pk', filter=Q(status='In Progress')),
+        overdue=Count('pk', filter=overdue_q),
+    )
+    # aggregate() returns None instead of 0 on some backends for empty sets
+    return {key: value or 0 for key, value in counts.items()}
+
+
+STAT_KEYS = ('total', 'completed', 'pending', 'in_progress', 'overdue')
+
+
+def stats_context(counts, noun):
+    """Map ``status_counts`` output onto the ``total_<noun>`` style template keys."""
+    return {f'{key}_{noun}': counts[key] for key in STAT_KEYS}
+
+
+def lazy_stats_context(get_counts, noun):
+    """``stats_context`` whose counts are only queried when a template first reads one.
+
+    A stats block served from the fragment cache then costs no aggregate query at all.
+    """
+    counts = SimpleLazyObject(get_counts)
+    return {f'{key}_{noun}': SimpleLazyObject(lambda key=key: counts[key]) for key in STAT_KEYS}
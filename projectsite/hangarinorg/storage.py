@@ -0,0 +1,69 @@
+import gzip
+import logging
+import os
+from urllib.parse import unquote, urlsplit
+
+import brotli
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+logger = logging.getLogger(__name__)
+
+# Text formats worth compressing; images and woff/woff2 fonts are compressed already
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.xml', '.html', '.ttf', '.eot', '.otf', '.ico')
+# Variants that do not save at least this share of the original are not kept
+MIN_SAVING = 0.05
+
+
+def compress(path):
+    """Write ``path.gz`` and ``path.br`` next to ``path``; returns the suffixes written."""
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    written = []
+    variants = [
+        ('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)),
+        ('.br', lambda raw: brotli.compress(raw, quality=11)),
+    ]
+    for suffix, encode in variants:
+        if os.path.exists(path + suffix):
+            continue  # fingerprinted names are content addressed, so an existing variant is current
+        packed = encode(data)
+        if len(packed) <= len(data) * (1 - MIN_SAVING):
+            with open(path + suffix, 'wb') as fh:
+                fh.write(packed)
+            written.append(suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprinted static files (``style.<hash>.css``) with precompressed variants.
+
+    ``collectstatic`` writes a ``.gz`` and a ``.br`` copy of every compressible fingerprinted
+    file, for ``StaticFilesMiddleware`` (or a front-end server) to send as they are.
+    """
+
+    # a name missing from the manifest is hashed on the fly (or left as is, see below)
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        # the vendor CSS points at source maps and images that were never shipped; keep
+        # those references as written instead of failing the whole collectstatic
+        if content is None and not self.exists(filename or urlsplit(unquote(name)).path.strip()):
+            logger.warning('Static file %s is referenced but missing; its URL is left unhashed', name)
+            return name
+        return super().hashed_name(name, content, filename)
+
+    def url(self, name, force=False):
+        # the site runs with DEBUG on, so the switch to collected files is HANGARIN_SERVE_STATIC
+        return super().url(name, force=force or getattr(settings, 'HANGARIN_SERVE_STATIC', False))
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        count = 0
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.lower().endswith(COMPRESSIBLE):
+                count += len(compress(self.path(hashed_name)))
+        logger.info('Wrote %d precompressed static files', count)
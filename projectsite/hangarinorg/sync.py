@@ -0,0 +1,137 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, Priority, Task, SubTask, Note, Tombstone
+
+
+# Source name used for Tombstone rows in the change timeline
+DELETED = 'deleted'
+
+# Models whose deletions are recorded as Tombstone rows. An SQLite trigger writes them
+# from inside each DELETE statement, so cascades and queryset deletes stay batched (and
+# notes keep Django's fast delete) instead of taking one INSERT per row from a signal.
+TRACKED = (Category, Priority, Task, SubTask, Note)
+
+# The current time in the format Django stores DateTimeFields in on SQLite (UTC, microseconds)
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'"
+
+
+def tombstone_trigger(model):
+    return f'{model._meta.db_table}_tombstone'
+
+
+def tombstone_statement(model):
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {tombstone_trigger(model)} AFTER DELETE ON {model._meta.db_table} "
+        f"BEGIN INSERT INTO {Tombstone._meta.db_table}(model_name, object_id, deleted_at) "
+        f"VALUES ('{model._meta.model_name}', old.id, {_NOW}); END"
+    )
+
+
+def install_tombstones(conn=connection):
+    """Create the tombstone triggers if missing (idempotent; no-op off SQLite).
+
+    Called after migrate too, since SQLite drops a table's triggers when a migration rebuilds it;
+    only repairs drift once migration 0010 (which creates the triggers) is applied.
+    """
+    if conn.vendor != 'sqlite':
+        return
+    if ('hangarinorg', '0010_tombstone_triggers') not in MigrationRecorder(conn).applied_migrations():
+        return
+    tables = set(conn.introspection.table_names())
+    if not all(model._meta.db_table in tables for model in (*TRACKED, Tombstone)):
+        return
+    with conn.cursor() as cursor:
+        for model in TRACKED:
+            cursor.execute(tombstone_statement(model))
+
+
+def settle():
+    """How long a row stamped now may wait before its transaction commits.
+
+    Rows stamped in the last moments may belong to transactions that commit after this
+    read, so a cursor that reached the end is held back this far and they are resent.
+    A write waits up to ``busy_timeout`` for the lock, once per attempt of
+    ``db.retry_on_lock``, plus the backoff between attempts.
+    """
+    # 5000 ms is the timeout Python's sqlite3 module waits by default
+    busy = getattr(settings, 'HANGARIN_SQLITE_PRAGMAS', {}).get('busy_timeout', 5000)
+    retries = getattr(settings, 'HANGARIN_DB_LOCK_RETRIES', 3)
+    backoff = getattr(settings, 'HANGARIN_DB_LOCK_BACKOFF_MS', 100) * 1.5 * (2 ** retries - 1)
+    return datetime.timedelta(milliseconds=busy * (retries + 1) + backoff)
+
+
+def encode_cursor(position):
+    when, source, pk = position
+    payload = json.dumps([when.isoformat(), source, pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """Return the ``(time, source, pk)`` position of a sync cursor or a plain ISO timestamp.
+
+    A timestamp means "everything stamped at or after it". Raises ``ValueError``.
+    """
+    when = parse_datetime(value)
+    if when is not None:
+        return (when if timezone.is_aware(when) else timezone.make_aware(when), '', 0)
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        stamp, source, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        when = parse_datetime(stamp)
+        position = (when, str(source), int(pk))
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise ValueError('since must be a cursor from a previous sync or an ISO 8601 timestamp.')
+    if when is None or timezone.is_naive(when):
+        raise ValueError('since must be a cursor from a previous sync or an ISO 8601 timestamp.')
+    return position
+
+
+def expired(position):
+    """Whether tombstones from after ``position`` may already have been pruned."""
+    days = getattr(settings, 'HANGARIN_SYNC_TOMBSTONE_DAYS', 30)
+    return position[0] < timezone.now() - datetime.timedelta(days=days)
+
+
+def _after(field, position, source):
+    """Rows of ``source`` that come after ``position`` in (time, source, pk) order."""
+    when, cursor_source, pk = position
+    if source > cursor_source:
+        return Q(**{f'{field}__gte': when})
+    if source == cursor_source:
+        return Q(**{f'{field}__gt': when}) | Q(**{field: when, 'pk__gt': pk})
+    return Q(**{f'{field}__gt': when})
+
+
+def changes_since(sources, position, limit):
+    """Return ``(changes, next position, has_more)`` for a ``{name: (queryset, time field)}`` map.
+
+    ``changes`` holds up to ``limit`` ``(name, obj)`` pairs in (time, name, pk) order. Each
+    source is read with one range scan of its time index capped at ``limit + 1`` rows,
+    so the cost follows the number of changes rather than the size of the tables.
+    """
+    now = timezone.now()
+    candidates = []
+    for name, (qs, field) in sources.items():
+        if position is not None:
+            qs = qs.filter(_after(field, position, name))
+        for obj in qs.order_by(field, 'pk')[:limit + 1]:
+            candidates.append(((getattr(obj, field), name, obj.pk), name, obj))
+    candidates.sort(key=lambda candidate: candidate[0])
+
+    has_more = len(candidates) > limit
+    page = candidates[:limit]
+    next_position = page[-1][0] if page else position
+    if not has_more:
+        settled = (now - settle(), '', 0)
+        next_position = min(next_position, settled) if next_position else settled
+    return [(name, obj) for _, name, obj in page], next_position, has_more
@@ -0,0 +1,82 @@
+from collections import Counter
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.utils import timezone
+
+from hangarinorg import routers
+from hangarinorg.lookups import get_version
+
+
+register = template.Library()
+
+# Hits and misses per fragment name since this process started
+stats = Counter()
+
+
+def data_version(request):
+    """The combined task/subtask/category/priority version, read once per request."""
+    if request is None:
+        return get_version('data')
+    if not hasattr(request, '_data_version'):
+        request._data_version = get_version('data')
+    return request._data_version
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = getattr(settings, 'HANGARIN_FRAGMENT_CACHE_TIMEOUT', 600)
+        if not timeout:
+            return self.nodelist.render(context)
+
+        request = context.get('request')
+        user = getattr(request, 'user', None)
+        # overdue counts and "due" badges move with the date even when no row changes
+        vary_on = [
+            getattr(user, 'pk', None), timezone.localdate().isoformat(),
+            *[var.resolve(context) for var in self.vary_on],
+        ]
+        # a replica may lag the data version, so what it renders is kept apart by snapshot
+        version = f'{data_version(request)}{routers.read_version()}'
+        key = make_template_fragment_key(f'hangarin:{self.fragment_name}:{version}', vary_on)
+        value = cache.get(key)
+        outcome = 'hit' if value is not None else 'miss'
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, timeout)
+        stats[self.fragment_name, outcome] += 1
+        if request is not None and hasattr(request, '_fragment_cache'):
+            request._fragment_cache[outcome] += 1
+        return value
+
+
+@register.tag('fragment_cache')
+def do_fragment_cache(parser, token):
+    """Cache a block per user, per ``vary_on`` values and per data version.
+
+    Usage::
+
+        {% load fragment_cache %}
+        {% fragment_cache 'dashboard_stats' filter_query %}
+            ...
+        {% endfragment_cache %}
+
+    Any save/delete of a task, subtask, category or priority moves the data version
+    (see ``lookups.bump_version``), so stale entries are never read again and simply
+    expire after ``HANGARIN_FRAGMENT_CACHE_TIMEOUT`` seconds (0 turns caching off).
+    Keep forms with a CSRF token outside the block: the token is tied to the session.
+    """
+    nodelist = parser.parse(('endfragment_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 2:
+        raise template.TemplateSyntaxError(f"'{tokens[0]}' tag requires a fragment name.")
+    fragment_name = tokens[1].strip('\'"')
+    return FragmentCacheNode(nodelist, fragment_name, [parser.compile_filter(t) for t in tokens[2:]])
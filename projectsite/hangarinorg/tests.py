@@ -1,3 +1,1646 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import warnings
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import brotli
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, OperationalError, connection, connections, transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from faker import Faker
+
+from . import deployment, lookups, routers, search, stats, sync, views
+from .bulk import update_tasks
+from .concurrency import gather_queries
+from .db import retry_on_lock
+from .importer import TaskImporter, read_rows
+from .management.commands.bench_async import routed
+from .management.commands.create_initial_data import _unique_names
+from .middleware import ReadReplicaMiddleware, RequestTimingMiddleware, StaticFilesMiddleware
+from .models import Category, Priority, Task, SubTask, Note, Tombstone, DeployJob
+from .pagination import KeysetPaginator
+from .storage import compress
+from .views import AsyncQueryResultsMixin
+
+
+def locmem(cls):
+    """Use an in-memory cache, emptied before every test.
+
+    The file cache in settings is shared with the dev server. Emptying matters because
+    TestCase never runs the on_commit version bumps, and rolled-back pks are reused, so
+    lookups or fragments cached by one test would otherwise be served to the next.
+    """
+    set_up = cls.setUp
+
+    def setUp(self):
+        cache.clear()
+        set_up(self)
+
+    cls.setUp = setUp
+    return override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})(cls)
+
+
+def make_task(title='Task', category=None, priority=None, **kwargs):
+    category = category or Category.objects.create(category_name='Work')
+    priority = priority or Priority.objects.create(priority_name='High', rank=1)
+    kwargs.setdefault('description', '')
+    kwargs.setdefault('deadline', timezone.now())
+    return Task.objects.create(title=title, category=category, priority=priority, **kwargs)
+
+
+@locmem
+@override_settings(TIME_ZONE='Asia/Manila')
+class StatusCountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(category_name='Work')
+        priority = Priority.objects.create(priority_name='High', rank=1)
+        midnight = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        deadlines = [
+            midnight - datetime.timedelta(days=2),
+            midnight - datetime.timedelta(minutes=1),
+            # earlier today in Manila, which is still yesterday in UTC: not overdue yet
+            midnight + datetime.timedelta(minutes=1),
+            midnight + datetime.timedelta(days=1),
+        ]
+        for n, deadline in enumerate(deadlines * 3):
+            status = ('Pending', 'In Progress', 'Completed')[n // len(deadlines)]
+            task = make_task(f'Task {n}', category, priority, deadline=deadline, status=status)
+            SubTask.objects.create(parent_task=task, title=f'Step {n}', status=status)
+        cls.midnight = midnight
+
+    def per_status(self, qs, deadline_field):
+        """The numbers the views used to get from one count() per bucket."""
+        return {
+            'total': qs.count(),
+            'completed': qs.filter(status='Completed').count(),
+            'pending': qs.filter(status='Pending').count(),
+            'in_progress': qs.filter(status='In Progress').count(),
+            'overdue': qs.exclude(**{f'{deadline_field}__isnull': True})
+                         .filter(**{f'{deadline_field}__lt': self.midnight})
+                         .exclude(status='Completed').count(),
+        }
+
+    def test_matches_the_per_status_queries(self):
+        for qs, field in ((Task.objects.all(), 'deadline'), (SubTask.objects.all(), 'parent_task__deadline')):
+            with self.subTest(model=qs.model.__name__), self.assertNumQueries(1):
+                counts = stats.status_counts(qs)
+            self.assertEqual(counts, self.per_status(qs, field))
+        self.assertEqual(stats.status_counts(Task.objects.all())['overdue'], 4)
+
+    def test_overdue_filter_replaces_the_status_condition(self):
+        counts = stats.status_counts(Task.objects.all(), overdue_filter=~Q(progress=100))
+        self.assertEqual(counts['overdue'], 4)
+
+    def test_no_naive_datetime_warning(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            stats.status_counts(Task.objects.all())
+
+    def test_empty_queryset(self):
+        self.assertEqual(stats.status_counts(Task.objects.none()), dict.fromkeys(stats.STAT_KEYS, 0))
+
+
+@locmem
+class SubTaskProgressTests(TestCase):
+    def setUp(self):
+        self.task = make_task()
+        self.subtasks = SubTask.objects.bulk_create(
+            [SubTask(parent_task=self.task, title=f'Step {n}') for n in range(4)]
+        )
+
+    def assertProgress(self, task, total, completed, progress):
+        task.refresh_from_db()
+        self.assertEqual((task.subtask_total, task.subtask_completed, task.progress), (total, completed, progress))
+
+    def test_bulk_create(self):
+        self.assertProgress(self.task, 4, 0, 0)
+
+    def test_save_and_delete(self):
+        subtask = SubTask.objects.get(pk=self.subtasks[0].pk)
+        subtask.status = 'Completed'
+        subtask.save()
+        self.assertProgress(self.task, 4, 1, 25)
+        subtask.delete()
+        self.assertProgress(self.task, 3, 0, 0)
+
+    def test_update(self):
+        SubTask.objects.filter(pk__in=[s.pk for s in self.subtasks[:3]]).update(status='Completed')
+        self.assertProgress(self.task, 4, 3, 75)
+
+    def test_update_moving_to_another_task_refreshes_both(self):
+        other = make_task('Other', self.task.category, self.task.priority)
+        SubTask.objects.filter(pk=self.subtasks[0].pk).update(parent_task=other)
+        self.assertProgress(self.task, 3, 0, 0)
+        self.assertProgress(other, 1, 0, 0)
+
+    def test_delete(self):
+        SubTask.objects.filter(pk=self.subtasks[0].pk).update(status='Completed')
+        SubTask.objects.filter(pk__in=[s.pk for s in self.subtasks[1:3]]).delete()
+        self.assertProgress(self.task, 2, 1, 50)
+
+    def test_task_status_sets_progress_without_subtasks(self):
+        SubTask.objects.all().delete()
+        Task.objects.filter(pk=self.task.pk).set_status('In Progress')
+        self.assertProgress(self.task, 0, 0, 50)
+
+    def test_rebuild_fixes_stale_counters(self):
+        Task.objects.filter(pk=self.task.pk).update(subtask_total=9, progress=90)
+        call_command('rebuild_task_progress', stdout=StringIO())
+        self.assertProgress(self.task, 4, 0, 0)
+
+
+@locmem
+class ProgressOrderingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+        task = make_task('Half')
+        SubTask.objects.bulk_create([
+            SubTask(parent_task=task, title='Done', status='Completed'),
+            SubTask(parent_task=task, title='Open'),
+        ])
+        make_task('Done', task.category, task.priority, status='Completed')
+        make_task('Open', task.category, task.priority)
+
+    def test_progress_column_is_indexed(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Task._meta.db_table)
+        self.assertTrue(any(c['index'] and c['columns'] == ['progress'] for c in constraints.values()))
+
+    def test_dashboard_sorts_on_the_stored_column(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/dashboard/', {'order': '-progress', 'lazy': '0'})
+        rows = [row['task'].title for row in response.context['task_rows']]
+        self.assertEqual(rows, ['Done', 'Half', 'Open'])
+        # no join or aggregate over subtasks to get there
+        self.assertFalse([q for q in queries.captured_queries if 'hangarinorg_subtask' in q['sql']])
+
+
+@locmem
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(category_name='Work')
+        priority = Priority.objects.create(priority_name='High', rank=1)
+        deadline = timezone.now()
+        # three deadlines shared by several tasks each, so pages split runs of equal keys
+        for n in range(7):
+            make_task(f'Task {n}', category, priority, deadline=deadline + datetime.timedelta(days=n % 3))
+        cls.expected = list(Task.objects.order_by('deadline', 'pk').values_list('pk', flat=True))
+        cls.user = User.objects.create_user('tester', password='secret')
+
+    def paginator(self):
+        return KeysetPaginator(Task.objects.order_by('deadline'), per_page=3)
+
+    def test_pk_tiebreaker_follows_the_last_sort_direction(self):
+        self.assertEqual(self.paginator().ordering, ['deadline', 'pk'])
+        self.assertEqual(KeysetPaginator(Task.objects.order_by('-deadline'), 3).ordering, ['-deadline', '-pk'])
+
+    def test_next_cursors_walk_every_row_once(self):
+        paginator = self.paginator()
+        page = paginator.page()
+        self.assertFalse(page.has_previous)
+        seen = [task.pk for task in page]
+        while page.has_next:
+            page = paginator.page(page.next_cursor)
+            self.assertTrue(page.has_previous)
+            seen += [task.pk for task in page]
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual([task.pk for task in back], [task.pk for task in first])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_bad_or_foreign_cursor_starts_over(self):
+        paginator = self.paginator()
+        first = [task.pk for task in paginator.page()]
+        self.assertEqual([task.pk for task in paginator.page('not-a-cursor')], first)
+        other = KeysetPaginator(Task.objects.order_by('title'), 3)
+        cursor = other.page().next_cursor
+        self.assertEqual([task.pk for task in paginator.page(cursor)], first)
+
+    def test_next_url_keeps_the_other_parameters(self):
+        params = RequestFactory().get('/', {'status': 'Pending', 'cursor': 'old'}).GET
+        page = self.paginator().page(params=params)
+        self.assertIn('status=Pending', page.next_url)
+        self.assertIn(f'cursor={page.next_cursor}', page.next_url)
+
+    @override_settings(HANGARIN_PAGE_SIZE=3)
+    def test_dashboard_pages_follow_next_url(self):
+        self.client.force_login(self.user)
+        url, seen = '/dashboard/?order=deadline&lazy=0', []
+        while url:
+            page = self.client.get(url).context['page_obj']
+            seen += [task.pk for task in page]
+            url = '/dashboard/' + page.next_url if page.has_next else None
+        self.assertEqual(seen, self.expected)
+
+
+@locmem
+@override_settings(HANGARIN_CATEGORY_GROUP_SIZE=2)
+class CategoryTaskGroupsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+        priority = Priority.objects.create(priority_name='High', rank=1)
+        cls.categories = [Category.objects.create(category_name=name) for name in ('Home', 'Work', 'Empty')]
+        now = timezone.now()
+        for category in cls.categories[:2]:
+            for n in range(4):
+                make_task(f'{category} {n}', category, priority, deadline=now + datetime.timedelta(days=n))
+
+    def groups(self, **params):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/dashboard/sections/groups/', params)
+        self.assertEqual(response.status_code, 200)
+        groups = {g['category'].category_name: [t.title for t in g['tasks']]
+                  for g in response.context['category_task_groups']}
+        return groups, queries, response
+
+    def test_first_tasks_of_each_category_in_the_active_order(self):
+        groups, _, response = self.groups(order='-deadline')
+        self.assertEqual(groups, {'Home': ['Home 3', 'Home 2'], 'Work': ['Work 3', 'Work 2'], 'Empty': []})
+        self.assertContains(response, 'Home 3')
+        self.assertNotContains(response, 'Home 1')
+        groups, _, _ = self.groups(order='deadline')
+        self.assertEqual(groups['Work'], ['Work 0', 'Work 1'])
+
+    def task_queries(self):
+        _, queries, _ = self.groups()
+        return [q['sql'] for q in queries.captured_queries if 'hangarinorg_task' in q['sql']]
+
+    def test_one_ranked_query_for_any_number_of_categories(self):
+        sql = self.task_queries()
+        self.assertEqual(len(sql), 1)
+        self.assertIn('ROW_NUMBER()', sql[0])
+        # the version bumps run on commit, which TestCase otherwise never reaches
+        with self.captureOnCommitCallbacks(execute=True):
+            extra = Category.objects.create(category_name='Extra')
+            make_task('Extra 0', extra, Priority.objects.first())
+        self.assertEqual(len(self.task_queries()), 1)
+
+    def test_filters_apply(self):
+        groups, _, _ = self.groups(category=self.categories[0].pk)
+        self.assertEqual(groups['Work'], [])
+        self.assertEqual(len(groups['Home']), 2)
+
+    def test_rendered_inline_without_javascript(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/dashboard/', {'lazy': '0', 'order': 'deadline'})
+        self.assertContains(response, 'Home 0')
+        self.assertContains(response, 'dashboardGroups')
+
+
+@locmem
+class LookupVersionTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(category_name='Work')
+        self.priority = Priority.objects.create(priority_name='High', rank=1)
+
+    def versions(self):
+        return {name: lookups.get_version(name) for name in ('category', 'priority', 'data')}
+
+    def test_edit_bumps_on_commit(self):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.category_name = 'Office'
+            self.category.save()
+            # nothing moves until the transaction commits
+            self.assertEqual(self.versions(), before)
+        after = self.versions()
+        self.assertNotEqual(after['category'], before['category'])
+        self.assertNotEqual(after['data'], before['data'])
+        self.assertEqual(after['priority'], before['priority'])
+
+    def test_rollback_leaves_the_version(self):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.priority.priority_name = 'Urgent'
+                self.priority.save()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.versions(), before)
+
+    def test_lookup_is_rebuilt_after_a_change(self):
+        self.assertEqual([c.category_name for c in lookups.categories()], ['Work'])
+        with self.assertNumQueries(0):
+            lookups.categories()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(category_name='Home')
+        self.assertEqual(sorted(c.category_name for c in lookups.categories()), ['Home', 'Work'])
+
+    def test_stale_lookup_until_commit(self):
+        lookups.priorities()
+        with self.captureOnCommitCallbacks(execute=False):
+            Priority.objects.create(priority_name='Low', rank=9)
+            self.assertEqual([p.priority_name for p in lookups.priorities()], ['High'])
+
+
+@locmem
+class SearchFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.report = make_task('Quarterly report', description='Numbers for the board')
+        cls.garden = make_task('Water the garden', cls.report.category, cls.report.priority)
+        Note.objects.create(task=cls.garden, content='Use the rain barrel')
+
+    def search(self, model, text, lookup='pk', queryset=None):
+        queryset = queryset if queryset is not None else model.objects.all()
+        return set(queryset.filter(search.search_filter(model, text, lookup)))
+
+    def test_index_is_used(self):
+        self.assertTrue(search.is_available())
+        self.assertIn('MATCH', str(Task.objects.filter(search.search_filter(Task, 'report')).query))
+
+    def test_words_match_as_prefixes_across_columns(self):
+        self.assertEqual(self.search(Task, 'quart'), {self.report})
+        self.assertEqual(self.search(Task, 'board numb'), {self.report})
+        self.assertEqual(self.search(Task, 'quarterly garden'), set())
+
+    def test_updates_and_deletes_reach_the_index(self):
+        Task.objects.filter(pk=self.report.pk).update(title='Annual report')
+        self.assertEqual(self.search(Task, 'quarterly'), set())
+        self.assertEqual(self.search(Task, 'annual'), {self.report})
+        self.garden.delete()
+        self.assertEqual(self.search(Note, 'barrel'), set())
+
+    def test_related_lookup(self):
+        notes = self.search(Task, 'water', lookup='task', queryset=Note.objects.all())
+        self.assertEqual({note.content for note in notes}, {'Use the rain barrel'})
+
+    def test_punctuation_only_matches_nothing(self):
+        self.assertEqual(self.search(Task, '"*-'), set())
+
+    def test_ensure_restores_dropped_triggers(self):
+        # what SQLite does to a table's triggers when a migration rebuilds the table
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER hangarinorg_task_fts_ai')
+        search.ensure(connection)
+        task = make_task('Renew passport', self.report.category, self.report.priority)
+        self.assertEqual(self.search(Task, 'passport'), {task})
+
+
+@locmem
+class CreateInitialDataTests(TestCase):
+    def seed(self, **options):
+        call_command('create_initial_data', batch_size=4, seed=7, stdout=StringIO(), **options)
+
+    def test_creates_the_requested_rows_in_batches(self):
+        self.seed(tasks=10, subtasks=9, notes=5, categories=3)
+        self.assertEqual(Category.objects.count(), 5 + 3)
+        self.assertEqual(Priority.objects.count(), 5)
+        self.assertEqual(Task.objects.count(), 10)
+        self.assertEqual(SubTask.objects.count(), 9)
+        self.assertEqual(Note.objects.count(), 5)
+
+    def test_default_priorities_are_ranked(self):
+        self.seed(tasks=0, subtasks=0, notes=0)
+        self.assertEqual(
+            list(Priority.objects.order_by('rank').values_list('priority_name', flat=True)),
+            ['Critical', 'High', 'Medium', 'Low', 'Optional'],
+        )
+
+    def test_same_seed_gives_the_same_text(self):
+        self.seed(tasks=6, subtasks=0, notes=0)
+        first = list(Task.objects.order_by('pk').values_list('title', 'status', 'category__category_name'))
+        Task.objects.all().delete()
+        call_command('create_initial_data', tasks=6, subtasks=0, notes=0, batch_size=4, seed=7,
+                     workers=1, stdout=StringIO())
+        second = list(Task.objects.order_by('pk').values_list('title', 'status', 'category__category_name'))
+        self.assertEqual(first, second)
+
+    def test_stored_progress_matches_the_subtasks(self):
+        self.seed(tasks=4, subtasks=12, notes=0)
+        out = StringIO()
+        call_command('rebuild_task_progress', stdout=out)
+        self.assertIn('0 tasks were out of date', out.getvalue())
+
+    def test_names_stay_unique_past_the_faker_word_list(self):
+        fake = Faker()
+        fake.seed_instance(1)
+        names = _unique_names(fake, 1500)
+        self.assertEqual(len(set(names)), 1500)
+
+    def test_subtasks_without_tasks_is_an_error(self):
+        with self.assertRaises(CommandError):
+            self.seed(tasks=0, subtasks=1, notes=0)
+
+
+@locmem
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('timing', password='x')
+        self.client.force_login(self.user)
+
+    def timing(self, response):
+        # the frag description itself contains ", "
+        return dict(part.split(';', 1) for part in re.split(r', (?=\w+;)', response['Server-Timing']))
+
+    def test_header_counts_the_request_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/dashboard/?lazy=0')
+        timing = self.timing(response)
+        self.assertEqual(set(timing), {'db', 'tpl', 'view', 'total', 'frag'})
+        self.assertIn(f'desc="{len(queries.captured_queries)} queries"', timing['db'])
+        self.assertGreater(len(queries.captured_queries), 3)
+
+    def test_fragment_cache_hits_are_reported(self):
+        self.client.get('/dashboard/?lazy=0')
+        self.assertIn('0 miss', self.timing(self.client.get('/dashboard/?lazy=0'))['frag'])
+
+    def test_worker_thread_queries_are_counted(self):
+        def view(request):
+            async_to_sync(gather_queries)({'a': Priority.objects.count, 'b': Priority.objects.count})
+            return HttpResponse()
+
+        response = RequestTimingMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('desc="2 queries"', self.timing(response)['db'])
+
+    @override_settings(HANGARIN_DUPLICATE_QUERY_THRESHOLD=3)
+    def test_repeated_statements_are_logged(self):
+        def view(request):
+            for pk in range(3):
+                list(Task.objects.filter(pk=pk))
+            return HttpResponse()
+
+        with self.assertLogs('hangarinorg.middleware', 'WARNING') as logs:
+            RequestTimingMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('Query repeated 3 times', logs.output[0])
+
+    @override_settings(HANGARIN_REQUEST_TIMING=False)
+    def test_can_be_turned_off(self):
+        response = RequestTimingMiddleware(lambda request: HttpResponse())(RequestFactory().get('/'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+@locmem
+class PriorityRankTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('rank', password='x')
+        cls.category = Category.objects.create(category_name='Work')
+        # names that sort the other way alphabetically, and a custom one in between
+        cls.low = Priority.objects.create(priority_name='Low', rank=4)
+        cls.urgent = Priority.objects.create(priority_name='Urgent', rank=1)
+        cls.soon = Priority.objects.create(priority_name='Before Friday', rank=2)
+        for priority in (cls.low, cls.urgent, cls.soon):
+            task = make_task(f'{priority} task', cls.category, priority)
+            SubTask.objects.create(parent_task=task, title=f'{priority} step')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_default_ordering_is_by_rank(self):
+        self.assertEqual(list(Priority.objects.all()), [self.urgent, self.soon, self.low])
+
+    def test_category_tasks_sort_on_rank(self):
+        url = f'/task/category/{self.category.pk}/?sort=priority'
+        titles = [task.title for task in self.client.get(url).context['tasks']]
+        self.assertEqual(titles, ['Urgent task', 'Before Friday task', 'Low task'])
+        titles = [task.title for task in self.client.get(url + '&dir=desc').context['tasks']]
+        self.assertEqual(titles, ['Low task', 'Before Friday task', 'Urgent task'])
+
+    def test_subtasks_sort_on_the_parent_rank(self):
+        titles = [subtask.title for subtask in self.client.get('/subtask/?sort=priority').context['subtasks']]
+        self.assertEqual(titles, ['Urgent step', 'Before Friday step', 'Low step'])
+
+    def test_sort_is_a_join_not_a_name_match(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/task/category/{self.category.pk}/?sort=priority')
+        task_sql = [
+            q['sql'] for q in queries.captured_queries
+            if 'ORDER BY' in q['sql'] and '"hangarinorg_task"."title"' in q['sql']
+        ]
+        self.assertTrue(task_sql)
+        self.assertIn('"hangarinorg_priority"."rank"', task_sql[0])
+        self.assertNotIn('CASE', task_sql[0])
+
+    def test_migration_backfills_the_old_names(self):
+        backfill = import_module('hangarinorg.migrations.0005_priority_rank').backfill_rank
+        medium = Priority.objects.create(priority_name=' medium ')
+        other = Priority.objects.create(priority_name='Someday')
+        backfill(django_apps, None)
+        medium.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((medium.rank, other.rank), (3, 999))
+
+
+@locmem
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('api', password='x')
+        cls.task = make_task('Write the report', description='Quarterly numbers')
+        cls.category, cls.priority = cls.task.category, cls.task.priority
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_tasks(self, count):
+        for n in range(count):
+            task = make_task(f'Task {n}', self.category, self.priority)
+            SubTask.objects.create(parent_task=task, title=f'Step {n}')
+            Note.objects.create(task=task, content=f'Note {n}')
+
+    def send(self, method, url, data):
+        body = data if isinstance(data, str) else json.dumps(data)
+        return getattr(self.client, method)(url, body, content_type='application/json')
+
+    def task_sql(self, queries):
+        return next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT "hangarinorg_task"'))
+
+    def test_fields_narrow_the_output_and_the_select(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/?fields=id,title')
+        self.assertEqual(response.json()['results'], [{'id': self.task.pk, 'title': 'Write the report'}])
+        sql = self.task_sql(queries)
+        self.assertIn('"title"', sql)
+        self.assertNotIn('"description"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/tasks/?fields=title,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['error'])
+        self.assertIn('title', response.json()['allowed'])
+
+    def test_includes_do_not_add_queries_per_row(self):
+        url = '/api/tasks/?include=category,priority,subtasks,notes'
+        self.add_tasks(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        self.add_tasks(6)
+        with CaptureQueriesContext(connection) as many:
+            results = self.client.get(url).json()['results']
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        self.assertEqual(len(results), 9)
+        row = next(r for r in results if r['title'] == 'Task 0')
+        self.assertEqual(row['category']['category_name'], 'Work')
+        self.assertEqual([s['title'] for s in row['subtasks']], ['Step 0'])
+        self.assertEqual([n['content'] for n in row['notes']], ['Note 0'])
+
+    def test_cursor_walks_every_row_once(self):
+        self.add_tasks(6)
+        seen, url = [], '/api/tasks/?sort=priority&limit=2'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 2)
+            seen += [row['id'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(sorted(seen), sorted(Task.objects.values_list('pk', flat=True)))
+
+    def test_bad_limit(self):
+        self.assertEqual(self.client.get('/api/tasks/?limit=lots').status_code, 400)
+
+    def test_gzip_is_negotiated(self):
+        self.add_tasks(6)
+        plain = self.client.get('/api/tasks/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        packed = self.client.get('/api/tasks/', headers={'accept-encoding': 'gzip'})
+        self.assertEqual(packed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', packed['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(packed.content)), plain.json())
+
+    def test_patch_keeps_unsent_fields(self):
+        response = self.send('patch', f'/api/tasks/{self.task.pk}/', {'status': 'Completed'})
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.status, self.task.title), ('Completed', 'Write the report'))
+
+    def test_patch_and_put_are_validated(self):
+        url = f'/api/tasks/{self.task.pk}/'
+        response = self.send('patch', url, {'status': 'Someday'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json()['errors'])
+        # PUT replaces the whole object, so missing required fields are errors
+        response = self.send('put', url, {'title': 'Only a title'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('category', response.json()['errors'])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Write the report')
+
+    def test_malformed_bodies(self):
+        url = f'/api/tasks/{self.task.pk}/'
+        self.assertEqual(self.send('patch', url, '{not json').json()['error'], 'Request body is not valid JSON.')
+        self.assertEqual(self.send('put', url, '[1, 2]').json()['error'], 'Request body must be a JSON object.')
+
+    def test_delete(self):
+        url = f'/api/tasks/{self.task.pk}/'
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_signed_out_requests_get_401(self):
+        self.client.logout()
+        url = f'/api/tasks/{self.task.pk}/'
+        for response in (
+            self.client.get('/api/tasks/'),
+            self.send('patch', url, {'status': 'Completed'}),
+            self.send('put', url, {}),
+            self.client.delete(url),
+        ):
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json(), {'error': 'Authentication required.'})
+        self.assertTrue(Task.objects.filter(pk=self.task.pk, status='Pending').exists())
+
+
+@locmem
+@override_settings(HANGARIN_EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('export', password='x')
+        cls.first = make_task('Alpha, "quoted"')
+        cls.category, cls.priority = cls.first.category, cls.first.priority
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_tasks(self, count, status='Pending'):
+        for n in range(count):
+            make_task(f'Task {n}', self.category, self.priority, status=status)
+
+    def export(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            content = b''.join(response.streaming_content).decode()
+        # the rows are read while the content is iterated, after the view has returned
+        return response, content, sum('"hangarinorg_task"' in q['sql'] for q in queries.captured_queries)
+
+    def test_csv_has_the_header_and_every_filtered_row(self):
+        self.add_tasks(5)
+        self.add_tasks(2, status='Completed')
+        response, content, _ = self.export('/export/tasks/?status=Pending')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="tasks-', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0][:3], ['id', 'title', 'description'])
+        self.assertEqual(
+            [row[1] for row in rows[1:]],
+            ['Alpha, "quoted"'] + [f'Task {n}' for n in range(5)],
+        )
+        self.assertEqual({row[5] for row in rows[1:]}, {'Work'})
+
+    def test_ndjson(self):
+        self.add_tasks(3)
+        response, content, _ = self.export('/export/tasks/?format=ndjson&sort=title&dir=desc')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Task 2', 'Task 1', 'Task 0', 'Alpha, "quoted"'])
+        self.assertEqual(rows[0]['priority'], 'High')
+
+    def test_query_count_does_not_grow_with_rows(self):
+        _, content, few = self.export('/export/tasks/')
+        self.assertEqual(len(content.splitlines()), 2)
+        self.add_tasks(9)
+        _, content, many = self.export('/export/tasks/')
+        self.assertEqual(len(content.splitlines()), 11)
+        self.assertEqual((few, many), (1, 1))
+
+    def test_subtasks_and_notes(self):
+        SubTask.objects.create(parent_task=self.first, title='Step')
+        Note.objects.create(task=self.first, content='Remember')
+        _, content, _ = self.export('/export/subtasks/')
+        self.assertIn('Step', content)
+        _, content, _ = self.export(f'/export/notes/?task={self.first.pk}')
+        self.assertIn('Remember', content)
+
+    def test_unknown_kind_or_format(self):
+        self.assertEqual(self.client.get('/export/users/').status_code, 404)
+        self.assertEqual(self.client.get('/export/tasks/?format=xml').status_code, 400)
+
+
+@locmem
+class TaskImporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(category_name='Work')
+        cls.priority = Priority.objects.create(priority_name='High', rank=1)
+
+    def rows(self, *tasks):
+        return read_rows(StringIO('\n'.join(json.dumps(task) for task in tasks)), 'json')
+
+    def task(self, title, category='Work', priority='High', **extra):
+        return {
+            'title': title, 'description': 'Imported', 'deadline': '2026-11-02 09:00',
+            'category': category, 'priority': priority, **extra,
+        }
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        report = TaskImporter().run(read_rows(StringIO(
+            'title,description,category,priority,status,deadline,subtasks\n'
+            'Good,d,work,HIGH,,2026-11-02 09:00,One|Two\n'
+            ',d,Work,High,,2026-11-02 09:00,\n'
+            'Bad status,d,Work,High,Someday,2026-11-02 09:00,\n'
+            'Bad deadline,d,Work,High,,2200-01-01 09:00,\n'
+            'Bad subtask,d,Work,High,,2026-11-02 09:00,"[{""status"": ""Pending""}]"\n'
+            'Unknown,d,Home,High,,2026-11-02 09:00,\n'
+        ), 'csv'))
+        self.assertEqual((report.tasks, report.subtasks, report.rejected), (1, 2, 5))
+        self.assertEqual([number for number, _ in report.errors], [3, 4, 5, 6, 7])
+        self.assertIn('category: Unknown category "Home".', report.errors[-1][1])
+        task = Task.objects.get()
+        self.assertEqual((task.title, task.category, task.priority), ('Good', self.category, self.priority))
+        self.assertEqual(task.subtask_total, 2)
+
+    def test_invalid_json_lines(self):
+        report = TaskImporter().run(read_rows(StringIO('{"title": "x"\n[]\n'), 'json'))
+        self.assertEqual(report.rejected, 2)
+        self.assertIn('Invalid JSON', report.errors[0][1][0])
+        self.assertEqual(report.errors[1][1], ['Each task must be an object.'])
+
+    def test_max_errors_caps_the_kept_errors_only(self):
+        report = TaskImporter(max_errors=2).run(self.rows(
+            *[self.task('', 'Nowhere') for _ in range(5)], self.task('Kept'),
+        ))
+        self.assertEqual((report.tasks, report.rejected, len(report.errors)), (1, 5, 2))
+
+    def test_create_missing_only_creates_names_of_imported_rows(self):
+        report = TaskImporter(create_missing=True).run(self.rows(
+            self.task('One', 'Home', 'Someday'),
+            self.task('Two', 'home', 'Someday'),
+            self.task('', 'Garden'),  # rejected, so Garden is never created
+            self.task('Three', '42'),  # a pk that does not exist is not a name
+        ))
+        self.assertEqual((report.tasks, report.rejected), (2, 2))
+        self.assertEqual(
+            sorted(Category.objects.values_list('category_name', flat=True)), ['Home', 'Work'],
+        )
+        home = Category.objects.get(category_name='Home')
+        self.assertEqual(set(Task.objects.values_list('category', flat=True)), {home.pk})
+        self.assertTrue(Priority.objects.filter(priority_name='Someday').exists())
+
+    def test_without_create_missing_unknown_names_are_rejected(self):
+        report = TaskImporter().run(self.rows(self.task('One', 'Home')))
+        self.assertEqual((report.tasks, report.rejected), (0, 1))
+        self.assertFalse(Category.objects.filter(category_name='Home').exists())
+
+    def test_failed_batch_creates_nothing(self):
+        with mock.patch.object(Note.objects, 'bulk_create', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                TaskImporter(create_missing=True).run(self.rows(self.task('One', 'Home', notes=['n'])))
+        self.assertFalse(Category.objects.filter(category_name='Home').exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_batches(self):
+        flushed = []
+        importer = TaskImporter(batch_size=2, create_missing=True, progress=lambda r: flushed.append(r.tasks))
+        with CaptureQueriesContext(connection) as queries:
+            report = importer.run(self.rows(*[self.task(f'Task {n}', 'Home') for n in range(5)]))
+        self.assertEqual(flushed, [2, 4, 5])
+        self.assertEqual(report.tasks, 5)
+        # one category insert for the first batch; later batches reuse its pk
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "hangarinorg_category"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Task.objects.filter(category__category_name='Home').count(), 5)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write('title,description,deadline,category,priority\n'
+                     'One,d,2026-11-02 09:00,Work,High\n,d,2026-11-02 09:00,Work,High\n')
+        self.addCleanup(os.remove, fh.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_tasks', fh.name, stdout=out, stderr=err)
+        self.assertIn('Imported 1 tasks', out.getvalue())
+        self.assertIn('row 3: title: This field is required.', err.getvalue())
+
+
+@locmem
+class BulkActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bulk', password='x')
+        cls.work = Category.objects.create(category_name='Work')
+        cls.home = Category.objects.create(category_name='Home')
+        cls.priority = Priority.objects.create(priority_name='High', rank=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_tasks(self, count, category, subtasks=2):
+        tasks = [make_task(f'{category} {n}', category, self.priority) for n in range(count)]
+        SubTask.objects.bulk_create([
+            SubTask(parent_task=task, title=f'Step {n}') for task in tasks for n in range(subtasks)
+        ])
+        return tasks
+
+    def post(self, url, data, query=''):
+        with self.captureOnCommitCallbacks() as callbacks, CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'{url}{query}', data, headers={'x-requested-with': 'XMLHttpRequest'})
+        return response.json(), len(queries.captured_queries), len(callbacks)
+
+    def test_selected_rows_only(self):
+        tasks = self.add_tasks(4, self.work)
+        result, _, _ = self.post('/task/bulk/', {
+            'action': 'status', 'status': 'Completed', 'selected': [tasks[0].pk, tasks[2].pk],
+        })
+        self.assertEqual(result, {'ok': True, 'message': 'Updated 2 tasks.', 'rows': 2})
+        self.assertEqual(
+            set(Task.objects.filter(status='Completed').values_list('pk', flat=True)), {tasks[0].pk, tasks[2].pk},
+        )
+
+    def test_all_rows_matching_the_list_filters(self):
+        self.add_tasks(3, self.work)
+        self.add_tasks(2, self.home)
+        result, _, _ = self.post(
+            '/task/bulk/', {'action': 'priority', 'priority': self.priority.pk, 'scope': 'all'},
+            query=f'?category={self.home.pk}',
+        )
+        self.assertEqual(result['rows'], 2)
+        result, _, _ = self.post('/task/bulk/', {'action': 'delete', 'scope': 'all'}, query=f'?category={self.home.pk}')
+        self.assertEqual(result['message'], 'Deleted 2 tasks.')
+        self.assertEqual(set(Task.objects.values_list('category', flat=True)), {self.work.pk})
+        self.assertEqual(SubTask.objects.count(), 6)
+
+    def test_queries_and_cache_bumps_do_not_grow_with_rows(self):
+        self.add_tasks(2, self.work)
+        self.add_tasks(8, self.home)
+        for action in ({'action': 'status', 'status': 'Completed'}, {'action': 'delete'}):
+            few = self.post('/task/bulk/', {**action, 'scope': 'all'}, query=f'?category={self.work.pk}')
+            many = self.post('/task/bulk/', {**action, 'scope': 'all'}, query=f'?category={self.home.pk}')
+            self.assertEqual((few[0]['rows'], many[0]['rows']), (2, 8))
+            self.assertEqual(many[1:], few[1:])
+        # the delete cascaded to 16 subtasks, yet queued one bump for each model
+        self.assertEqual(many[2], 2)
+
+    def test_subtask_delete_refreshes_progress(self):
+        task, = self.add_tasks(1, self.work, subtasks=4)
+        done = list(task.subtasks.order_by('pk')[:2])
+        SubTask.objects.filter(pk__in=[s.pk for s in done]).update(status='Completed')
+        selected = [s.pk for s in task.subtasks.exclude(status='Completed')]
+        result, _, bumps = self.post('/subtask/bulk/', {'action': 'delete', 'selected': selected})
+        self.assertEqual((result['rows'], bumps), (2, 1))
+        task.refresh_from_db()
+        self.assertEqual((task.subtask_total, task.progress), (2, 100))
+
+    def test_invalid_form(self):
+        response = self.client.post('/task/bulk/', {'action': 'status'}, headers={'x-requested-with': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['ok'], False)
+
+
+@locmem
+class BumpOnceTests(TestCase):
+    def test_collects_names_and_bumps_each_once(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with lookups.bump_once():
+                for name in ('task', 'subtask', 'task', 'task'):
+                    lookups.bump_version(name)
+                self.assertEqual(callbacks, [])
+        self.assertEqual(len(callbacks), 2)
+
+
+@locmem
+class AsyncViewTests(TransactionTestCase):
+    # the worker threads read through their own connections, so the rows must be committed
+
+    def setUp(self):
+        self.user = User.objects.create_user('async', password='x')
+        self.task = make_task('Report', status='Completed')
+        self.category = self.task.category
+        for n in range(4):
+            make_task(f'Task {n}', self.category, self.task.priority)
+
+    def get(self, url, async_views):
+        """Fetch ``url`` with the views routed as ASGI would; return the response and its query count."""
+        with routed(async_views):
+            if async_views:
+                client = AsyncClient()
+                async_to_sync(client.aforce_login)(self.user)
+                response = async_to_sync(client.get)(url)
+                self.assertTrue(issubclass(response.resolver_match.func.view_class, AsyncQueryResultsMixin))
+            else:
+                self.client.force_login(self.user)
+                response = self.client.get(url)
+        queries = re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1)
+        return response, int(queries)
+
+    def page(self, response):
+        return re.sub(rb'name="csrfmiddlewaretoken" value="\w+"', b'', response.content)
+
+    def test_async_views_render_like_the_sync_ones(self):
+        for url in (
+            f'/task/category/{self.category.pk}/?sort=title',
+            '/dashboard/sections/stats/',
+            '/dashboard/sections/tasks/?order=title',
+            '/dashboard/?lazy=0',
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                sync_response, sync_queries = self.get(url, False)
+                cache.clear()
+                async_response, async_queries = self.get(url, True)
+                self.assertEqual(async_response.status_code, 200)
+                self.assertEqual(self.page(async_response), self.page(sync_response))
+                # the same statements, some of them run concurrently on worker threads
+                self.assertEqual(async_queries, sync_queries)
+
+    def test_signed_out(self):
+        with routed(True):
+            response = async_to_sync(AsyncClient().get)('/dashboard/sections/stats/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_gather_queries_runs_each_query_on_its_own_thread(self):
+        def count(status):
+            return lambda: (threading.get_ident(), Task.objects.filter(status=status).count())
+
+        results = async_to_sync(gather_queries)({'done': count('Completed'), 'open': count('Pending')})
+        self.assertEqual(list(results), ['done', 'open'])
+        self.assertEqual([n for _, n in results.values()], [1, 4])
+        self.assertNotIn(threading.get_ident(), {ident for ident, _ in results.values()})
+
+
+@locmem
+class FragmentCacheTests(TestCase):
+    url = '/dashboard/sections/tasks/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('fragments', password='x')
+        cls.task = make_task('Old title')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fetch(self, url=None):
+        response = self.client.get(url or self.url)
+        return response.content.decode(), response['Server-Timing']
+
+    def test_committed_edit_moves_the_key(self):
+        self.fetch()
+        self.assertIn('1 hit', self.fetch()[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.title = 'New title'
+            self.task.save()
+        content, timing = self.fetch()
+        self.assertIn('0 hit', timing)
+        self.assertIn('New title', content)
+        self.assertNotIn('Old title', content)
+
+    def test_bulk_update_moves_the_key(self):
+        self.fetch()
+        with self.captureOnCommitCallbacks(execute=True):
+            update_tasks(Task.objects.all(), 'status', 'Completed')
+        self.assertIn('0 hit', self.fetch()[1])
+
+    def test_lookup_edit_moves_the_key(self):
+        self.fetch()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.category.category_name = 'Errands'
+            self.task.category.save()
+        self.assertIn('Errands', self.fetch()[0])
+
+    def test_rolled_back_edit_keeps_serving_the_committed_html(self):
+        self.fetch()
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.task.title = 'Never saved'
+                self.task.save()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        content, timing = self.fetch()
+        self.assertIn('1 hit', timing)
+        self.assertIn('Old title', content)
+
+    def test_keys_vary_by_user_and_query(self):
+        self.fetch()
+        self.assertIn('0 hit', self.fetch(self.url + '?order=-title')[1])
+        other = User.objects.create_user('other', password='x')
+        self.client.force_login(other)
+        self.assertIn('0 hit', self.fetch()[1])
+
+    @override_settings(HANGARIN_FRAGMENT_CACHE_TIMEOUT=0)
+    def test_timeout_zero_turns_caching_off(self):
+        self.fetch()
+        self.assertNotIn('frag;', self.fetch()[1])
+
+
+@locmem
+class DashboardSectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('sections', password='x')
+        cls.report = make_task('Quarterly report')
+        cls.garden = make_task('Water the garden', cls.report.category, cls.report.priority, status='Completed')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def task_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in queries.captured_queries if '"hangarinorg_task"' in q['sql']]
+
+    def test_page_is_a_shell_without_task_queries(self):
+        response, sql = self.task_queries('/dashboard/')
+        self.assertEqual(sql, [])
+        self.assertContains(response, 'dashboardGroups')
+
+    def test_each_section_runs_only_its_own_query(self):
+        for section, marker in (('stats', 'COUNT('), ('tasks', 'LIMIT'), ('groups', 'ROW_NUMBER()')):
+            with self.subTest(section=section):
+                response, sql = self.task_queries(f'/dashboard/sections/{section}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(sql), 1)
+                self.assertIn(marker, sql[0])
+                # a fragment for the page to swap in, not a whole page
+                self.assertNotContains(response, '<html')
+
+    def test_sections_apply_the_page_filters(self):
+        response = self.client.get('/dashboard/sections/tasks/?q=garden')
+        self.assertContains(response, 'Water the garden')
+        self.assertNotContains(response, 'Quarterly report')
+        response = self.client.get('/dashboard/sections/stats/?status=Completed')
+        self.assertEqual(response.context['total_tasks'], 1)
+
+    def test_unknown_section(self):
+        self.assertEqual(self.client.get('/dashboard/sections/sidebar/').status_code, 404)
+
+    def test_signed_out(self):
+        self.client.logout()
+        response = self.client.get('/dashboard/sections/stats/')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith('/accounts/login/'))
+
+
+@locmem
+@override_settings(HANGARIN_SQLITE_PRAGMAS={'busy_timeout': 0}, HANGARIN_DB_LOCK_RETRIES=0,
+                   HANGARIN_DB_LOCK_BACKOFF_MS=0)
+class ChangesSinceTests(TestCase):
+    def sources(self):
+        return {
+            'tasks': (Task.objects.all(), 'updated_at'),
+            'notes': (Note.objects.all(), 'updated_at'),
+            sync.DELETED: (Tombstone.objects.all(), 'deleted_at'),
+        }
+
+    def sync_all(self, position=None, limit=2):
+        """Follow the cursor to the end, returning every change and the final position."""
+        seen = []
+        while True:
+            changes, position, has_more = sync.changes_since(self.sources(), position, limit)
+            seen += changes
+            if not has_more:
+                return seen, position
+
+    def test_settle_covers_every_lock_wait(self):
+        with self.settings(HANGARIN_SQLITE_PRAGMAS={'busy_timeout': 1000}, HANGARIN_DB_LOCK_RETRIES=2,
+                           HANGARIN_DB_LOCK_BACKOFF_MS=100):
+            self.assertEqual(sync.settle(), datetime.timedelta(milliseconds=3000 + 450))
+
+    def test_deletes_come_back_as_tombstones(self):
+        task = make_task()
+        note = Note.objects.create(task=task, content='Call back')
+        other = make_task('Other', task.category, task.priority)
+        _, position = self.sync_all()
+
+        expected = {('task', task.pk), ('note', note.pk)}
+        task.delete()
+        changes, position = self.sync_all(position)
+        deleted = {(obj.model_name, obj.object_id) for name, obj in changes if name == sync.DELETED}
+        self.assertEqual(deleted, expected)
+
+        other.save()
+        changes, _ = self.sync_all(position)
+        self.assertEqual(changes, [('tasks', other)])
+
+    def test_pages_never_repeat_or_skip(self):
+        task = make_task()
+        for n in range(5):
+            Note.objects.create(task=task, content=f'Note {n}')
+        Note.objects.filter(content='Note 0').delete()
+        changes, _ = self.sync_all(limit=2)
+        keys = [(name, obj.pk) for name, obj in changes]
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertEqual(len(keys), Task.objects.count() + Note.objects.count() + Tombstone.objects.count())
+
+    def test_cursor_round_trip(self):
+        position = (timezone.now(), 'notes', 7)
+        self.assertEqual(sync.decode_cursor(sync.encode_cursor(position)), position)
+        with self.assertRaises(ValueError):
+            sync.decode_cursor('garbage')
+
+
+
+    def test_migration_installed_the_triggers(self):
+        migration = import_module('hangarinorg.migrations.0010_tombstone_triggers')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_tombstone'")
+            names = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(names, {f'{table}_tombstone' for table in migration.TABLES.values()})
+
+    def test_install_restores_dropped_triggers(self):
+        # what SQLite does to a table's triggers when a migration rebuilds the table
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER hangarinorg_note_tombstone')
+        sync.install_tombstones(connection)
+        note = Note.objects.create(task=make_task(), content='Gone soon')
+        pk = note.pk
+        note.delete()
+        self.assertTrue(Tombstone.objects.filter(model_name='note', object_id=pk).exists())
+
+
+@locmem
+class OfflineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('offline', password='x')
+
+    def manifest(self, response):
+        head, _, worker = response.content.decode().partition('\n')
+        self.assertTrue(head.startswith('self.HANGARIN = ') and head.endswith(';'))
+        return json.loads(head[len('self.HANGARIN = '):-1]), worker
+
+    def test_pages_name_their_owner(self):
+        self.assertEqual(self.client.get('/serviceworker.js')['X-Hangarin-User'], '')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/dashboard/')['X-Hangarin-User'], str(self.user.pk))
+        # redirects too: the worker must not keep pages across a sign-out
+        self.assertEqual(self.client.get('/')['X-Hangarin-User'], str(self.user.pk))
+
+    def test_service_worker_carries_its_precache_manifest(self):
+        response = self.client.get('/serviceworker.js')
+        self.assertEqual(response['Content-Type'], 'application/javascript')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        config, worker = self.manifest(response)
+        self.assertRegex(config['version'], r'^[0-9a-f]{12}$')
+        self.assertEqual(config['offlineUrl'], '/offline/')
+        self.assertIn('/offline/', config['precache'])
+        self.assertIn('OWNER_HEADER', worker)
+
+    def test_version_follows_the_worker_source(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'serviceworker.js')
+            versions = []
+            for source in ('// one', '// two', '// one'):
+                with open(path, 'w') as fh:
+                    fh.write(source)
+                with override_settings(DEBUG=True, PWA_SERVICE_WORKER_PATH=path, HANGARIN_OFFLINE_PRECACHE=[]):
+                    versions.append(self.manifest(self.client.get('/serviceworker.js'))[0]['version'])
+        self.assertNotEqual(versions[0], versions[1])
+        self.assertEqual(versions[0], versions[2])
+
+    @override_settings(DEBUG=True, HANGARIN_OFFLINE_PRECACHE=['js/not-there.js'])
+    def test_missing_precache_file_is_logged(self):
+        with self.assertLogs('hangarinorg.offline', 'WARNING'):
+            config, _ = self.manifest(self.client.get('/serviceworker.js'))
+        self.assertEqual(config['precache'], ['/static/js/not-there.js', '/offline/'])
+
+    def test_offline_page_renders_the_snapshot(self):
+        response = self.client.get('/offline/')
+        self.assertContains(response, 'id="offlineTasks"')
+        self.assertContains(response, 'snapshot')
+
+
+@locmem
+class DeploymentTests(TestCase):
+    def setUp(self):
+        # no real commands: each subprocess.run answers from self.results by its argument list
+        self.calls = []
+        self.results = {}
+        run = mock.patch.object(deployment.subprocess, 'run', side_effect=self.fake_run)
+        digest = mock.patch.object(deployment, 'requirements_hash', return_value='a' * 64)
+        self.run, self.digest = run.start(), digest.start()
+        self.addCleanup(run.stop)
+        self.addCleanup(digest.stop)
+
+    def fake_run(self, args, **kwargs):
+        self.calls.append(' '.join(args[1:]))
+        returncode, output = self.results.get(' '.join(args[1:]), (0, 'done'))
+        return subprocess.CompletedProcess(args, returncode, stdout=output)
+
+    def statuses(self, job):
+        return {step['name']: step['status'] for step in job.steps}
+
+    def test_claim_never_runs_two_jobs(self):
+        first, second = DeployJob.objects.create(), DeployJob.objects.create()
+        self.assertEqual(deployment.claim(), first)
+        # the first is still running, so nobody may take the second
+        self.assertIsNone(deployment.claim())
+        DeployJob.objects.filter(pk=first.pk).update(status=DeployJob.SUCCEEDED)
+        self.assertEqual(deployment.claim(), second)
+        self.assertIsNone(deployment.claim())
+
+    def test_stalled_job_is_failed_and_the_queue_moves_on(self):
+        long_ago = timezone.now() - datetime.timedelta(days=1)
+        stalled = DeployJob.objects.create(status=DeployJob.RUNNING, started_at=long_ago)
+        queued = DeployJob.objects.create()
+        self.assertEqual(deployment.claim(), queued)
+        stalled.refresh_from_db()
+        self.assertEqual(stalled.status, DeployJob.FAILED)
+
+    def test_full_deploy(self):
+        self.results['manage.py migrate --check --plan'] = (1, 'Planned operations: ...')
+        DeployJob.objects.create()
+        with self.assertLogs('hangarinorg.deployment', 'INFO') as logs:
+            job, = deployment.run_pending()
+        self.assertEqual(job.status, DeployJob.SUCCEEDED)
+        self.assertEqual(set(self.statuses(job).values()), {deployment.OK})
+        self.assertEqual(self.calls, [
+            'pull origin main', 'install -r requirements.txt', 'manage.py migrate --check --plan',
+            'manage.py migrate --noinput', 'manage.py collectstatic --noinput', str(deployment.WSGI_PATH),
+        ])
+        self.assertEqual(job.requirements_hash, 'a' * 64)
+        self.assertIn(f'Deploy {job.pk} succeeded', logs.output[-1])
+
+    def test_unchanged_requirements_and_no_migrations_are_skipped(self):
+        DeployJob.objects.create(status=DeployJob.SUCCEEDED, requirements_hash='a' * 64)
+        job = DeployJob.objects.create()
+        with self.assertLogs('hangarinorg.deployment', 'INFO'):
+            deployment.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(self.statuses(job)['install'], deployment.SKIPPED)
+        self.assertEqual(self.statuses(job)['migrate'], deployment.SKIPPED)
+        self.assertNotIn('install -r requirements.txt', self.calls)
+        self.assertNotIn('manage.py migrate --noinput', self.calls)
+        self.assertEqual(job.status, DeployJob.SUCCEEDED)
+
+    def test_changed_requirements_are_installed(self):
+        DeployJob.objects.create(status=DeployJob.SUCCEEDED, requirements_hash='b' * 64)
+        with self.assertLogs('hangarinorg.deployment', 'INFO'):
+            call_command('run_deploy', now=True, stdout=StringIO())
+        self.assertIn('install -r requirements.txt', self.calls)
+
+    def test_failed_step_stops_the_deploy(self):
+        self.results['pull origin main'] = (1, 'fatal: not a git repository')
+        out = StringIO()
+        with self.assertLogs('hangarinorg.deployment', 'INFO') as logs:
+            call_command('run_deploy', now=True, stdout=out)
+        job = DeployJob.objects.get()
+        self.assertEqual(job.status, DeployJob.FAILED)
+        self.assertEqual(job.error, 'pull: git exited with status 1')
+        self.assertEqual(self.statuses(job), {'pull': deployment.FAILED})
+        self.assertIn('fatal: not a git repository', job.steps[0]['log'])
+        self.assertEqual(self.calls, ['pull origin main'])
+        self.assertEqual(logs.output, [f'INFO:hangarinorg.deployment:Deploy {job.pk} failed'])
+        self.assertIn('pull: git exited with status 1', out.getvalue())
+
+    def test_unexpected_errors_are_logged_with_a_traceback(self):
+        self.digest.side_effect = FileNotFoundError('requirements.txt')
+        DeployJob.objects.create()
+        with self.assertLogs('hangarinorg.deployment', 'INFO') as logs:
+            job, = deployment.run_pending()
+        self.assertEqual(self.statuses(job)['install'], deployment.FAILED)
+        # an OSError is an expected failure, explained by the step log: no traceback
+        self.assertEqual(len(logs.output), 1)
+
+        self.digest.side_effect = ValueError('broken')
+        DeployJob.objects.create()
+        with self.assertLogs('hangarinorg.deployment', 'INFO') as logs:
+            job, = deployment.run_pending()
+        self.assertEqual(job.error, 'install: broken')
+        self.assertIn(f'ERROR:hangarinorg.deployment:Deploy {job.pk} failed in install', logs.output[0])
+
+    @mock.patch.dict(os.environ, {'DEPLOY_TOKEN': 'secret'})
+    def test_webhook_queues_a_job_and_starts_a_worker(self):
+        self.assertEqual(self.client.post('/deploy/').status_code, 403)
+        self.assertEqual(self.client.post('/deploy/', headers={'authorization': 'Bearer wrong'}).status_code, 403)
+        with mock.patch.object(deployment.subprocess, 'Popen') as popen:
+            response = self.client.post('/deploy/', headers={'authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 202)
+        job = DeployJob.objects.get()
+        self.assertEqual(response.json(), {'job': job.pk, 'status': 'queued', 'status_url': f'/deploy/{job.pk}/'})
+        self.assertEqual(popen.call_args.args[0][1:], ['manage.py', 'run_deploy'])
+        status = self.client.get(f'/deploy/{job.pk}/', headers={'authorization': 'Bearer secret'})
+        self.assertEqual(status.json()['status'], 'queued')
+
+    @mock.patch.dict(os.environ, {'DEPLOY_TOKEN': 'secret'})
+    def test_webhook_reports_a_worker_that_cannot_start(self):
+        with mock.patch.object(deployment.subprocess, 'Popen', side_effect=OSError('no python')), \
+                self.assertLogs('hangarinorg.views', 'ERROR'):
+            response = self.client.post('/deploy/', headers={'authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(DeployJob.objects.get().status, DeployJob.FAILED)
+
+
+@locmem
+class CompressedStaticTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source, self.root = os.path.join(tmp.name, 'static'), os.path.join(tmp.name, 'collected')
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'app.css'), 'w') as fh:
+            fh.write('.hero { background: url("missing.png"); }\n' + '.card { color: #123; }\n' * 50)
+
+    def collect(self):
+        with self.assertLogs('hangarinorg.storage', 'INFO') as logs:
+            call_command('collectstatic', interactive=False, verbosity=0)
+        return logs.output
+
+    def test_compress_writes_both_variants_once(self):
+        path = os.path.join(self.source, 'css', 'app.css')
+        self.assertEqual(compress(path), ['.gz', '.br'])
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        with open(path + '.br', 'rb') as fh:
+            self.assertEqual(brotli.decompress(fh.read()), data)
+        with gzip.open(path + '.gz') as fh:
+            self.assertEqual(fh.read(), data)
+        self.assertEqual(compress(path), [])
+
+    def test_incompressible_files_get_no_variants(self):
+        path = os.path.join(self.source, 'noise.js')
+        with open(path, 'wb') as fh:
+            fh.write(os.urandom(4096))
+        self.assertEqual(compress(path), [])
+
+    def test_collected_files_are_served_precompressed(self):
+        with self.settings(
+            STATICFILES_DIRS=[self.source], STATIC_ROOT=self.root, HANGARIN_SERVE_STATIC=True,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        ):
+            logs = self.collect()
+            # logged on each of the storage's post-processing passes
+            self.assertIn(
+                'WARNING:hangarinorg.storage:Static file css/missing.png is referenced but missing; '
+                'its URL is left unhashed', logs,
+            )
+            self.assertEqual(logs[-1], 'INFO:hangarinorg.storage:Wrote 2 precompressed static files')
+            hashed = staticfiles_storage.stored_name('css/app.css')
+            self.assertRegex(hashed, r'^css/app\.[0-9a-f]{12}\.css$')
+
+            middleware = StaticFilesMiddleware(lambda request: HttpResponse(status=404))
+            for accept, encoding in (('gzip, deflate, br', 'br'), ('gzip', 'gzip'), ('', None)):
+                response = middleware(RequestFactory().get(f'/static/{hashed}', headers={'accept-encoding': accept}))
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+                self.assertEqual(response['Content-Type'], 'text/css')
+            # the unhashed copy may change on the next deploy
+            response = middleware(RequestFactory().get('/static/css/app.css', headers={'accept-encoding': 'br'}))
+            self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class SqlitePragmaTests(TestCase):
+
+    def connect(self, name):
+        """A fresh connection to ``name``, outside the test database's shared one."""
+        default = connections['default']
+        wrapper = default.__class__({**default.settings_dict, 'NAME': name})
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_new_connections_get_the_pragmas(self):
+        # the test database lives in memory, where WAL does not apply; open a file instead
+        with tempfile.TemporaryDirectory() as tmp:
+            wrapper = self.connect(os.path.join(tmp, 'db.sqlite3'))
+            with CaptureQueriesContext(wrapper) as queries:
+                wrapper.ensure_connection()
+            self.assertEqual(len(queries), 0)
+            cursor = wrapper.connection.cursor()
+            self.assertEqual(cursor.execute('PRAGMA journal_mode').fetchone(), ('wal',))
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone(), (10000,))
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone(), (1,))  # NORMAL
+            wrapper.close()
+
+    @override_settings(HANGARIN_SQLITE_PRAGMAS={'busy_timeout': 250})
+    def test_pragmas_follow_the_setting(self):
+        wrapper = self.connect(':memory:')
+        wrapper.ensure_connection()
+        self.assertEqual(wrapper.connection.execute('PRAGMA busy_timeout').fetchone(), (250,))
+
+
+@locmem
+@override_settings(HANGARIN_DB_LOCK_RETRIES=2, HANGARIN_DB_LOCK_BACKOFF_MS=0)
+class RetryOnLockTests(TransactionTestCase):
+    # retry_on_lock needs to own the outermost transaction, which TestCase already holds
+    def flaky(self, failures, error='database is locked'):
+        calls = []
+
+        def func():
+            calls.append(transaction.get_connection().in_atomic_block)
+            if len(calls) <= failures:
+                raise OperationalError(error)
+            return 'done'
+        return func, calls
+
+    def test_retries_until_the_lock_clears(self):
+        func, calls = self.flaky(2)
+        with self.assertLogs('hangarinorg.db', 'WARNING') as logs:
+            self.assertEqual(retry_on_lock(func)(), 'done')
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(calls, [True, True, True])
+
+    def test_gives_up_after_the_retries(self):
+        func, calls = self.flaky(3)
+        with self.assertRaises(OperationalError), self.assertLogs('hangarinorg.db', 'WARNING'):
+            retry_on_lock(func)()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        func, calls = self.flaky(1, error='no such table: nowhere')
+        with self.assertRaises(OperationalError):
+            retry_on_lock(func)()
+        self.assertEqual(len(calls), 1)
+
+    def test_inside_a_transaction_the_error_propagates(self):
+        func, calls = self.flaky(1)
+        with self.assertRaises(OperationalError), transaction.atomic():
+            retry_on_lock(func)()
+        self.assertEqual(len(calls), 1)
+
+    def test_retried_view_queues_its_message_once(self):
+        subtask = SubTask.objects.create(parent_task=make_task(), title='Step')
+        self.client.force_login(User.objects.create_user('tester', password='secret'))
+        # the first attempt meets the lock after it queued its message
+        locked_once = [OperationalError('database is locked'), views.redirect('dashboard')]
+        with mock.patch.object(views, 'redirect', side_effect=locked_once), \
+                self.assertLogs('hangarinorg.db', 'WARNING'):
+            response = self.client.post('/subtask/bulk/', {'action': 'status', 'status': 'Completed',
+                                                            'selected': [subtask.pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)], ['Updated 1 subtask.'])
+        subtask.refresh_from_db()
+        self.assertEqual(subtask.status, 'Completed')
+
+
+@locmem
+@override_settings(HANGARIN_READ_REPLICAS=['replica'], HANGARIN_REPLICA_MAX_LAG=300)
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.aliases = []
+
+        @routers.read_from_replica
+        def view(request):
+            self.aliases.append(routers.read_alias())
+            return HttpResponse()
+
+        self.view = view
+        self.middleware = ReadReplicaMiddleware(self.get_response)
+
+    def get_response(self, request):
+        self.middleware.process_view(request, self.view, (), {})
+        return self.view(request)
+
+    def test_router(self):
+        router = routers.ReplicaRouter()
+        token = routers.activate(('replica', time.time()))
+        try:
+            self.assertEqual(router.db_for_read(Task), 'replica')
+            self.assertIsNone(router.db_for_read(User))
+            self.assertEqual(router.db_for_write(Task), 'default')
+        finally:
+            routers.deactivate(token)
+        self.assertIsNone(router.db_for_read(Task))
+
+    def test_reads_a_fresh_replica(self):
+        routers.mark_synced('replica', time.time())
+        self.middleware(self.factory.get('/'))
+        self.assertEqual(self.aliases, ['replica'])
+
+    def test_stale_replica_reads_the_primary(self):
+        routers.mark_synced('replica', time.time() - 600)
+        self.middleware(self.factory.get('/'))
+        self.assertEqual(self.aliases, [None])
+
+    def test_a_write_sets_the_cookie(self):
+        response = self.middleware(self.factory.post('/'))
+        self.assertIn(ReadReplicaMiddleware.COOKIE, response.cookies)
+        response = self.middleware(self.factory.get('/'))
+        self.assertNotIn(ReadReplicaMiddleware.COOKIE, response.cookies)
+
+    def test_reads_its_own_writes(self):
+        routers.mark_synced('replica', time.time() - 10)
+        request = self.factory.get('/')
+        request.COOKIES[ReadReplicaMiddleware.COOKIE] = f'{time.time():.3f}'
+        self.middleware(request)
+        # synced before the write: the replica does not have it yet
+        self.assertEqual(self.aliases, [None])
+        routers.mark_synced('replica', time.time() + 1)
+        self.middleware(request)
+        self.assertEqual(self.aliases, [None, 'replica'])
+
+    def test_bad_cookie_reads_the_primary(self):
+        routers.mark_synced('replica', time.time())
+        request = self.factory.get('/')
+        request.COOKIES[ReadReplicaMiddleware.COOKIE] = 'soon'
+        self.middleware(request)
+        self.assertEqual(self.aliases, [None])
+
+
+@locmem
+@override_settings(HANGARIN_DETAIL_PAGE_SIZE=3)
+class TaskDetailPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.task = make_task()
+        for n in range(8):
+            Note.objects.create(task=cls.task, content=f'Note {n}')
+            SubTask.objects.create(parent_task=cls.task, title=f'Step {n}')
+        # notes created in the same instant, so pages split a run of equal timestamps
+        Note.objects.filter(task=cls.task).update(created_at=timezone.now())
+        cls.notes = list(Note.objects.filter(task=cls.task).order_by('-created_at', '-pk').values_list('pk', flat=True))
+        cls.subtasks = list(SubTask.objects.filter(parent_task=cls.task).order_by('pk').values_list('pk', flat=True))
+        cls.user = User.objects.create_user('tester', password='secret')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def walk(self, name, base, num_queries):
+        """Follow the section's next links from ``base`` and return the pks seen."""
+        self.client.get(base)  # the first request fills the lookup cache
+        url, seen = base, []
+        while url:
+            # session, user, task and one query per section, on every page
+            with self.assertNumQueries(num_queries):
+                page = self.client.get(url).context[name]
+            seen += [obj.pk for obj in page]
+            url = base + page.next_url if page.has_next else None
+        return seen
+
+    def test_detail_page_walks_every_row_once(self):
+        for name, expected in (('notes', self.notes), ('subtasks', self.subtasks)):
+            self.assertEqual(self.walk(name, f'/task/{self.task.pk}/', 5), expected)
+
+    def test_section_view_walks_every_row_once(self):
+        for name, expected in (('notes', self.notes), ('subtasks', self.subtasks)):
+            self.assertEqual(self.walk(name, f'/task/{self.task.pk}/{name}/', 4), expected)
+
+    def test_section_cursors_are_independent(self):
+        first = self.client.get(f'/task/{self.task.pk}/').context
+        url = f'/task/{self.task.pk}/{first["notes"].next_url}'
+        context = self.client.get(url).context
+        self.assertEqual([n.pk for n in context['notes']], self.notes[3:6])
+        self.assertEqual([s.pk for s in context['subtasks']], self.subtasks[:3])
+
+    def test_section_view_renders_one_section(self):
+        response = self.client.get(f'/task/{self.task.pk}/notes/')
+        self.assertNotIn('subtasks', response.context)
+        self.assertEqual(self.client.get(f'/task/{self.task.pk}/other/').status_code, 404)
+
+
+@locmem
+class DeleteConfirmTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = Category.objects.create(category_name='Small')
+        cls.large = Category.objects.create(category_name='Large')
+        cls.empty = Category.objects.create(category_name='Empty')
+        cls.low = Priority.objects.create(priority_name='Low', rank=2)
+        cls.high = Priority.objects.create(priority_name='High', rank=1)
+        for n in range(2):
+            make_task(f'Small {n}', cls.small, cls.low)
+        for n in range(9):
+            make_task(f'Large {n}', cls.large, cls.high)
+        cls.user = User.objects.create_user('tester', password='secret')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def confirm(self, url, num_queries=4):
+        self.client.get(url)  # the first request fills the lookup cache
+        # session, user, the annotated object and the preview, however many tasks go with it
+        with self.assertNumQueries(num_queries):
+            return self.client.get(url)
+
+    def test_category_counts_and_preview(self):
+        for category, total in ((self.small, 2), (self.large, 9), (self.empty, 0)):
+            # with nothing to delete the template never asks for the preview
+            response = self.confirm(f'/category/{category.pk}/delete/', 4 if total else 3)
+            self.assertEqual(response.context['category'].task_count, total)
+            expected = list(Task.objects.filter(category=category).order_by('pk').values_list('pk', flat=True)[:5])
+            self.assertEqual([t.pk for t in response.context['preview_tasks']], expected)
+        self.assertNotContains(response, 'will be permanently deleted')
+
+    def test_priority_counts_and_preview(self):
+        for priority, total in ((self.low, 2), (self.high, 9)):
+            response = self.confirm(f'/priority/{priority.pk}/delete/')
+            self.assertEqual(response.context['priority'].task_count, total)
+            expected = list(Task.objects.filter(priority=priority).order_by('pk').values_list('pk', flat=True)[:5])
+            self.assertEqual([t.pk for t in response.context['preview_tasks']], expected)
+        self.assertContains(response, '... and 4 more tasks')
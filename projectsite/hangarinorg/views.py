@@ -1,95 +1,169 @@
+import csv
+import hmac
+import io
 import os
-import subprocess
 import logging
 
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponse, HttpResponseBadRequest, Http404
+from django.views import View
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
 from django.shortcuts import render
 from django.views.generic.list import ListView
-from django.views.generic.edit import CreateView, UpdateView, DeleteView
+from django.views.generic.edit import CreateView, UpdateView, DeleteView, FormView
 from django.views.generic.detail import DetailView
-from hangarinorg.models import Task, Category, Priority, Note, SubTask
-from hangarinorg.forms import TaskForm, CategoryForm, PriorityForm, NoteForm, SubTaskForm
+from hangarinorg.models import Task, Category, Priority, Note, SubTask, DeployJob
+from hangarinorg.forms import (
+    TaskForm, CategoryForm, PriorityForm, NoteForm, SubTaskForm, TaskImportUploadForm,
+    TaskBulkActionForm, SubTaskBulkActionForm,
+)
+from hangarinorg.bulk import update_tasks, update_subtasks
+from hangarinorg.concurrency import gather_queries
+from hangarinorg.importer import TaskImporter, detect_format, read_rows
+from hangarinorg.stats import status_counts, stats_context, lazy_stats_context
+from hangarinorg.pagination import KeysetPaginator, KeysetPaginationMixin
+from hangarinorg import deployment
+from hangarinorg import lookups
+from hangarinorg import offline
+from hangarinorg import routers
+from hangarinorg.export import EXPORTS, FORMATS, stream
+from hangarinorg.search import rank_expression
+from hangarinorg.filters import (
+    filter_tasks, filter_subtasks, filter_notes, order_keys, order_fields, apply_order,
+    TASK_SORTS, SUBTASK_SORTS, NOTE_SORTS,
+)
 from django.urls import reverse_lazy, reverse
 from django.utils import timezone
-from django.db.models import Q, Case, When, IntegerField, Value, Count, F, FloatField, ExpressionWrapper
-from django.db.models.functions import Coalesce, Cast
+from django.utils.decorators import method_decorator
+from django.db import transaction
+from django.db.models import Q, F, Count, OuterRef, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils.functional import SimpleLazyObject
 from django.shortcuts import redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib import messages
+from django.utils.http import url_has_allowed_host_and_scheme
+from asgiref.sync import sync_to_async
 
 
 logger = logging.getLogger(__name__)
 
+def deploy_authorized(request):
+    token = os.environ.get('DEPLOY_TOKEN', '')
+    # without a configured token, a bare "Bearer " header must not get through
+    return bool(token) and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
 @csrf_exempt  # allows external POST requests (like from GitHub)
 @require_POST  # only allow POST requests, reject GET
+@transaction.non_atomic_requests  # the worker must see the queued job as soon as it starts
 def deploy(request):
-    auth = request.headers.get("Authorization", "")
-    expected = f"Bearer {os.environ.get('DEPLOY_TOKEN', '')}"
-    if auth != expected:
+    """Queue a deploy and answer at once with its job id; a background worker runs it."""
+    if not deploy_authorized(request):
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
-    # If authorized, proceed with deployment
-    manage_dir = "/home/rosevent/hangarin/projectsite"  # directory where manage.py is located
-    project_dir = "/home/rosevent/hangarin"  # where .git is
-    wsgi_path = "/var/www/rosevent_pythonanywhere_com_wsgi.py"
-    venv_path = "/home/rosevent/Hangarinenv/bin"
-
     try:
-        # 1. Fetch latest version
-        subprocess.run(["git", "fetch", "origin", "main"], cwd=project_dir, check=True)
-        diff = subprocess.run(
-            ["git", "diff", "--name-only", "origin/main"],
-            cwd=project_dir,
-            capture_output=True,
-            text=True,
-            check=True
-        ).stdout
-
-        # 2. Pull updates
-        subprocess.run(["git", "pull", "origin", "main"], cwd=project_dir, check=True)
-        logger.info("Pulled latest code from GitHub.")
-
-        # 3. Install dependencies
-        subprocess.run(
-            [f"{venv_path}/pip", "install", "-r", "requirements.txt"],
-            cwd=project_dir,
-            check=True
-        )
-        logger.info("Dependencies installed.")
-
-        # 4. Run migrations only if new ones detected
-        if "migrations/" in diff:
-            logger.info("New migration files detected. Running migrate...")
-            subprocess.run(
-                [f"{venv_path}/python", "manage.py", "migrate"],
-                cwd=manage_dir,
-                check=True
-            )
-        else:
-            logger.info("No new migrations detected. Skipping migrate...")
-
-        # 5. Reload web app
-        subprocess.run(["touch", wsgi_path], check=True)
-        logger.info("Web app reloaded.")
+        job = deployment.enqueue()
+    except OSError as e:
+        logger.exception("Could not start the deploy worker")
+        return JsonResponse({"error": "Deployment failed", "details": str(e)}, status=500)
 
-    except subprocess.CalledProcessError as e:
-        logger.exception("Command failed")
-        return JsonResponse({"error": "Command failed", "details": str(e)}, status=500)
+    return JsonResponse({
+        "job": job.pk,
+        "status": job.status,
+        "status_url": reverse('deploy_status', args=[job.pk]),
+    }, status=202)
 
-    except Exception as e:
-        logger.exception("Deployment failed")
-        return JsonResponse({"error": "Deployment failed", "details": str(e)}, status=500)
 
-    return JsonResponse({"status": "Deployed successfully"})
+@require_GET
+def deploy_status(request, pk):
+    """Status of one deploy job, with each step's duration and output."""
+    if not deploy_authorized(request):
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    job = DeployJob.objects.filter(pk=pk).first()
+    if job is None:
+        return JsonResponse({"error": "Not found"}, status=404)
+    return JsonResponse(deployment.describe(job))
 
 
 def root_redirect(request):
     return redirect('dashboard')
 
-class HomePageView(LoginRequiredMixin, ListView):
+
+def service_worker(request):
+    """The service worker script with its versioned precache manifest (see ``hangarinorg.offline``)."""
+    response = HttpResponse(offline.service_worker_source(), content_type='application/javascript')
+    # browsers should notice a new worker on the next visit after a deploy
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def filter_query(request, **extra):
+    """The list's query string minus its page cursor, for links and forms acting on the same rows."""
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    for name, value in extra.items():
+        params[name] = value
+    return params.urlencode()
+
+
+def related_count(model, field):
+    """Number of ``model`` rows whose ``field`` points at the outer row, as an annotation."""
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(rows.annotate(n=Count('pk')).values('n')), 0)
+
+
+def category_task_groups(tasks, categories, per_group):
+    """Group up to ``per_group`` tasks under each category using a single windowed query.
+
+    Rows are ranked per category with ROW_NUMBER() following the queryset's ordering,
+    so the number of queries stays constant however many categories exist.
+    """
+    ordering = [f for f in tasks.query.order_by if isinstance(f, str)] or ['pk']
+    ranked = (
+        tasks
+        .annotate(group_row=Window(RowNumber(), partition_by=F('category_id'), order_by=ordering))
+        .filter(group_row__lte=per_group)
+        .order_by('category_id', 'group_row')
+    )
+    by_category = {}
+    for task in ranked:
+        by_category.setdefault(task.category_id, []).append(task)
+    return [{'category': cat, 'tasks': by_category.get(cat.pk, [])} for cat in categories]
+
+class LazyQueryResults(dict):
+    """Runs each named query the first time its result is read."""
+
+    def __init__(self, queries):
+        super().__init__()
+        self.queries = queries
+
+    def __missing__(self, name):
+        value = self[name] = self.queries[name]()
+        return value
+
+
+class QueryResultsMixin:
+    """Name the independent queries a page needs in ``get_queries()`` and read them back from
+    ``get_query_results()``. Sync views run each one when it is first read (so a query whose
+    only reader is a cached template fragment never runs); the async variants run them all
+    concurrently up front."""
+
+    query_results = None
+
+    def get_queries(self):
+        return {}
+
+    def get_query_results(self):
+        if self.query_results is None:
+            self.query_results = LazyQueryResults(self.get_queries())
+        return self.query_results
+
+
+@method_decorator(routers.read_from_replica, name='dispatch')
+class HomePageView(LoginRequiredMixin, QueryResultsMixin, ListView):
     model = Task
     template_name = 'dashboard.html'
     context_object_name = 'tasks'
@@ -97,12 +171,66 @@ class HomePageView(LoginRequiredMixin, ListView):
     login_url = '/accounts/login/'
     redirect_field_name = 'next'
 
+    # allowed keys for ?order= / ?sort= on the dashboard
+    allowed_sorts = {
+        'task': 'title',
+        'category': 'category__category_name',
+        'progress': 'progress',
+        'deadline': 'deadline',
+    }
+
+    def get_tasks_queryset(self):
+        # Filter by ?category=, ?q= (full-text index over title/description) and the other shared task filters
+        all_tasks = filter_tasks(Task.objects.all(), self.request.GET)
+        
+        # Task rows read the stored progress column (kept in sync from subtasks), so no join/aggregate is needed
+        tasks_qs = all_tasks.select_related('category')
+
+        # support chainable ordering via ?order=<col>[,<col2>,...] where each col may be prefixed with - for desc
+        # (or from sort/dir + secondary), converted into ORM order_by fields preserving the sign
+        order_by_fields = order_fields(order_keys(self.request.GET), self.allowed_sorts)
+        search_query = self.request.GET.get('q', '').strip()
+
+        if order_by_fields:
+            try:
+                tasks_qs = tasks_qs.order_by(*order_by_fields)
+            except Exception:
+                # ignore invalid ordering inputs
+                pass
+        elif search_query:
+            # no explicit ordering: best matches first
+            tasks_qs = tasks_qs.annotate(search_rank=rank_expression(Task, search_query)).order_by('search_rank')
+        return tasks_qs
+
+    def defer_sections(self):
+        # the page itself is a shell; its stats and task table load from DashboardSectionView
+        # after first paint (?lazy=0 renders them inline, e.g. for browsers without JavaScript)
+        return self.request.GET.get('lazy') != '0'
+
+    def get_queries(self):
+        if self.defer_sections():
+            return {}
+        tasks_qs = self.get_tasks_queryset()
+        return {
+            # statistics (based on filtered tasks) in a single aggregate query;
+            # overdue here means deadline before today and progress less than 100
+            'counts': lambda: status_counts(tasks_qs, overdue_filter=~Q(progress=100)),
+            # only the current page of rows is materialized; pages are keyed on the active ordering
+            'page': lambda: KeysetPaginator(tasks_qs, settings.HANGARIN_PAGE_SIZE).page(
+                self.request.GET.get('cursor'), self.request.GET
+            ),
+            # the first few tasks of every category in the same order, from one ranked query
+            'groups': lambda: category_task_groups(
+                tasks_qs, lookups.categories(), settings.HANGARIN_CATEGORY_GROUP_SIZE
+            ),
+        }
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Add categories and priorities for filtering/display
-        context['categories'] = Category.objects.all()
-        context['priorities'] = Priority.objects.all()
+        context['categories'] = lookups.categories()
+        context['priorities'] = lookups.priorities()
         
         # Get selected category from URL parameter
         selected_category = self.request.GET.get('category', '')
@@ -112,111 +240,18 @@ class HomePageView(LoginRequiredMixin, ListView):
         search_query = self.request.GET.get('q', '').strip()
         context['search_query'] = search_query
         
-        # Base queryset for all tasks
-        all_tasks = Task.objects.all()
-        
-        # Filter by category if selected
-        if selected_category:
-            try:
-                category_pk = int(selected_category)
-                all_tasks = all_tasks.filter(category__pk=category_pk)
-            except (ValueError, TypeError):
-                pass
-        
-        # Filter by search query if provided
-        if search_query:
-            all_tasks = all_tasks.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
-        
-        # Add task statistics (based on filtered tasks)
-        context['total_tasks'] = all_tasks.count()
-        context['completed_tasks'] = all_tasks.filter(status='Completed').count()
-        context['pending_tasks'] = all_tasks.filter(status='Pending').count()
-        context['in_progress_tasks'] = all_tasks.filter(status='In Progress').count()
-        
-        # Add tasks grouped by category dynamically (no hardcoded category names)
-        category_groups = []
-        for cat in Category.objects.all():
-            qs = all_tasks.filter(category=cat)
-            category_groups.append({'category': cat, 'tasks': qs})
-        context['category_task_groups'] = category_groups
-
-        # Build task rows with progress computed from subtasks using annotations to avoid N+1 queries
-        tasks_qs = (
-            all_tasks
-            .annotate(
-                total_sub=Count('subtasks', distinct=True),
-                completed_sub=Count('subtasks', filter=Q(subtasks__status__iexact='Completed'), distinct=True),
-            )
-            .annotate(
-                # compute percent when there are subtasks: (completed_sub / total_sub) * 100
-                progress_calc=Case(
-                    When(total_sub__gt=0, then=ExpressionWrapper(100.0 * F('completed_sub') / F('total_sub'), output_field=FloatField())),
-                    default=None,
-                    output_field=FloatField(),
-                ),
-                # fallback mapping when no subtasks
-                fallback_pct=Case(
-                    When(status__iexact='Completed', then=Value(100)),
-                    When(status__iexact='In Progress', then=Value(50)),
-                    default=Value(0),
-                    output_field=IntegerField(),
-                ),
-            )
-            .annotate(
-                progress_int=Cast(Coalesce(F('progress_calc'), F('fallback_pct')), IntegerField())
-            )
-        )
+        results = self.get_query_results()
 
-        # support chainable ordering via ?order=<col>[,<col2>,...] where each col may be prefixed with - for desc
-        # allowed keys: task, category, progress, deadline
-        order_param = self.request.GET.get('order', '').strip()
         sort_key = self.request.GET.get('sort', '').strip()  # kept for backward compatibility / arrows
         sort_dir = self.request.GET.get('dir', 'asc')
-        allowed_sorts = {
-            'task': 'title',
-            'category': 'category__category_name',
-            'progress': 'progress_int',
-            'deadline': 'deadline',
-        }
+        allowed_sorts = self.allowed_sorts
 
         # Parse the requested order list (either from order= or fallback to sort/dir + secondary)
-        order_items = []
-        if order_param:
-            raw = [p.strip() for p in order_param.split(',') if p.strip()]
-            order_items = raw
-        else:
-            # fallback: build from sort & optional secondary_sort/secondary_dir params (older logic)
-            primary = self.request.GET.get('sort', '').strip()
-            primary_dir = self.request.GET.get('dir', 'asc')
-            secondary = self.request.GET.get('secondary_sort', '').strip()
-            secondary_dir = self.request.GET.get('secondary_dir', 'asc')
-            if primary:
-                prefix = '-' if primary_dir == 'desc' else ''
-                order_items.append(prefix + primary)
-            if secondary:
-                sprefix = '-' if secondary_dir == 'desc' else ''
-                order_items.append(sprefix + secondary)
-
-        # convert order_items (keys) into ORM order_by fields, preserving sign
-        order_by_fields = []
-        for it in order_items:
-            if not it:
-                continue
-            sign = '-' if it.startswith('-') else ''
-            key = it.lstrip('-')
-            if key in allowed_sorts:
-                order_field = sign + allowed_sorts[key]
-                order_by_fields.append(order_field)
+        order_items = order_keys(self.request.GET)
 
-        if order_by_fields:
-            try:
-                tasks_qs = tasks_qs.order_by(*order_by_fields)
-            except Exception:
-                # ignore invalid ordering inputs
-                pass
+        # Add tasks grouped by category dynamically (no hardcoded category names); built lazily
+        # from one ranked query so the cost does not grow with the number of categories
+        context['category_task_groups'] = SimpleLazyObject(lambda: results['groups'])
 
         # expose current ordering for template use
         context['current_sort'] = sort_key or (order_items[0].lstrip('-') if order_items else '')
@@ -257,20 +292,152 @@ class HomePageView(LoginRequiredMixin, ListView):
             context['primary_col'] = ''
             context['primary_dir'] = 'asc'
 
-        # compute overdue tasks: deadline before today and progress less than 100
-        try:
-            today = timezone.now().date()
-            overdue_count = tasks_qs.exclude(deadline__isnull=True).filter(deadline__lt=today).exclude(progress_int=100).count()
-        except Exception:
-            overdue_count = 0
-        context['overdue'] = overdue_count
+        # only read when the stats fragment is rendered rather than served from cache
+        context.update(lazy_stats_context(lambda: results['counts'], 'tasks'))
+        context['overdue'] = context['overdue_tasks']
+
+        # the page of rows is fetched on first use too, so a cached task table skips it
+        page = SimpleLazyObject(lambda: results['page'])
+        context['page_obj'] = page
+        context['is_paginated'] = SimpleLazyObject(lambda: page.has_other_pages())
+
+        # export links and bulk actions carry the active filters and sort, minus the page cursor
+        context['export_query'] = context['filter_query'] = filter_query(self.request)
+        context['bulk_url'] = reverse('task_bulk')
 
         # Build list expected by template: [{'task': TaskInstance, 'progress': int}, ...]
-        task_rows = [{'task': t, 'progress': getattr(t, 'progress_int', 0)} for t in tasks_qs]
-        context['task_rows'] = task_rows
+        context['task_rows'] = SimpleLazyObject(lambda: [{'task': t, 'progress': t.progress} for t in page])
+        context['defer_sections'] = self.defer_sections()
         
         return context
 
+
+class DashboardSectionView(HomePageView):
+    """One dashboard section, filtered and sorted like the page: the stats cards, the task table
+    or the per-category groups.
+
+    The dashboard loads them after first paint and reloads only the sections a sort or a
+    page change affects, so those requests run just the queries of the section they render.
+    """
+    sections = {
+        'stats': 'includes/dashboard_stats.html',
+        'tasks': 'includes/dashboard_tasks.html',
+        'groups': 'includes/dashboard_groups.html',
+    }
+    # the named queries each section reads (see HomePageView.get_queries)
+    section_queries = {
+        'stats': ('counts',),
+        'tasks': ('page',),
+        'groups': ('groups',),
+    }
+
+    def defer_sections(self):
+        return False
+
+    def get_queries(self):
+        # the async variant runs every query it is given up front, so hand it only this section's
+        queries = super().get_queries()
+        return {name: queries[name] for name in self.section_queries.get(self.kwargs['section'], ())}
+
+    def get_template_names(self):
+        if self.kwargs['section'] not in self.sections:
+            raise Http404
+        return [self.sections[self.kwargs['section']]]
+
+
+class TaskRowsView(LoginRequiredMixin, ListView):
+    """The dashboard table row and mobile card of each ``?id=`` task, to swap in place after an edit."""
+    model = Task
+    template_name = 'includes/task_rows.html'
+    login_url = '/accounts/login/'
+
+    def get_queryset(self):
+        ids = [pk for pk in self.request.GET.getlist('id') if pk.isdigit()]
+        return Task.objects.filter(pk__in=ids).select_related('category')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['task_rows'] = [{'task': t, 'progress': t.progress} for t in self.object_list]
+        return context
+
+@method_decorator(routers.read_from_replica, name='dispatch')
+class ExportView(LoginRequiredMixin, View):
+    """Stream tasks, subtasks or notes as ?format=csv|ndjson, filtered and sorted like the lists"""
+    login_url = '/accounts/login/'
+
+    def get(self, request, kind):
+        if kind not in EXPORTS:
+            raise Http404
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in FORMATS:
+            return HttpResponseBadRequest(f"Unknown format {fmt!r}; use one of: {', '.join(FORMATS)}")
+        response = StreamingHttpResponse(
+            stream(kind, fmt, request.GET, using=routers.read_alias()), content_type=FORMATS[fmt],
+        )
+        filename = f'{kind}-{timezone.localtime():%Y%m%d-%H%M}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class BulkActionView(LoginRequiredMixin, View):
+    """Apply a list's bulk action to the checked rows, or to every row matching the list's filters.
+
+    The list's query string is posted along (``?category=...&q=...``) so "all matching rows"
+    resolves with the same filters the list used; the change itself is one UPDATE/delete.
+    """
+    login_url = '/accounts/login/'
+    model = None
+    noun = None
+    form_class = None
+    filter_rows = None
+    apply = None
+
+    def post(self, request):
+        next_url = request.POST.get('next', '')
+        if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+            next_url = reverse('dashboard')
+        # the dashboard posts with fetch() and swaps the changed rows itself instead of reloading
+        ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+        form = self.form_class(request.POST)
+        if not form.is_valid():
+            errors = [error for field_errors in form.errors.values() for error in field_errors]
+            if ajax:
+                return JsonResponse({'ok': False, 'message': ' '.join(errors)}, status=400)
+            for error in errors:
+                messages.error(request, error)
+            return redirect(next_url)
+
+        if form.cleaned_data['scope'] == 'all':
+            qs = self.filter_rows(self.model.objects.all(), request.GET)
+        else:
+            qs = self.model.objects.filter(pk__in=form.cleaned_data['selected'])
+        action = form.cleaned_data['action']
+        rows = self.apply(qs, action, form.value())
+        verb = 'Deleted' if action == 'delete' else 'Updated'
+        message = f'{verb} {rows} {self.noun}{"" if rows == 1 else "s"}.'
+        if ajax:
+            return JsonResponse({'ok': True, 'message': message, 'rows': rows})
+        messages.success(request, message)
+        return redirect(next_url)
+
+
+class TaskBulkActionView(BulkActionView):
+    model = Task
+    noun = 'task'
+    form_class = TaskBulkActionForm
+    filter_rows = staticmethod(filter_tasks)
+    apply = staticmethod(update_tasks)
+
+
+class SubTaskBulkActionView(BulkActionView):
+    model = SubTask
+    noun = 'subtask'
+    form_class = SubTaskBulkActionForm
+    filter_rows = staticmethod(filter_subtasks)
+    apply = staticmethod(update_subtasks)
+
+
+@method_decorator(routers.read_from_replica, name='dispatch')
 class TaskListView(ListView):
     model = Task
     template_name = 'dashboard.html'
@@ -284,11 +451,52 @@ class TaskListView(ListView):
 # ========== TASK CRUD VIEWS ==========
 
 class TaskDetailView(LoginRequiredMixin, DetailView):
-    """View for displaying a single task with details"""
+    """View for displaying a single task with details
+
+    Notes and subtasks come a page at a time (``?notes_cursor=`` / ``?subtasks_cursor=``);
+    the page's "Load more" links fetch the next one from TaskDetailSectionView.
+    """
     model = Task
     template_name = 'task_detail.html'
     context_object_name = 'task'
     login_url = '/accounts/login/'
+    sections = ('notes', 'subtasks')
+
+    def get_queryset(self):
+        # the subtask count is stored on the task; the note count comes along in the same query
+        return Task.objects.select_related('category', 'priority').annotate(note_count=related_count(Note, 'task'))
+
+    def section_page(self, name):
+        if name == 'notes':
+            queryset = Note.objects.filter(task=self.object).order_by('-created_at')
+        else:
+            queryset = SubTask.objects.filter(parent_task=self.object).order_by('pk')
+        paginator = KeysetPaginator(queryset, getattr(settings, 'HANGARIN_DETAIL_PAGE_SIZE', 20), f'{name}_cursor')
+        return paginator.page(self.request.GET.get(paginator.cursor_param), self.request.GET)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for name in self.sections:
+            context[name] = self.section_page(name)
+        return context
+
+
+class TaskDetailSectionView(TaskDetailView):
+    """The next page of a task's notes or subtasks, appended in place by "Load more"."""
+
+    templates = {
+        'notes': 'includes/task_notes.html',
+        'subtasks': 'includes/task_subtasks.html',
+    }
+
+    def get(self, request, *args, **kwargs):
+        if kwargs['section'] not in self.templates:
+            raise Http404
+        self.sections = (kwargs['section'],)
+        return super().get(request, *args, **kwargs)
+
+    def get_template_names(self):
+        return [self.templates[self.kwargs['section']]]
 
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
@@ -314,6 +522,30 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
+@method_decorator(transaction.non_atomic_requests, name='dispatch')  # the importer commits per batch
+class TaskImportView(LoginRequiredMixin, FormView):
+    """Upload a CSV/JSON file of tasks (with nested subtasks and notes) and show what was rejected"""
+    form_class = TaskImportUploadForm
+    template_name = 'task_import.html'
+    login_url = '/accounts/login/'
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        fmt = form.cleaned_data['format'] or detect_format(upload.name)
+        importer = TaskImporter(
+            create_missing=form.cleaned_data['create_missing'],
+            max_errors=getattr(settings, 'HANGARIN_IMPORT_ERROR_LIMIT', 200),
+        )
+        text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = importer.run(read_rows(text, fmt))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            # batches before the bad byte/line are already committed; say how far we got
+            form.add_error('file', f'Could not read the file after {importer.report.tasks} imported tasks: {exc}')
+            return self.form_invalid(form)
+        return self.render_to_response(self.get_context_data(form=form, report=report))
+
+
 class TaskUpdateView(LoginRequiredMixin, UpdateView):
     """View for updating existing tasks"""
     model = Task
@@ -346,6 +578,9 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
     context_object_name = 'task'
     login_url = '/accounts/login/'
 
+    def get_queryset(self):
+        return Task.objects.select_related('category', 'priority').annotate(note_count=related_count(Note, 'task'))
+
     def get_success_url(self):
         # Redirect back to the category tasks view after deletion
         try:
@@ -355,6 +590,7 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
             return reverse_lazy('dashboard')
 # ========== CATEGORY CRUD VIEWS ==========
 
+@method_decorator(routers.read_from_replica, name='dispatch')
 class CategoryListView(LoginRequiredMixin, ListView):
     """View for listing all categories"""
     model = Category
@@ -373,22 +609,10 @@ class CategoryDetailView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         qs = Task.objects.filter(category=self.object)
-        context['tasks'] = qs
+        # each row shows its priority badge
+        context['tasks'] = qs.select_related('priority')
         # compute stats for the category
-        today = timezone.now().date()
-        total = qs.count()
-        completed = qs.filter(status__iexact='Completed').count()
-        pending = qs.filter(status__iexact='Pending').count()
-        in_progress = qs.filter(status__iexact='In Progress').count()
-        overdue = qs.exclude(deadline__isnull=True).filter(deadline__lt=today).exclude(status__iexact='Completed').count()
-
-        context.update({
-            'total_tasks': total,
-            'completed_tasks': completed,
-            'pending_tasks': pending,
-            'in_progress_tasks': in_progress,
-            'overdue_tasks': overdue,
-        })
+        context.update(stats_context(status_counts(qs), 'tasks'))
         return context
 
 
@@ -439,9 +663,19 @@ class CategoryDeleteView(LoginRequiredMixin, DeleteView):
     context_object_name = 'category'
     login_url = '/accounts/login/'
 
+    def get_queryset(self):
+        return Category.objects.annotate(task_count=related_count(Task, 'category'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # the confirmation names the first few tasks that go with it
+        context['preview_tasks'] = Task.objects.filter(category=self.object).order_by('pk').only('pk', 'title')[:5]
+        return context
+
 
 # ========== PRIORITY CRUD VIEWS ==========
 
+@method_decorator(routers.read_from_replica, name='dispatch')
 class PriorityListView(LoginRequiredMixin, ListView):
     """View for listing all priorities"""
     model = Priority
@@ -495,6 +729,15 @@ class PriorityDeleteView(LoginRequiredMixin, DeleteView):
     context_object_name = 'priority'
     login_url = '/accounts/login/'
 
+    def get_queryset(self):
+        return Priority.objects.annotate(task_count=related_count(Task, 'priority'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # the confirmation names the first few tasks that go with it
+        context['preview_tasks'] = Task.objects.filter(priority=self.object).order_by('pk').only('pk', 'title')[:5]
+        return context
+
 
 # ========== NOTE CRUD VIEWS ==========
 
@@ -557,7 +800,8 @@ class NoteDeleteView(LoginRequiredMixin, DeleteView):
 
 
 
-class NoteListView(LoginRequiredMixin, ListView):
+@method_decorator(routers.read_from_replica, name='dispatch')
+class NoteListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """List all notes, with optional filtering by task via ?task=<task_pk> and search via ?q="""
     model = Note
     template_name = 'notes.html'
@@ -565,45 +809,9 @@ class NoteListView(LoginRequiredMixin, ListView):
     login_url = '/accounts/login/'
 
     def get_queryset(self):
-        qs = Note.objects.select_related('task')
-        # optional filter by task
-        task_pk = self.request.GET.get('task')
-        if task_pk:
-            try:
-                task_pk = int(task_pk)
-                qs = qs.filter(task__pk=task_pk)
-            except (ValueError, TypeError):
-                pass
-
-        # search across note content and related task title
-        q = self.request.GET.get('q')
-        if q:
-            qs = qs.filter(
-                Q(content__icontains=q) |
-                Q(task__title__icontains=q)
-            )
-
-        # support simple ordering via ?sort=created_at|task and dir=asc|desc
-        sort_key = self.request.GET.get('sort', '').strip()
-        sort_dir = self.request.GET.get('dir', 'asc')
-        allowed = {
-            'created_at': 'created_at',
-            'task': 'task__title',
-        }
-        if sort_key in allowed:
-            field = allowed[sort_key]
-            if sort_dir == 'desc':
-                field = '-' + field
-            try:
-                qs = qs.order_by(field)
-            except Exception:
-                pass
-
-        # default ordering newest first
-        if not self.request.GET.get('sort'):
-            qs = qs.order_by('-created_at')
-
-        return qs
+        qs = filter_notes(Note.objects.select_related('task'), self.request.GET)
+        # ?sort=created_at|task and dir=asc|desc; default: best matches first when searching, otherwise newest first
+        return apply_order(qs, self.request.GET, NOTE_SORTS, default=('-created_at',))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -678,7 +886,8 @@ class SubTaskDeleteView(LoginRequiredMixin, DeleteView):
     def get_success_url(self):
         return self.request.path
 
-class SubTaskListView(LoginRequiredMixin, ListView):
+@method_decorator(routers.read_from_replica, name='dispatch')
+class SubTaskListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """List all subtasks, with optional filtering by parent task via ?parent=<task_pk>."""
     model = SubTask
     template_name = 'subtasks.html'
@@ -688,83 +897,13 @@ class SubTaskListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         # SubTask doesn't have its own priority/deadline; use parent task's relations
         qs = SubTask.objects.select_related('parent_task', 'parent_task__priority')
-        parent = self.request.GET.get('parent')
-        if parent:
-            try:
-                parent_pk = int(parent)
-                qs = qs.filter(parent_task__pk=parent_pk)
-            except (ValueError, TypeError):
-                pass
-        # support filtering by parent task priority via query param ?priority=<pk>
-        priority = self.request.GET.get('priority')
-        if priority:
-            try:
-                priority_pk = int(priority)
-                qs = qs.filter(parent_task__priority__pk=priority_pk)
-            except (ValueError, TypeError):
-                pass
-
-        # support filtering by subtask status via ?status=Completed|In Progress|Pending
-        status = self.request.GET.get('status')
-        if status:
-            qs = qs.filter(status__iexact=status)
-
-        # optional search across subtask title/description
-        q = self.request.GET.get('q')
-        if q:
-            qs = qs.filter(
-                Q(title__icontains=q) |
-                Q(description__icontains=q)
-            )
-
-        # support sorting via ?sort=<key>&dir=asc|desc (same semantic sorts as tasks)
-        sort_key = self.request.GET.get('sort', '').strip()
-        sort_dir = self.request.GET.get('dir', 'asc')
-
-        if sort_key == 'priority':
-            priority_order_case = Case(
-                When(parent_task__priority__priority_name__iexact='critical', then=Value(1)),
-                When(parent_task__priority__priority_name__iexact='high', then=Value(2)),
-                When(parent_task__priority__priority_name__iexact='medium', then=Value(3)),
-                When(parent_task__priority__priority_name__iexact='low', then=Value(4)),
-                When(parent_task__priority__priority_name__iexact='optional', then=Value(5)),
-                default=Value(999),
-                output_field=IntegerField(),
-            )
-            try:
-                qs = qs.annotate(priority_rank=priority_order_case)
-                if sort_dir == 'desc':
-                    qs = qs.order_by('-priority_rank')
-                else:
-                    qs = qs.order_by('priority_rank')
-            except Exception:
-                pass
-        else:
-            allowed_sorts = {
-                'title': 'title',
-                'task': 'title',
-                'status': 'status',
-                'deadline': 'parent_task__deadline',
-                'due': 'parent_task__deadline',
-            }
-            if sort_key in allowed_sorts:
-                order_field = allowed_sorts[sort_key]
-                if sort_dir == 'desc':
-                    order_field = '-' + order_field
-                try:
-                    qs = qs.order_by(order_field)
-                except Exception:
-                    pass
-
-        # default fallback ordering
-        if not self.request.GET.get('sort'):
-            qs = qs.order_by('-updated_at')
-
-        return qs
+        qs = filter_subtasks(qs, self.request.GET)
+        # ?sort=<key>&dir=asc|desc (same semantic sorts as tasks); default: best matches, otherwise recently updated
+        return apply_order(qs, self.request.GET, SUBTASK_SORTS, default=('-updated_at',))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['priorities'] = Priority.objects.all()
+        context['priorities'] = lookups.priorities()
         context['selected_priority'] = self.request.GET.get('priority', '')
         context.update({
             'category_name': 'Subtasks',
@@ -779,114 +918,52 @@ class SubTaskListView(LoginRequiredMixin, ListView):
                 'due_col': 'Due Date',
             }
         })
-        # compute basic stats for the subtasks listing
-        qs = self.get_queryset()
-        today = timezone.now().date()
-        total = qs.count()
-        completed = qs.filter(status__iexact='Completed').count()
-        pending = qs.filter(status__iexact='Pending').count()
-        in_progress = qs.filter(status__iexact='In Progress').count()
-        overdue = qs.exclude(parent_task__deadline__isnull=True).filter(parent_task__deadline__lt=today).exclude(status__iexact='Completed').count()
-        context.update({
-            'total_subtasks': total,
-            'completed_subtasks': completed,
-            'pending_subtasks': pending,
-            'in_progress_subtasks': in_progress,
-            'overdue_subtasks': overdue,
-        })
+        # compute basic stats for the subtasks listing (reuses the filtered list queryset)
+        context.update(lazy_stats_context(lambda: status_counts(self.object_list), 'subtasks'))
         # expose sorting state for the template (so arrows and links work)
         context['current_sort'] = self.request.GET.get('sort', '')
         context['current_direction'] = self.request.GET.get('dir', 'asc')
 
         context['search_query'] = self.request.GET.get('q', '')
+        context['filter_query'] = filter_query(self.request)
+        context['bulk_url'] = reverse('subtask_bulk')
         return context
 
 
-from django.db.models import Q, Case, When, Value, IntegerField
-from django.utils import timezone
-
-class CategoryTasksView(LoginRequiredMixin, ListView):
+@method_decorator(routers.read_from_replica, name='dispatch')
+class CategoryTasksView(LoginRequiredMixin, QueryResultsMixin, KeysetPaginationMixin, ListView):
     """Displays all tasks under a given category (dynamic by pk)."""
     model = Task
     template_name = 'category_tasks.html'
     context_object_name = 'tasks'
     login_url = '/accounts/login/'
 
-    def get_queryset(self):
-        category_pk = self.kwargs.get('pk')
-        qs = Task.objects.filter(category__pk=category_pk)
-
-        # support filtering by priority via query param ?priority=<pk>
-        priority = self.request.GET.get('priority')
-        if priority:
-            try:
-                priority_pk = int(priority)
-                qs = qs.filter(priority__pk=priority_pk)
-            except (ValueError, TypeError):
-                pass
-
-        # support filtering by status via ?status=Completed|In Progress|Pending
-        status = self.request.GET.get('status')
-        if status:
-            qs = qs.filter(status__iexact=status)
-
-        # 🔍 NEW: support search via ?q=keyword
-        search = self.request.GET.get('q')
-        if search:
-            qs = qs.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search)
-            )
-
-        # support sorting via ?sort=<key>&dir=asc|desc
-        sort_key = self.request.GET.get('sort', '').strip()
-        sort_dir = self.request.GET.get('dir', 'asc')
+    def get_queries(self):
+        paginate = super().paginate_queryset
+        # category-wide statistics for the dashboard cards, independent of the list filters
+        stats_qs = Task.objects.filter(category__pk=self.kwargs.get('pk'))
+        return {
+            'page': lambda: paginate(self.object_list, self.get_paginate_by(self.object_list)),
+            'counts': lambda: status_counts(stats_qs),
+        }
 
-        # Special-case: semantic ordering for priority names instead of alphabetical
-        if sort_key == 'priority':
-            priority_order_case = Case(
-                When(priority__priority_name__iexact='critical', then=Value(1)),
-                When(priority__priority_name__iexact='high', then=Value(2)),
-                When(priority__priority_name__iexact='medium', then=Value(3)),
-                When(priority__priority_name__iexact='low', then=Value(4)),
-                When(priority__priority_name__iexact='optional', then=Value(5)),
-                default=Value(999),
-                output_field=IntegerField(),
-            )
-            try:
-                qs = qs.annotate(priority_rank=priority_order_case)
-                if sort_dir == 'desc':
-                    qs = qs.order_by('-priority_rank')
-                else:
-                    qs = qs.order_by('priority_rank')
-            except Exception:
-                pass
-        else:
-            allowed_sorts = {
-                'title': 'title',
-                'task': 'title',
-                'status': 'status',
-                'deadline': 'deadline',
-                'due': 'deadline',
-            }
-            if sort_key in allowed_sorts:
-                order_field = allowed_sorts[sort_key]
-                if sort_dir == 'desc':
-                    order_field = '-' + order_field
-                try:
-                    qs = qs.order_by(order_field)
-                except Exception:
-                    pass
+    def paginate_queryset(self, queryset, page_size):
+        return self.get_query_results()['page']
 
-        return qs
+    def get_queryset(self):
+        category_pk = self.kwargs.get('pk')
+        qs = Task.objects.filter(category__pk=category_pk).select_related('priority')
+        # ?priority=<pk>, ?status=, ?q= and ?sort=<key>&dir=asc|desc
+        qs = filter_tasks(qs, self.request.GET)
+        return apply_order(qs, self.request.GET, TASK_SORTS)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         category_pk = self.kwargs.get('pk')
-        category = Category.objects.filter(pk=category_pk).first()
+        category = next((c for c in lookups.categories() if c.pk == category_pk), None)
 
         # expose available priorities and the selected priority for the template
-        context['priorities'] = Priority.objects.all()
+        context['priorities'] = lookups.priorities()
         context['selected_priority'] = self.request.GET.get('priority', '')
 
         # expose sorting state for the template
@@ -901,22 +978,9 @@ class CategoryTasksView(LoginRequiredMixin, ListView):
             'category_pk': category_pk,
         })
 
-        # compute category-specific task statistics for dashboard cards
-        qs = Task.objects.filter(category=category) if category else Task.objects.none()
-        today = timezone.now().date()
-        total = qs.count()
-        completed = qs.filter(status__iexact='Completed').count()
-        pending = qs.filter(status__iexact='Pending').count()
-        in_progress = qs.filter(status__iexact='In Progress').count()
-        overdue = qs.exclude(deadline__isnull=True).filter(deadline__lt=today).exclude(status__iexact='Completed').count()
-
-        context.update({
-            'total_tasks': total,
-            'completed_tasks': completed,
-            'pending_tasks': pending,
-            'in_progress_tasks': in_progress,
-            'overdue_tasks': overdue,
-        })
+        # category-specific task statistics for dashboard cards
+        results = self.get_query_results()
+        context.update(lazy_stats_context(lambda: results['counts'], 'tasks'))
 
         # Expose editable UI text labels so copy can be changed centrally
         context['labels'] = {
@@ -931,4 +995,51 @@ class CategoryTasksView(LoginRequiredMixin, ListView):
         # 🔍 include current search query back to template for form value
         context['search_query'] = self.request.GET.get('q', '')
 
-        return context
\ No newline at end of file
+        # bulk actions: "all matching rows" is resolved with this page's filters, category included
+        context['categories'] = lookups.categories()
+        context['filter_query'] = filter_query(self.request, category=category_pk)
+        context['bulk_url'] = reverse('task_bulk')
+
+        return context
+
+
+class AsyncQueryResultsMixin:
+    """Async GET for a QueryResultsMixin list view: its independent queries run concurrently.
+
+    Served natively under ASGI (``projectsite.asgi``); under WSGI Django runs it through
+    async_to_sync, which works but gains nothing. Building querysets and rendering stay
+    synchronous (they may touch the cache or the DB) and run on the sync thread.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        # LoginRequiredMixin reads the lazy request.user, which may not query on the event loop
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await View.dispatch(self, request, *args, **kwargs)
+
+    def prepare_queries(self):
+        self.object_list = self.get_queryset()
+        return self.get_queries()
+
+    async def get(self, request, *args, **kwargs):
+        queries = await sync_to_async(self.prepare_queries)()
+        self.query_results = await gather_queries(queries)
+        context = await sync_to_async(self.get_context_data)()
+        return self.render_to_response(context)
+
+
+@method_decorator(routers.read_from_replica, name='dispatch')
+class AsyncHomePageView(AsyncQueryResultsMixin, HomePageView):
+    pass
+
+
+@method_decorator(routers.read_from_replica, name='dispatch')
+class AsyncCategoryTasksView(AsyncQueryResultsMixin, CategoryTasksView):
+    pass
+
+
+@method_decorator(routers.read_from_replica, name='dispatch')
+class AsyncDashboardSectionView(AsyncQueryResultsMixin, DashboardSectionView):
+    """The dashboard sections under ASGI: the page itself is a shell (AsyncHomePageView only
+    gathers queries with ?lazy=0), so this is where the dashboard's queries run."""
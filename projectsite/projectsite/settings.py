@@ -57,14 +57,20 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 MIDDLEWARE = [
+    'hangarinorg.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'hangarinorg.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'hangarinorg.middleware.NoStoreMessagesMiddleware',
+    'hangarinorg.middleware.PageOwnerMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hangarinorg.middleware.ReadReplicaMiddleware',
+    'hangarinorg.middleware.LockRetryMiddleware',
 ]
 
 ROOT_URLCONF = 'projectsite.urls'
@@ -95,9 +101,35 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # each worker keeps its connection (and its PRAGMAs) across requests, checked before reuse
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # take the write lock at BEGIN: a deferred transaction that reads and then writes
+            # cannot wait for the lock and fails with "database is locked" straight away
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Read-only snapshot of 'default' for list, search, statistics and export pages (see
+    # HANGARIN_READ_REPLICAS). snapshot_replica swaps in a new file rather than writing to
+    # it, so SQLite may treat it as immutable; a connection lasts one request.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.replica.sqlite3'}?mode=ro&immutable=1",
+        'CONN_MAX_AGE': 0,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['hangarinorg.routers.ReplicaRouter']
+
+# Shared by all worker processes so lookup-table version bumps are seen everywhere
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.django_cache',
+    }
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,6 +170,11 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = (
     BASE_DIR / 'static',
 )
+# collectstatic writes fingerprinted copies (style.<hash>.css) plus .gz/.br variants
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'hangarinorg.storage.CompressedManifestStaticFilesStorage'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -189,3 +226,94 @@ PWA_APP_ICONS_APPLE = [
 ]
 PWA_APP_DIR = 'ltr'
 PWA_SERVICE_WORKER_PATH = os.path.join(BASE_DIR, 'static/js', 'serviceworker.js')
+
+# Rows per page for the keyset-paginated task, subtask and note lists
+HANGARIN_PAGE_SIZE = 50
+# Notes and subtasks shown at once on a task's page; "Load more" fetches the next ones
+HANGARIN_DETAIL_PAGE_SIZE = 20
+# Tasks shown per category in the dashboard's category groups
+HANGARIN_CATEGORY_GROUP_SIZE = 10
+
+# Per-request timing (Server-Timing header) and slow/duplicate query logging
+HANGARIN_REQUEST_TIMING = True
+HANGARIN_SLOW_REQUEST_MS = 500
+HANGARIN_SLOW_QUERY_MS = 100
+HANGARIN_DUPLICATE_QUERY_THRESHOLD = 5
+
+# Upper bound for ?limit= on the JSON API (defaults to HANGARIN_PAGE_SIZE rows)
+HANGARIN_API_MAX_PAGE_SIZE = 200
+
+# Rows fetched per database round trip (and written per chunk) by the streaming exports
+HANGARIN_EXPORT_CHUNK_SIZE = 2000
+
+# Rejected rows listed on the task import page (the import_tasks command reports all of them)
+HANGARIN_IMPORT_ERROR_LIMIT = 200
+
+# Route the dashboard and category task lists to their async views, which run their
+# independent queries concurrently; only worth it when served through projectsite.asgi
+HANGARIN_ASYNC_VIEWS = os.environ.get('HANGARIN_ASYNC_VIEWS', '') == '1'
+
+# Seconds a cached template fragment (stats cards, task tables, sidebar) is kept; entries are
+# keyed on user, query string and the data version, so writes never serve stale HTML (0 = off)
+HANGARIN_FRAGMENT_CACHE_TIMEOUT = 600
+
+# Days deletions are kept for /api/sync/ (prune_tombstones drops older ones); clients whose
+# cursor is older than this are told to reset and download everything again
+HANGARIN_SYNC_TOMBSTONE_DAYS = 30
+
+# Static files the service worker stores at install time (paths as given to {% static %});
+# its cache version is a hash of their contents, so changing any of them refreshes clients
+HANGARIN_OFFLINE_PRECACHE = [
+    'vendors/mdi/css/materialdesignicons.min.css',
+    'vendors/mdi/fonts/materialdesignicons-webfont.woff2',
+    'vendors/css/vendor.bundle.base.css',
+    'vendors/js/vendor.bundle.base.js',
+    'css/style.css',
+    'css/hover-effects.css',
+    'js/off-canvas.js',
+    'js/hoverable-collapse.js',
+    'js/misc.js',
+    'js/settings.js',
+    'js/snapshot.js',
+    'images/favicon.png',
+    'images/hangarin-logo.svg',
+    'images/hangarin-logo-mini.svg',
+]
+
+# Seconds any single deploy command (git pull, pip install, migrate) may run before the
+# deploy job is failed; run_deploy executes the jobs queued by the /deploy/ webhook
+HANGARIN_DEPLOY_STEP_TIMEOUT = 900
+
+# Serve the collected, fingerprinted static files (with .gz/.br variants and immutable
+# caching) from the app itself, for hosts without a front-end server mapping /static/.
+# Needs `collectstatic` (the deploy job runs it) and, locally, `runserver --nostatic`.
+# In production set HANGARIN_SERVE_STATIC=1, or have the web server serve /static/ from
+# STATIC_ROOT the same way: the .br/.gz variant the client accepts, and a one-year
+# immutable Cache-Control on fingerprinted names. Otherwise the files go out uncompressed
+# with no long-lived caching.
+HANGARIN_SERVE_STATIC = os.environ.get('HANGARIN_SERVE_STATIC', '') == '1'
+
+# Applied to every new SQLite connection (hangarinorg.db): WAL lets readers run alongside
+# a writer, busy_timeout (ms) makes a writer wait for the lock instead of failing, and
+# the mmap/page cache/temp store settings keep hot pages in memory
+HANGARIN_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 10000,
+    'mmap_size': 134217728,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+# Write requests still meeting "database is locked" after busy_timeout are rolled back and
+# run again this many times, waiting HANGARIN_DB_LOCK_BACKOFF_MS, doubled per retry
+HANGARIN_DB_LOCK_RETRIES = 3
+HANGARIN_DB_LOCK_BACKOFF_MS = 100
+
+# Database aliases that list, search, statistics and export pages may read from
+# (hangarinorg.routers). A replica is used only if it was synced within
+# HANGARIN_REPLICA_MAX_LAG seconds and after the user's own last write, otherwise the
+# request reads 'default'. `manage.py snapshot_replica --interval 60` keeps the local
+# SQLite snapshot current; an empty list reads everything from 'default'.
+HANGARIN_READ_REPLICAS = ['replica']
+HANGARIN_REPLICA_MAX_LAG = 300
@@ -14,31 +14,49 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from hangarinorg.views import deploy, root_redirect
 from hangarinorg.views import HomePageView, TaskListView
 from hangarinorg import views
+from hangarinorg import api
+
+# async variants run their independent queries concurrently (see HANGARIN_ASYNC_VIEWS)
+ASYNC_VIEWS = getattr(settings, 'HANGARIN_ASYNC_VIEWS', False)
+DashboardView = views.AsyncHomePageView if ASYNC_VIEWS else views.HomePageView
+DashboardSectionView = views.AsyncDashboardSectionView if ASYNC_VIEWS else views.DashboardSectionView
+CategoryTasksView = views.AsyncCategoryTasksView if ASYNC_VIEWS else views.CategoryTasksView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', root_redirect),
+    # ahead of django-pwa's route, which serves the worker file without its precache manifest
+    path('serviceworker.js', views.service_worker, name='serviceworker'),
     path('', include('pwa.urls')),
     path("accounts/", include("allauth.urls")), # allauth routes
-    path('dashboard/', views.HomePageView.as_view(), name='dashboard'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/sections/<str:section>/', DashboardSectionView.as_view(), name='dashboard_section'),
     path("deploy/", views.deploy, name="deploy"),
+    path("deploy/<int:pk>/", views.deploy_status, name="deploy_status"),
+    path('export/<str:kind>/', views.ExportView.as_view(), name='export'),
     # ========== GENERAL TASK URLS ==========
     path('task/', views.TaskListView.as_view(), name='task_list'),
     path('task/create/', views.TaskCreateView.as_view(), name='task_create'),
+    path('task/import/', views.TaskImportView.as_view(), name='task_import'),
+    path('task/bulk/', views.TaskBulkActionView.as_view(), name='task_bulk'),
+    path('task/rows/', views.TaskRowsView.as_view(), name='task_rows'),
     
     
     # ========== GENERAL TASK DETAIL/EDIT/DELETE (generic) ==========
     path('task/<int:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
     path('task/<int:pk>/edit/', views.TaskUpdateView.as_view(), name='task_edit'),
     path('task/<int:pk>/delete/', views.TaskDeleteView.as_view(), name='task_delete'),
+    # after edit/ and delete/, which it would otherwise shadow
+    path('task/<int:pk>/<str:section>/', views.TaskDetailSectionView.as_view(), name='task_detail_section'),
 
     # Dynamic category task view (by pk)
-    path('task/category/<int:pk>/', views.CategoryTasksView.as_view(), name='category_tasks'),
+    path('task/category/<int:pk>/', CategoryTasksView.as_view(), name='category_tasks'),
 
     # ========== CATEGORY CRUD URLs ==========
     path('categories/', views.CategoryListView.as_view(), name='category_list'),
@@ -62,8 +80,22 @@ urlpatterns = [
     # ========== SUBTASK CRUD URLs ==========
     path('subtask/', views.SubTaskListView.as_view(), name='subtask_list'),
     path('subtask/create/', views.SubTaskCreateView.as_view(), name='subtask_create'),
+    path('subtask/bulk/', views.SubTaskBulkActionView.as_view(), name='subtask_bulk'),
     path('subtask/<int:pk>/edit/', views.SubTaskUpdateView.as_view(), name='subtask_edit'),
     path('subtask/<int:pk>/delete/', views.SubTaskDeleteView.as_view(), name='subtask_delete'),
 
+    # ========== JSON API URLs ==========
+    path('api/tasks/', api.ApiListView.as_view(resource_name='tasks'), name='api_task_list'),
+    path('api/tasks/<int:pk>/', api.ApiDetailView.as_view(resource_name='tasks'), name='api_task_detail'),
+    path('api/subtasks/', api.ApiListView.as_view(resource_name='subtasks'), name='api_subtask_list'),
+    path('api/subtasks/<int:pk>/', api.ApiDetailView.as_view(resource_name='subtasks'), name='api_subtask_detail'),
+    path('api/notes/', api.ApiListView.as_view(resource_name='notes'), name='api_note_list'),
+    path('api/notes/<int:pk>/', api.ApiDetailView.as_view(resource_name='notes'), name='api_note_detail'),
+    path('api/categories/', api.ApiListView.as_view(resource_name='categories'), name='api_category_list'),
+    path('api/categories/<int:pk>/', api.ApiDetailView.as_view(resource_name='categories'), name='api_category_detail'),
+    path('api/priorities/', api.ApiListView.as_view(resource_name='priorities'), name='api_priority_list'),
+    path('api/priorities/<int:pk>/', api.ApiDetailView.as_view(resource_name='priorities'), name='api_priority_detail'),
+    path('api/sync/', api.ApiSyncView.as_view(), name='api_sync'),
+
     
 ]
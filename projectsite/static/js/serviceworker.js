@@ -1,30 +1,136 @@
+// Served by hangarinorg.views.service_worker, which prepends
+//   self.HANGARIN = {version, precache, offlineUrl}
+// version is a hash of this file and the precached files, so a deploy that changes
+// any of them installs a new worker and replaces the old caches.
+const CONFIG = self.HANGARIN;
+const STATIC_CACHE = 'hangarin-static-' + CONFIG.version;
+const RUNTIME_CACHE = 'hangarin-runtime-' + CONFIG.version;
+const PAGE_CACHE = 'hangarin-pages';
+const PAGE_LIMIT = 60;
+
+// Every app response names the signed-in user's pk in this header (empty when signed out).
+// PAGE_CACHE holds one user's pages, and OWNER_KEY records whose.
+const OWNER_HEADER = 'X-Hangarin-User';
+const OWNER_KEY = new URL('/serviceworker.js?owner', self.location).href;
+
+// never cached: sign-in/out, the API (the page keeps its own IndexedDB copy), downloads, admin
+const NETWORK_ONLY = ['/accounts/', '/api/', '/export/', '/admin/', '/deploy/', '/serviceworker.js'];
+
 self.addEventListener('install', function(e) {
     e.waitUntil(
-        caches.open('projectsite-cache-v2').then(function(cache) {
-            return cache.addAll([
-                '/static/css/style.css',
-                // you can add other static files here later
-            ]);
-        })
+        caches.open(STATIC_CACHE)
+            .then(function(cache) { return cache.addAll(CONFIG.precache); })
+            .then(function() { return self.skipWaiting(); })
+    );
+});
+
+self.addEventListener('activate', function(e) {
+    const current = [STATIC_CACHE, RUNTIME_CACHE];
+    e.waitUntil(
+        caches.keys().then(function(names) {
+            return Promise.all(names.map(function(name) {
+                // old static caches, the pre-manifest cache, and pages that point at old assets
+                if (current.indexOf(name) === -1) return caches.delete(name);
+            }));
+        }).then(function() { return self.clients.claim(); })
     );
 });
 
 self.addEventListener('fetch', function(e) {
-    e.respondWith((async function(){
-        // Try cache first
-        const cached = await caches.match(e.request);
-        if (cached) return cached;
+    const request = e.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
 
-        // Not in cache -> try network, but handle network failures gracefully
-        try {
-            const netResp = await fetch(e.request);
-            return netResp;
-        } catch (err) {
-            // Network failed (offline or other error). Try a sensible fallback.
-            // Prefer a cached navigation/root or a small offline Response.
-            const fallback = await caches.match('/static/css/style.css');
-            if (fallback) return fallback;
-            return new Response('Service Unavailable', { status: 503, statusText: 'Service Unavailable' });
-        }
-    })());
+    // sign-in and sign-out (a GET here) change whose pages these are
+    if (request.method !== 'GET' || url.pathname.startsWith('/accounts/')) {
+        e.respondWith(dropPagesAfter(request));
+        return;
+    }
+    if (NETWORK_ONLY.some(function(prefix) { return url.pathname.startsWith(prefix); })) return;
+
+    if (url.pathname.startsWith('/static/')) {
+        e.respondWith(cacheFirst(request));
+    } else if (request.mode === 'navigate' || url.pathname.startsWith('/dashboard/sections/')) {
+        e.respondWith(staleWhileRevalidate(e, request));
+    }
 });
+
+// A write can change what any cached page shows, so the pages go once it has reached the server
+function dropPagesAfter(request) {
+    return fetch(request).then(function(response) {
+        return caches.delete(PAGE_CACHE).then(function() { return response; });
+    });
+}
+
+function cacheFirst(request) {
+    // asset URLs carry ?v= cache busters that the precache list leaves out
+    return caches.match(request, {ignoreSearch: true}).then(function(cached) {
+        if (cached) return cached;
+        return fetch(request).then(function(response) {
+            if (response.ok) {
+                const copy = response.clone();
+                caches.open(RUNTIME_CACHE).then(function(cache) { cache.put(request, copy); });
+            }
+            return response;
+        });
+    });
+}
+
+function cacheable(response) {
+    // no redirects (an expired session bounces to the login page) and nothing the server
+    // marked no-store, such as pages showing a one-time "saved" message
+    return response.ok && response.type === 'basic' && !response.redirected &&
+        !/no-store/.test(response.headers.get('Cache-Control') || '');
+}
+
+function staleWhileRevalidate(e, request) {
+    return caches.open(PAGE_CACHE).then(function(cache) {
+        return cache.match(request, {ignoreVary: true}).then(function(cached) {
+            const network = fetch(request).then(function(response) {
+                const keep = function() { return response; };
+                return keepPage(request, response).then(keep, keep);
+            });
+            if (cached) {
+                e.waitUntil(network.catch(function() {}));
+                return cached;
+            }
+            return network.catch(function() {
+                if (request.mode === 'navigate') return caches.match(CONFIG.offlineUrl);
+                return Response.error();
+            });
+        });
+    });
+}
+
+// Store a fresh page. A response for another user, or for nobody (signed out elsewhere, or
+// an expired session bounced to the login page), first drops the pages cached so far.
+function keepPage(request, response) {
+    const owner = response.headers.get(OWNER_HEADER) || '';
+    // cloned now, before the page starts reading the body
+    const copy = owner && cacheable(response) ? response.clone() : null;
+    return caches.open(PAGE_CACHE).then(function(cache) {
+        return cache.match(OWNER_KEY).then(function(entry) {
+            return entry ? entry.text() : null;
+        }).then(function(stored) {
+            if (stored === owner) return cache;
+            return caches.delete(PAGE_CACHE)
+                .then(function() { return caches.open(PAGE_CACHE); })
+                .then(function(fresh) {
+                    return fresh.put(OWNER_KEY, new Response(owner)).then(function() { return fresh; });
+                });
+        });
+    }).then(function(cache) {
+        if (!copy) return;
+        return cache.put(request, copy).then(function() { return trim(cache); });
+    });
+}
+
+function trim(cache) {
+    // keys come back oldest first
+    return cache.keys().then(function(keys) {
+        keys = keys.filter(function(key) { return key.url !== OWNER_KEY; });
+        return Promise.all(keys.slice(0, Math.max(keys.length - PAGE_LIMIT, 0)).map(function(key) {
+            return cache.delete(key);
+        }));
+    });
+}
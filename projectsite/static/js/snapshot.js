@@ -0,0 +1,97 @@
+// Offline copy of the signed-in user's data in IndexedDB, kept current from /api/sync/.
+// Pages call HangarinSnapshot.sync() after load; the offline page reads it back with read().
+(function(global) {
+  const DB_NAME = 'hangarin';
+  const DB_VERSION = 1;
+  const STORES = ['tasks', 'subtasks', 'notes', 'categories', 'priorities'];
+  const PAGE_SIZE = 200;
+
+  function open() {
+    return new Promise(function(resolve, reject) {
+      const req = indexedDB.open(DB_NAME, DB_VERSION);
+      req.onupgradeneeded = function() {
+        const db = req.result;
+        STORES.forEach(function(name) {
+          if (!db.objectStoreNames.contains(name)) db.createObjectStore(name, {keyPath: 'id'});
+        });
+        if (!db.objectStoreNames.contains('meta')) db.createObjectStore('meta');
+      };
+      req.onsuccess = function() { resolve(req.result); };
+      req.onerror = function() { reject(req.error); };
+    });
+  }
+
+  function request(req) {
+    return new Promise(function(resolve, reject) {
+      req.onsuccess = function() { resolve(req.result); };
+      req.onerror = function() { reject(req.error); };
+    });
+  }
+
+  function finished(tx) {
+    return new Promise(function(resolve, reject) {
+      tx.oncomplete = function() { resolve(); };
+      tx.onerror = tx.onabort = function() { reject(tx.error); };
+    });
+  }
+
+  function meta(db, key) {
+    return request(db.transaction('meta').objectStore('meta').get(key));
+  }
+
+  // one page of /api/sync/ goes in as a single transaction, cursor included, so an
+  // interrupted sync resumes from the last page that was fully stored
+  function apply(db, page, clear, owner) {
+    const tx = db.transaction(STORES.concat('meta'), 'readwrite');
+    STORES.forEach(function(name) {
+      const store = tx.objectStore(name);
+      if (clear) store.clear();
+      (page.changes[name] || []).forEach(function(row) { store.put(row); });
+      (page.deleted[name] || []).forEach(function(id) { store.delete(id); });
+    });
+    const info = tx.objectStore('meta');
+    info.put(page.cursor, 'cursor');
+    info.put(owner, 'owner');
+    info.put(new Date().toISOString(), 'syncedAt');
+    return finished(tx);
+  }
+
+  let running = null;
+
+  function sync(url, owner) {
+    if (running) return running;
+    running = open().then(function(db) {
+      return meta(db, 'owner').then(function(stored) {
+        // a different account signed in on this browser: start from an empty copy
+        return stored === owner ? meta(db, 'cursor') : null;
+      }).then(function(cursor) {
+        function pull(since) {
+          const query = '?limit=' + PAGE_SIZE + (since ? '&since=' + encodeURIComponent(since) : '');
+          return fetch(url + query, {credentials: 'same-origin', headers: {Accept: 'application/json'}})
+            .then(function(r) { if (!r.ok) throw new Error('sync failed: ' + r.status); return r.json(); })
+            .then(function(page) {
+              return apply(db, page, !since || page.reset, owner).then(function() {
+                if (page.has_more) return pull(page.cursor);
+              });
+            });
+        }
+        return pull(cursor);
+      }).finally(function() { db.close(); });
+    }).finally(function() { running = null; });
+    return running;
+  }
+
+  function read() {
+    return open().then(function(db) {
+      const tx = db.transaction(STORES.concat('meta'));
+      const result = {};
+      const reads = STORES.map(function(name) {
+        return request(tx.objectStore(name).getAll()).then(function(rows) { result[name] = rows; });
+      });
+      reads.push(request(tx.objectStore('meta').get('syncedAt')).then(function(value) { result.syncedAt = value; }));
+      return Promise.all(reads).then(function() { db.close(); return result; });
+    });
+  }
+
+  global.HangarinSnapshot = {sync: sync, read: read};
+})(window);